@@ -0,0 +1,125 @@
+"""
+Synthetic datasets for the benchmarks, generated with polars expressions from
+hashed row indexes so any size is reproducible without a random number
+generator or stored fixtures.
+"""
+
+import os
+from typing import Callable, Dict, List
+
+import polars as pl
+
+# Values of the categorical and free text columns.
+CATEGORIES = [f"category_{index}" for index in range(20)]
+WORDS = (
+    "the quick brown fox jumps over a lazy dog while customers order fresh "
+    "products from regional stores during busy weekend sales"
+).split()
+TEXT_WORDS = 8
+# One value in NULL_EVERY is null in every column.
+NULL_EVERY = 20
+
+
+def _hash(column: int, seed: int) -> pl.Expr:
+    """Pseudo random uint64 per row, different for every column and seed."""
+    return pl.int_range(pl.len(), dtype=pl.UInt64).hash(seed * 1_000_003 + column)
+
+
+def _pick(values: List[str], hashed: pl.Expr) -> pl.Expr:
+    return pl.lit(pl.Series(values)).gather(hashed % len(values))
+
+
+def _int(hashed: pl.Expr) -> pl.Expr:
+    return (hashed % 1_000_000).cast(pl.Int64)
+
+
+def _float(hashed: pl.Expr) -> pl.Expr:
+    return (hashed % 10_000_000).cast(pl.Float64) / 100
+
+
+def _date_string(hashed: pl.Expr) -> pl.Expr:
+    days = (hashed % 3650).cast(pl.Int64)
+    return (pl.lit(18262, dtype=pl.Int32).cast(pl.Date) + pl.duration(days=days)).dt.strftime(
+        "%Y-%m-%d"
+    )
+
+
+def _categorical(hashed: pl.Expr) -> pl.Expr:
+    return _pick(CATEGORIES, hashed).cast(pl.Categorical)
+
+
+def _text(hashed: pl.Expr) -> pl.Expr:
+    # Every word is picked by a different slice of the hash.
+    return pl.concat_str(
+        [_pick(WORDS, hashed // (len(WORDS) ** index)) for index in range(TEXT_WORDS)],
+        separator=" ",
+    )
+
+
+def _list(hashed: pl.Expr) -> pl.Expr:
+    return pl.concat_list([hashed % 100, (hashed // 100) % 100, (hashed // 10_000) % 100])
+
+
+def _struct(hashed: pl.Expr) -> pl.Expr:
+    return pl.struct(
+        id=(hashed % 10_000).cast(pl.Int64), label=_pick(CATEGORIES, hashed // 10_000)
+    )
+
+
+KINDS: Dict[str, Callable[[pl.Expr], pl.Expr]] = {
+    "int": _int,
+    "float": _float,
+    "date_string": _date_string,
+    "categorical": _categorical,
+    "text": _text,
+    "list": _list,
+    "struct": _struct,
+}
+
+# Column kinds of every dtype mix, repeated to the requested width.
+MIXES: Dict[str, List[str]] = {
+    "numeric": ["int", "float"],
+    "dates": ["date_string"],
+    "categorical": ["categorical"],
+    "text": ["text"],
+    "nested": ["list", "struct"],
+    "mixed": ["int", "float", "date_string", "categorical", "text", "list", "struct"],
+}
+
+# Extensions written by `write_dataset`, CSV cannot hold nested columns.
+FILE_FORMATS = ["parquet", "ipc", "csv", "ndjson"]
+
+
+def column_kinds(n_columns: int, mix: str) -> List[str]:
+    if mix not in MIXES:
+        raise ValueError(f"Unknown dtype mix {mix}, available mixes are : {list(MIXES)}")
+    kinds = MIXES[mix]
+    return [kinds[index % len(kinds)] for index in range(n_columns)]
+
+
+def generate_dataset(n_rows: int, n_columns: int, mix: str = "mixed", seed: int = 0) -> pl.DataFrame:
+    """
+    A frame of `n_rows` rows and `n_columns` columns of the `mix` dtypes, the
+    same for the same arguments. One value in `NULL_EVERY` is null.
+    """
+    exprs = []
+    for index, kind in enumerate(column_kinds(n_columns, mix)):
+        hashed = _hash(index, seed)
+        value = KINDS[kind](hashed)
+        exprs.append(
+            pl.when(hashed % NULL_EVERY == 0).then(None).otherwise(value).alias(f"{kind}_{index}")
+        )
+    return pl.LazyFrame({"row": pl.int_range(n_rows, eager=True)}).select(exprs).collect()
+
+
+def write_dataset(data: pl.DataFrame, directory: str, file_format: str = "parquet") -> str:
+    """Write `data` to `directory` in `file_format`, returns the file path."""
+    if file_format not in FILE_FORMATS:
+        raise ValueError(f"Unknown file format {file_format}, available are : {FILE_FORMATS}")
+    nested = [name for name, dtype in data.schema.items() if dtype.is_nested()]
+    if file_format == "csv" and nested:
+        raise ValueError(f"CSV cannot hold the nested columns {nested}.")
+
+    path = os.path.join(directory, f"dataset.{file_format}")
+    getattr(data, f"write_{file_format}")(path)
+    return path
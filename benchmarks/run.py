@@ -0,0 +1,306 @@
+"""
+Times the hot paths of mindscope on synthetic datasets and compares the
+results to a stored baseline.
+
+    python -m benchmarks.run --grid default --output benchmarks/results/latest.json
+    python -m benchmarks.run --grid default --baseline benchmarks/results/baseline.json
+
+Every case records the best wall time of `--repeat` runs, the peak resident
+memory above the memory at its start, and for enrichment the prompt and
+completion tokens. With `--baseline` the run exits with 1 when a case got
+slower, bigger or more expensive than the baseline by more than `--threshold`.
+"""
+
+import argparse
+import gc
+import itertools
+import json
+import os
+import platform
+import resource
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, List
+
+import polars as pl
+
+from mindscope.components.summarizer import Summarizer
+from mindscope.components.utils.manager import get_dataframe_from_filepath
+from .datasets import MIXES, FILE_FORMATS, generate_dataset, write_dataset
+from .stub_llm import StubLLM
+
+TARGETS = ["load", "summarize", "enrich"]
+
+# Rows, widths and dtype mixes of every grid, cases above `--max-cells` cells
+# are skipped so the full grid can run on smaller machines.
+GRIDS: Dict[str, dict] = {
+    "smoke": {"rows": [1_000], "columns": [5], "mixes": list(MIXES)},
+    "default": {
+        "rows": [1_000, 100_000, 1_000_000],
+        "columns": [5, 50, 500],
+        "mixes": ["numeric", "mixed"],
+    },
+    "full": {
+        "rows": [1_000, 10_000, 100_000, 1_000_000, 10_000_000, 100_000_000],
+        "columns": [5, 50, 500, 2_000],
+        "mixes": list(MIXES),
+    },
+}
+DEFAULT_MAX_CELLS = 500_000_000
+# Differences below these floors are noise, never regressions.
+MIN_SECONDS = 0.01
+MIN_MEMORY_MB = 16.0
+MEMORY_SAMPLE_INTERVAL = 0.005
+
+
+def _rss_mb() -> float:
+    """Resident memory of this process."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:
+        # Peak instead of current memory, but only on platforms without /proc.
+        maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return maxrss / 2**20 if sys.platform == "darwin" else maxrss / 2**10
+
+
+class PeakMemory:
+    """Samples the resident memory in a thread, `peak_mb` is the peak above the start."""
+
+    def __init__(self, interval: float = MEMORY_SAMPLE_INTERVAL):
+        self.interval = interval
+        self.peak_mb: float = 0.0
+        self._stop = threading.Event()
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            self._peak = max(self._peak, _rss_mb())
+
+    def __enter__(self):
+        gc.collect()
+        self._start = self._peak = _rss_mb()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak_mb = max(self._peak, _rss_mb()) - self._start
+
+
+def measure(func: Callable[[], object], repeat: int = 3) -> dict:
+    """Best wall time and largest peak memory of `repeat` calls, with the last result."""
+    seconds, peak_mb = [], 0.0
+    for _ in range(repeat):
+        with PeakMemory() as memory:
+            started = time.perf_counter()
+            result = func()
+            seconds.append(time.perf_counter() - started)
+        peak_mb = max(peak_mb, memory.peak_mb)
+    return {
+        "seconds": round(min(seconds), 6),
+        "seconds_all": [round(value, 6) for value in seconds],
+        "peak_memory_mb": round(peak_mb, 3),
+        "result": result,
+    }
+
+
+def _enrich_tokens(summarizer: Summarizer) -> dict:
+    tokens = {"requests": len(summarizer.llm_responses)}
+    for response in summarizer.llm_responses:
+        for key, value in itertools.chain(
+            (response.usage or {}).items(), (response.estimated_tokens or {}).items()
+        ):
+            tokens[key] = tokens.get(key, 0) + value
+    return tokens
+
+
+def run_case(
+    n_rows: int,
+    n_columns: int,
+    mix: str,
+    targets: List[str],
+    directory: str,
+    file_format: str = "parquet",
+    repeat: int = 3,
+) -> List[dict]:
+    """Results of every target on one synthetic dataset."""
+    data = generate_dataset(n_rows, n_columns, mix)
+    case = {"rows": n_rows, "columns": n_columns, "mix": mix}
+    results = []
+
+    def record(target: str, measured: dict, **extra):
+        measured.pop("result")
+        results.append(
+            {
+                "case": f"{target}/rows={n_rows}/columns={n_columns}/mix={mix}",
+                "target": target,
+                **case,
+                **measured,
+                **extra,
+            }
+        )
+
+    if "load" in targets:
+        try:
+            path = write_dataset(data, directory, file_format)
+            record(
+                "load",
+                measure(lambda: get_dataframe_from_filepath(path), repeat),
+                file_format=file_format,
+            )
+        except ValueError as e:
+            results.append({"case": f"load/rows={n_rows}/columns={n_columns}/mix={mix}",
+                            "target": "load", **case, "skipped": str(e)})
+
+    summary = None
+    if "summarize" in targets or "enrich" in targets:
+        measured = measure(lambda: Summarizer(data).summarize(n_samples=3), repeat)
+        summary = measured["result"]
+        if "summarize" in targets:
+            record("summarize", measured)
+
+    if "enrich" in targets:
+        summarizer = Summarizer(data, llm_client=StubLLM())
+        record(
+            "enrich",
+            measure(lambda: summarizer._enrich(summary), repeat),
+            tokens=_enrich_tokens(summarizer),
+        )
+    return results
+
+
+def environment() -> dict:
+    return {
+        "python": platform.python_version(),
+        "polars": pl.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "polars_threads": pl.thread_pool_size(),
+    }
+
+
+def run(
+    rows: List[int],
+    columns: List[int],
+    mixes: List[str],
+    targets: List[str] = TARGETS,
+    file_format: str = "parquet",
+    repeat: int = 3,
+    max_cells: int = DEFAULT_MAX_CELLS,
+) -> dict:
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for n_rows, n_columns, mix in itertools.product(rows, columns, mixes):
+            if n_rows * n_columns > max_cells:
+                continue
+            results.extend(
+                run_case(n_rows, n_columns, mix, targets, directory, file_format, repeat)
+            )
+            print(f"done : rows={n_rows} columns={n_columns} mix={mix}", file=sys.stderr)
+    return {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "environment": environment(),
+        "results": results,
+    }
+
+
+def _regression(metric: str, current: float, baseline: float, threshold: float) -> dict | None:
+    floor = {"seconds": MIN_SECONDS, "peak_memory_mb": MIN_MEMORY_MB}.get(metric, 0)
+    if current - baseline <= floor or current <= baseline * (1 + threshold):
+        return None
+    return {
+        "metric": metric,
+        "baseline": baseline,
+        "current": current,
+        "ratio": round(current / baseline, 3) if baseline else None,
+    }
+
+
+def compare(current: dict, baseline: dict, threshold: float = 0.25) -> List[dict]:
+    """
+    Regressions of `current` against `baseline`: cases whose time, peak memory
+    or total tokens grew by more than `threshold`. Cases missing from either
+    run are ignored.
+    """
+    baseline_cases = {result["case"]: result for result in baseline["results"]}
+    regressions = []
+    for result in current["results"]:
+        base = baseline_cases.get(result["case"])
+        if base is None or "skipped" in result or "skipped" in base:
+            continue
+        metrics = [
+            ("seconds", result["seconds"], base["seconds"]),
+            ("peak_memory_mb", result["peak_memory_mb"], base["peak_memory_mb"]),
+        ]
+        if "tokens" in result and "tokens" in base:
+            metrics.append(
+                ("total_tokens", result["tokens"].get("total_tokens", 0),
+                 base["tokens"].get("total_tokens", 0))
+            )
+        for metric, value, base_value in metrics:
+            regression = _regression(metric, value, base_value, threshold)
+            if regression is not None:
+                regressions.append({"case": result["case"], **regression})
+    return regressions
+
+
+def parse_args(argv: List[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.run", description="Benchmark mindscope hot paths."
+    )
+    parser.add_argument("--grid", choices=list(GRIDS), default="default")
+    parser.add_argument("--rows", type=int, nargs="+", help="Overrides the rows of the grid.")
+    parser.add_argument("--columns", type=int, nargs="+", help="Overrides the widths of the grid.")
+    parser.add_argument("--mixes", choices=list(MIXES), nargs="+", help="Overrides the dtype mixes.")
+    parser.add_argument("--targets", choices=TARGETS, nargs="+", default=TARGETS)
+    parser.add_argument("--file-format", choices=FILE_FORMATS, default="parquet")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--max-cells", type=int, default=DEFAULT_MAX_CELLS)
+    parser.add_argument("-o", "--output", default=os.path.join("benchmarks", "results", "latest.json"))
+    parser.add_argument("--baseline", help="Results file to compare the run with.")
+    parser.add_argument("--threshold", type=float, default=0.25)
+    return parser.parse_args(argv)
+
+
+def main(argv: List[str] | None = None) -> int:
+    args = parse_args(argv)
+    grid = GRIDS[args.grid]
+    results = run(
+        rows=args.rows or grid["rows"],
+        columns=args.columns or grid["columns"],
+        mixes=args.mixes or grid["mixes"],
+        targets=args.targets,
+        file_format=args.file_format,
+        repeat=args.repeat,
+        max_cells=args.max_cells,
+    )
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+
+    for result in results["results"]:
+        if "skipped" in result:
+            print(f"{result['case']:<60} skipped")
+        else:
+            print(f"{result['case']:<60} {result['seconds']:>10.4f}s {result['peak_memory_mb']:>10.1f}MB")
+    print(f"Results: {args.output}")
+
+    if args.baseline is None:
+        return 0
+    with open(args.baseline) as f:
+        regressions = compare(results, json.load(f), threshold=args.threshold)
+    for regression in regressions:
+        print(
+            f"REGRESSION {regression['case']} {regression['metric']}: "
+            f"{regression['baseline']} -> {regression['current']}"
+        )
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
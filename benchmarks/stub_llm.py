@@ -0,0 +1,54 @@
+import json
+import time
+
+from mindscope.components.llm import BaseLLM, count_message_tokens, count_tokens
+from mindscope.components.models import GenerationConfig, LLMResponse, Message
+
+
+class StubLLM(BaseLLM):
+    """
+    Answers enrichment prompts locally with a description and a summary per
+    column of the prompt, so enrichment can be timed without network access.
+    Usage is the local token estimate of prompt and answer.
+    """
+
+    def __init__(self, latency: float = 0.0, **kwargs):
+        super().__init__(provider="stub", model_name="stub", **kwargs)
+        # Seconds every request sleeps, to stand in for the provider latency
+        self.latency = latency
+        self.calls: int = 0
+
+    @staticmethod
+    def _answer(messages) -> str:
+        content = messages[-1]["content"]
+        if "Dataset:" not in content:
+            return "{}"
+        summary = json.loads(content.split("Dataset:", 1)[1])
+        return json.dumps(
+            {
+                "description": "A generated description.",
+                "columns": [
+                    {"column": column["column"], "summary": f"Summary of {column['column']}."}
+                    for column in summary["columns"]
+                ],
+            }
+        )
+
+    def chat(self, messages, gen_config: GenerationConfig | None = None, **kwargs) -> LLMResponse:
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        answer = self._answer(messages)
+        prompt_tokens, completion_tokens = count_message_tokens(messages), count_tokens(answer)
+        return LLMResponse(
+            text=[Message(role="assistant", content=answer)],
+            config=gen_config,
+            usage={
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        )
+
+    def generate_text(self, messages, gen_config: GenerationConfig | None = None, **kwargs) -> LLMResponse:
+        return self.chat(messages, gen_config=gen_config, **kwargs)
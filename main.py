@@ -1,6 +1,7 @@
-def main():
-    print("Hello from mindscope!")
+import sys
+
+from mindscope.cli import main
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
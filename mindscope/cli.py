@@ -0,0 +1,216 @@
+"""
+Command line entry point, profiles many files at once with a pool of worker
+processes and writes one summary per input plus a run manifest.
+
+    mindscope data/*.csv extracts/ --output-dir summaries --workers 8
+"""
+
+import argparse
+import glob
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timezone
+from typing import Dict, List
+
+from pydantic import BaseModel
+
+from mindscope.components.summarizer import Summarizer
+from mindscope.components.models.frame import summary_to_frame
+from mindscope.components.utils.manager import (
+    READ_EXTENSIONS,
+    get_dataframe_from_filepath,
+    get_file_statistics,
+    has_file_statistics,
+)
+from mindscope.components.utils.summarizer import datetime_serializer
+
+logger = logging.getLogger(__name__)
+
+# Extensions picked up when a directory is given.
+SUPPORTED_EXTENSIONS = set(READ_EXTENSIONS)
+OUTPUT_FORMATS = ["json", "parquet"]
+MANIFEST_FILENAME = "manifest.json"
+
+
+def parse_args(argv: List[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="mindscope", description="Profile data files into column summaries."
+    )
+    parser.add_argument("inputs", nargs="+", help="Files, glob patterns or directories.")
+    parser.add_argument("-o", "--output-dir", default="mindscope_summaries")
+    parser.add_argument("-f", "--format", choices=OUTPUT_FORMATS, default="json")
+    parser.add_argument(
+        "-w", "--workers", type=int, default=os.cpu_count() or 1,
+        help="Worker processes, 1 profiles the files in this process.",
+    )
+    parser.add_argument("-r", "--recursive", action="store_true", help="Walk directories recursively.")
+    parser.add_argument("--n-samples", type=int, default=3)
+    parser.add_argument("--enrich", action="store_true", help="Enrich summaries with an LLM.")
+    parser.add_argument("--approximate", action="store_true", help="Use sketches and samples.")
+    parser.add_argument("--lazy", action="store_true", help="Scan files instead of reading them.")
+    parser.add_argument(
+        "--columns", type=lambda value: value.split(","), default=None,
+        help="Comma separated columns to profile, the others are not read.",
+    )
+    parser.add_argument("--n-rows", type=int, default=None, help="Profile the first rows only.")
+    parser.add_argument(
+        "--file-statistics", action="store_true",
+        help="Read min, max and null counts of parquet files from their footer.",
+    )
+    parser.add_argument(
+        "--relationships", type=int, default=0, metavar="K",
+        help="Report the K most correlated or associated column pairs.",
+    )
+    return parser.parse_args(argv)
+
+
+def _is_supported(path: str) -> bool:
+    return path.split(".")[-1].lower() in SUPPORTED_EXTENSIONS
+
+
+def expand_inputs(inputs: List[str], recursive: bool = False) -> List[str]:
+    """Files matched by `inputs`, in order and without duplicates."""
+    paths = []
+    for item in inputs:
+        if os.path.isdir(item):
+            pattern = os.path.join(item, "**", "*") if recursive else os.path.join(item, "*")
+            matches = [
+                path for path in sorted(glob.glob(pattern, recursive=recursive))
+                if os.path.isfile(path) and _is_supported(path)
+            ]
+        elif glob.has_magic(item):
+            matches = [path for path in sorted(glob.glob(item, recursive=True)) if os.path.isfile(path)]
+        else:
+            matches = [item]
+        paths.extend(os.path.normpath(path) for path in matches)
+    return list(dict.fromkeys(paths))
+
+
+def output_paths(paths: List[str], output_dir: str, output_format: str) -> Dict[str, str]:
+    """Summary path of every input, mirroring the inputs below their common directory."""
+    if not paths:
+        return {}
+    root = os.path.commonpath([os.path.dirname(os.path.abspath(path)) for path in paths])
+    return {
+        path: os.path.join(
+            output_dir, f"{os.path.relpath(os.path.abspath(path), root)}.summary.{output_format}"
+        )
+        for path in paths
+    }
+
+
+def write_summary(summary: dict, path: str, output_format: str):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    if output_format == "json":
+        with open(path, "w") as f:
+            json.dump(summary, f, default=datetime_serializer, indent=2)
+    else:
+        # One row per column, see `Summary.to_frame`.
+        summary_to_frame(summary).write_parquet(path)
+
+
+def profile_file(path: str, output_path: str, options: dict) -> dict:
+    """Profile one file and write its summary, never raises so one bad file cannot stop a run."""
+    started = time.perf_counter()
+    entry = {"input": path, "output": output_path}
+    try:
+        file_statistics = None
+        if options["file_statistics"] and has_file_statistics(path, options["n_rows"]):
+            file_statistics = get_file_statistics(path)
+        data = get_dataframe_from_filepath(
+            path,
+            lazy=options["lazy"] or file_statistics is not None,
+            columns=options["columns"],
+            n_rows=options["n_rows"],
+        )
+        summarizer = Summarizer(
+            data, filename=os.path.basename(path), file_statistics=file_statistics
+        )
+        summarizer.RELATIONSHIPS_TOP_K = options["relationships"]
+        summary = summarizer.summarize(
+            n_samples=options["n_samples"],
+            enrich=options["enrich"],
+            approximate=options["approximate"],
+        )
+        if isinstance(summary, BaseModel):
+            summary = summary.model_dump()
+        write_summary(summary, output_path, options["format"])
+        entry.update(status="ok", rows=summarizer.N_ROWS, columns=summarizer.N_COLUMNS)
+    except Exception as e:
+        entry.update(status="failed", error=f"{e.__class__.__name__}: {e}")
+    entry["seconds"] = round(time.perf_counter() - started, 4)
+    return entry
+
+
+def run(args: argparse.Namespace) -> dict:
+    """Profile every input and write the manifest, returns the manifest."""
+    started_at = datetime.now(timezone.utc)
+    started = time.perf_counter()
+    paths = expand_inputs(args.inputs, recursive=args.recursive)
+    outputs = output_paths(paths, args.output_dir, args.format)
+    options = {
+        "format": args.format,
+        "n_samples": args.n_samples,
+        "enrich": args.enrich,
+        "approximate": args.approximate,
+        "lazy": args.lazy,
+        "columns": args.columns,
+        "n_rows": args.n_rows,
+        "file_statistics": args.file_statistics,
+        "relationships": args.relationships,
+    }
+    workers = max(1, min(args.workers, len(paths) or 1))
+
+    entries: Dict[str, dict] = {}
+    if workers == 1:
+        for path in paths:
+            entries[path] = profile_file(path, outputs[path], options)
+            logger.info(f"{entries[path]['status']} : {path}")
+    else:
+        # Polars is multithreaded, forking it can deadlock.
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+            futures = {
+                executor.submit(profile_file, path, outputs[path], options): path
+                for path in paths
+            }
+            for future in as_completed(futures):
+                path = futures[future]
+                entries[path] = future.result()
+                logger.info(f"{entries[path]['status']} : {path}")
+
+    files = [entries[path] for path in paths]
+    manifest = {
+        "started_at": started_at.isoformat(),
+        "seconds": round(time.perf_counter() - started, 4),
+        "workers": workers,
+        "options": options,
+        "succeeded": sum(entry["status"] == "ok" for entry in files),
+        "failed": sum(entry["status"] != "ok" for entry in files),
+        "files": files,
+    }
+    os.makedirs(args.output_dir, exist_ok=True)
+    with open(os.path.join(args.output_dir, MANIFEST_FILENAME), "w") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def main(argv: List[str] | None = None) -> int:
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
+    args = parse_args(argv)
+    manifest = run(args)
+    print(
+        f"Profiled {manifest['succeeded']} file(s), {manifest['failed']} failed, "
+        f"in {manifest['seconds']:.2f}s. Manifest: "
+        f"{os.path.join(args.output_dir, MANIFEST_FILENAME)}"
+    )
+    return 1 if manifest["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
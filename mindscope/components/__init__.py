@@ -1,4 +1,6 @@
 from .summarizer import Summarizer
+from .analyzer import PersonaAnalyzer
+from .state import SummaryState
 
 
-__all__ = ["Summarizer"]
+__all__ = ["Summarizer", "PersonaAnalyzer", "SummaryState"]
@@ -0,0 +1,120 @@
+import asyncio
+import inspect
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+from pydantic import BaseModel
+
+from mindscope.components.models import LLMResponse, GenerationConfig, PersonaAnalysis, Summary
+from mindscope.components.llm import llm, BaseLLM, LLMCache
+from .core import INSTRUMENTATION
+from .core.instrumentation import usage_attributes
+from .persona import Persona
+from .utils.summarizer import compact_summary, datetime_serializer
+from .prompts.persona import PERSONA_ANALYSIS_SYSTEM_PROMPT, PERSONA_ANALYSIS_USER_PROMPT
+
+logger = logging.getLogger(__name__)
+
+
+class PersonaAnalyzer:
+    """
+    Analyzes one dataset summary for many personas.
+
+    The summary is serialized once into a system prompt shared by every
+    persona, only the persona itself differs between requests. Requests are
+    sent concurrently and a result is returned per persona name.
+    """
+
+    def __init__(
+        self,
+        summary: Summary | dict,
+        llm_cache: LLMCache | None = None,
+        llm_client: BaseLLM | None = None,
+    ):
+        self.summary = summary.model_dump() if isinstance(summary, BaseModel) else summary
+        self.llm_cache = llm_cache
+        self.llm_client = llm_client
+        # Input tokens of the dataset summary shared by all personas
+        self.ANALYSIS_TOKEN_BUDGET: int = 16_000
+        # Output tokens allowed per persona analysis
+        self.ANALYSIS_MAX_TOKENS: int = 1000
+        # Persona analyses sent at once by the synchronous client
+        self.ANALYSIS_MAX_WORKERS: int = 4
+        self._system_prompt: str = None
+
+    def _llm_client(self, is_async: bool = False) -> BaseLLM:
+        if self.llm_client is not None:
+            return self.llm_client
+        return llm(provider="openai", is_async=is_async, cache=self.llm_cache)
+
+    def _shared_prompt(self) -> str:
+        if self._system_prompt is None:
+            summary, _ = compact_summary(self.summary, self.ANALYSIS_TOKEN_BUDGET)
+            self._system_prompt = PERSONA_ANALYSIS_SYSTEM_PROMPT.format(
+                json.dumps(summary, default=datetime_serializer)
+            )
+        return self._system_prompt
+
+    def _messages(self, persona: Persona) -> list:
+        return [
+            {"role": "system", "content": self._shared_prompt()},
+            {
+                "role": "user",
+                "content": PERSONA_ANALYSIS_USER_PROMPT.format(json.dumps(persona.to_dict())),
+            },
+        ]
+
+    @staticmethod
+    def _parse_analysis(persona: Persona, response: LLMResponse) -> PersonaAnalysis:
+        content = (response.text[0].content).strip()
+        try:
+            return PersonaAnalysis(**{**json.loads(content), "persona": persona.name})
+        except Exception as e:
+            logger.warning(f"Failed to parse analysis of {persona.name}, keeping raw text. : {e}")
+            return PersonaAnalysis(persona=persona.name, summary=content)
+
+    def _gen_config(self) -> GenerationConfig:
+        return GenerationConfig(max_tokens=self.ANALYSIS_MAX_TOKENS, temperature=0.2)
+
+    def analyze(self, personas: List[Persona]) -> Dict[str, PersonaAnalysis]:
+        """Analyze the summary for every persona, keyed by persona name."""
+        llm_client = self._llm_client()
+        gen_config = self._gen_config()
+
+        with INSTRUMENTATION.span("analyzer.analyze", personas=len(personas)):
+            # Worker threads do not inherit the current span.
+            parent = INSTRUMENTATION.current()
+
+            def analyze_persona(persona: Persona) -> PersonaAnalysis:
+                with INSTRUMENTATION.span("llm.generate_text", parent=parent, persona=persona.name) as span:
+                    response = llm_client.generate_text(self._messages(persona), gen_config=gen_config)
+                    span.set(**usage_attributes(response.usage))
+                return self._parse_analysis(persona, response)
+
+            with ThreadPoolExecutor(max_workers=self.ANALYSIS_MAX_WORKERS) as executor:
+                analyses = list(executor.map(analyze_persona, personas))
+        return {persona.name: analysis for persona, analysis in zip(personas, analyses)}
+
+    async def aanalyze(self, personas: List[Persona]) -> Dict[str, PersonaAnalysis]:
+        """Coroutine version of `analyze`."""
+        llm_client = self._llm_client(is_async=True)
+        gen_config = self._gen_config()
+
+        async def analyze_persona(persona: Persona) -> PersonaAnalysis:
+            messages = self._messages(persona)
+            with INSTRUMENTATION.span("llm.generate_text", persona=persona.name) as span:
+                if inspect.iscoroutinefunction(llm_client.generate_text):
+                    response = await llm_client.generate_text(messages, gen_config=gen_config)
+                else:
+                    # A synchronous client must not block the event loop.
+                    response = await asyncio.to_thread(
+                        llm_client.generate_text, messages, gen_config=gen_config
+                    )
+                span.set(**usage_attributes(response.usage))
+            return self._parse_analysis(persona, response)
+
+        with INSTRUMENTATION.span("analyzer.analyze", personas=len(personas)):
+            analyses = await asyncio.gather(*(analyze_persona(persona) for persona in personas))
+        return {persona.name: analysis for persona, analysis in zip(personas, analyses)}
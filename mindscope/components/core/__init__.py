@@ -1,6 +1,30 @@
 from .errors import FileReadError, FileNotSupportedError
 from .types import LoaderDict
-from .constants import EMPTY_DF
+from .constants import EMPTY_DF, CACHE_DIR
+from .cache import DiskCache
+from .profile_cache import ProfileCache
+from .instrumentation import (
+    Instrumentation,
+    INSTRUMENTATION,
+    Span,
+    SpanRecorder,
+    LoggingExporter,
+    JsonLinesExporter,
+)
 
 
-__all__ = ["FileReadError", "LoaderDict", "EMPTY_DF", "FileNotSupportedError"]
+__all__ = [
+    "FileReadError",
+    "LoaderDict",
+    "EMPTY_DF",
+    "CACHE_DIR",
+    "FileNotSupportedError",
+    "DiskCache",
+    "ProfileCache",
+    "Instrumentation",
+    "INSTRUMENTATION",
+    "Span",
+    "SpanRecorder",
+    "LoggingExporter",
+    "JsonLinesExporter",
+]
@@ -1,3 +1,7 @@
+import os
+
 import polars as pl
 
 EMPTY_DF = pl.DataFrame()
+# Default location of on disk caches
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "mindscope")
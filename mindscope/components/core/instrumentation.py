@@ -0,0 +1,217 @@
+import contextvars
+import itertools
+import json
+import logging
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Callable, Dict, List
+
+logger = logging.getLogger(__name__)
+
+_span_ids = itertools.count(1)
+
+
+class Span:
+    """
+    One timed phase of a run, e.g. loading a file, profiling a column or an
+    LLM request. `attributes` carry what is known about the phase, such as
+    row counts, memory estimates or token usage.
+    """
+
+    __slots__ = ("name", "attributes", "span_id", "parent_id", "start", "end", "error")
+
+    # Real spans record, check it before computing expensive attributes.
+    recording = True
+
+    def __init__(self, name: str, attributes: dict, parent: "Span | None" = None):
+        self.name = name
+        self.attributes = attributes
+        self.span_id: int = next(_span_ids)
+        self.parent_id: int | None = parent.span_id if parent is not None else None
+        self.start: float = time.perf_counter()
+        self.end: float | None = None
+        self.error: str | None = None
+
+    def __repr__(self):
+        return f"Span(name={self.name!r}, duration={self.duration}, attributes={self.attributes})"
+
+    def set(self, **attributes) -> None:
+        self.attributes.update(attributes)
+
+    @property
+    def duration(self) -> float | None:
+        """Seconds spent in the span, None while it is running."""
+        return None if self.end is None else self.end - self.start
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "duration": self.duration,
+            "error": self.error,
+            "attributes": self.attributes,
+        }
+
+
+class _NoopSpan:
+    """Returned when nothing listens, entering and setting attributes does nothing."""
+
+    recording = False
+
+    def set(self, **attributes) -> None:
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class _SpanContext:
+    def __init__(self, instrumentation: "Instrumentation", name: str, attributes: dict, parent):
+        self._instrumentation = instrumentation
+        self._name = name
+        self._attributes = attributes
+        self._parent = parent
+
+    def __enter__(self) -> Span:
+        current = self._instrumentation._current
+        parent = self._parent if self._parent is not None else current.get()
+        self._span = Span(self._name, self._attributes, parent)
+        self._token = current.set(self._span)
+        return self._span
+
+    def __exit__(self, exc_type, exc, tb):
+        span = self._span
+        span.end = time.perf_counter()
+        if exc_type is not None:
+            span.error = f"{exc_type.__name__}: {exc}"
+        self._instrumentation._current.reset(self._token)
+        self._instrumentation._emit(span)
+        return False
+
+
+class Instrumentation:
+    """
+    Timed spans of the phases of a run, sent to the registered hooks when they
+    end. Without hooks `span` returns a shared no-op span, so instrumented code
+    costs one attribute check.
+
+        recorder = INSTRUMENTATION.add_hook(SpanRecorder())
+        manager.summarize()
+        recorder.totals()
+
+    Spans nest through a context variable, code that hands work to threads
+    passes `parent` explicitly.
+    """
+
+    def __init__(self):
+        self._hooks: List[Callable[[Span], Any]] = []
+        self._current: contextvars.ContextVar = contextvars.ContextVar(
+            "mindscope_span", default=None
+        )
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self._hooks)
+
+    def add_hook(self, hook: Callable[[Span], Any]) -> Callable[[Span], Any]:
+        """Call `hook` with every span that ends, returns the hook."""
+        with self._lock:
+            self._hooks = [*self._hooks, hook]
+        return hook
+
+    def remove_hook(self, hook: Callable[[Span], Any]) -> None:
+        with self._lock:
+            self._hooks = [registered for registered in self._hooks if registered is not hook]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._hooks = []
+
+    def current(self) -> Span | None:
+        """The innermost running span of this thread or task."""
+        return self._current.get() if self._hooks else None
+
+    def span(self, name: str, parent: Span | None = None, **attributes):
+        if not self._hooks:
+            return NOOP_SPAN
+        return _SpanContext(self, name, attributes, parent)
+
+    def _emit(self, span: Span) -> None:
+        for hook in self._hooks:
+            try:
+                hook(span)
+            except Exception as e:
+                # A failing exporter must never fail the run it observes.
+                logger.warning(f"Instrumentation hook {hook!r} failed : {e.__class__} : {e}")
+
+
+INSTRUMENTATION = Instrumentation()
+
+
+def usage_attributes(usage: Any) -> Dict[str, int]:
+    """Token counts of an `LLMResponse.usage`, a dict or a provider usage object."""
+    if usage is None:
+        return {}
+    if hasattr(usage, "model_dump"):
+        usage = usage.model_dump()
+    return {
+        key: usage[key]
+        for key in ["prompt_tokens", "completion_tokens", "total_tokens"]
+        if isinstance(usage.get(key), int)
+    }
+
+
+class SpanRecorder:
+    """Hook keeping every span in memory, e.g. for tests or notebooks."""
+
+    def __init__(self):
+        self.spans: List[Span] = []
+
+    def __call__(self, span: Span) -> None:
+        self.spans.append(span)
+
+    def clear(self) -> None:
+        self.spans = []
+
+    def by_name(self, name: str) -> List[Span]:
+        return [span for span in self.spans if span.name == name]
+
+    def totals(self) -> Dict[str, dict]:
+        """Count and total seconds per span name, slowest first."""
+        totals = defaultdict(lambda: {"count": 0, "seconds": 0.0})
+        for span in self.spans:
+            totals[span.name]["count"] += 1
+            totals[span.name]["seconds"] += span.duration
+        return dict(sorted(totals.items(), key=lambda item: -item[1]["seconds"]))
+
+
+class LoggingExporter:
+    """Hook logging one line per span."""
+
+    def __init__(self, level: int = logging.INFO):
+        self.level = level
+
+    def __call__(self, span: Span) -> None:
+        logger.log(self.level, f"{span.name} : {span.duration:.4f}s : {span.attributes}")
+
+
+class JsonLinesExporter:
+    """Hook appending one JSON document per span to `path`."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def __call__(self, span: Span) -> None:
+        line = json.dumps(span.to_dict(), default=str)
+        with self._lock, open(self.path, "a") as f:
+            f.write(line + "\n")
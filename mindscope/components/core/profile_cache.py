@@ -0,0 +1,82 @@
+import hashlib
+import json
+import os
+import pickle
+from typing import Any
+
+import polars as pl
+
+from .cache import DiskCache
+from .constants import CACHE_DIR
+
+# Bumped whenever the summary format changes, so stale profiles are not served.
+PROFILE_CACHE_VERSION = 1
+
+
+class ProfileCache(DiskCache):
+    """
+    On disk cache of dataset summaries keyed by the fingerprint of the source
+    file (path, size, modification time and optionally a content hash) and
+    the profiling options. A changed file or option never hits the cache.
+
+    Least recently used profiles are evicted past `max_bytes`.
+    """
+
+    def __init__(
+        self,
+        path: str = os.path.join(CACHE_DIR, "profiles.sqlite"),
+        ttl: float | None = None,
+        max_entries: int | None = 1_000,
+        max_bytes: int | None = 256 * 1024 * 1024,
+    ):
+        super().__init__(
+            path=path, ttl=ttl, max_entries=max_entries, max_bytes=max_bytes
+        )
+
+    @staticmethod
+    def fingerprint(filepath: str, content_hash: bool = False) -> dict:
+        """
+        Identity of a file on disk. The content hash reads the whole file, use
+        it when modification times are not reliable, e.g. after a copy.
+        """
+        stat = os.stat(filepath)
+        fingerprint = {
+            "path": os.path.abspath(filepath),
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+        }
+        if content_hash:
+            digest = hashlib.sha256()
+            with open(filepath, "rb") as f:
+                for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                    digest.update(chunk)
+            fingerprint["sha256"] = digest.hexdigest()
+        return fingerprint
+
+    @staticmethod
+    def make_key(fingerprint: dict, options: dict) -> str:
+        payload = {
+            "fingerprint": fingerprint,
+            "options": options,
+            "version": PROFILE_CACHE_VERSION,
+            "polars": pl.__version__,
+        }
+        encoded = json.dumps(payload, sort_keys=True, default=str).encode("utf-8")
+        # Keys start with the path so all profiles of a file can be invalidated.
+        return f"{fingerprint['path']}::{hashlib.sha256(encoded).hexdigest()}"
+
+    def get_summary(self, key: str) -> Any | None:
+        value = self.get(key)
+        if value is None:
+            return None
+        return pickle.loads(value)
+
+    def set_summary(self, key: str, summary: Any) -> None:
+        self.set(key, pickle.dumps(summary))
+
+    def invalidate(self, filepath: str | None = None) -> None:
+        """Drop the cached profiles of `filepath`, or of every file when not given."""
+        if filepath is None:
+            self.clear()
+        else:
+            self.delete_prefix(f"{os.path.abspath(filepath)}::")
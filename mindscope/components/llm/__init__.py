@@ -1,13 +1,35 @@
-from .openai import OpenAIClient
+from .base import BaseLLM
+from .openai import OpenAIClient, AsyncOpenAIClient
+from .cache import LLMCache
+from .registry import ClientRegistry, CLIENT_REGISTRY
+from .scheduler import RequestScheduler, TokenBucket
+from .tokens import count_tokens, count_message_tokens
 
 
-def llm(provider: str, **kwargs):
+def llm(provider: str, is_async: bool = False, **kwargs):
+    """
+    Build an LLM client for `provider`. With `is_async=True` the client's
+    `chat` and `generate_text` are coroutines.
+    """
     if provider.lower() == "openai":
         # fix this they all should either given generation config or kwargs
-        client = OpenAIClient(provider=provider, **kwargs)
+        client_class = AsyncOpenAIClient if is_async else OpenAIClient
+        client = client_class(provider=provider, **kwargs)
         return client
     else:
         raise ValueError("Provider not supported.")
 
 
-__all__ = ["llm"]
+__all__ = [
+    "llm",
+    "BaseLLM",
+    "LLMCache",
+    "ClientRegistry",
+    "CLIENT_REGISTRY",
+    "RequestScheduler",
+    "TokenBucket",
+    "OpenAIClient",
+    "AsyncOpenAIClient",
+    "count_tokens",
+    "count_message_tokens",
+]
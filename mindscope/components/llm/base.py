@@ -1,3 +1,5 @@
+import asyncio
+import inspect
 from abc import ABC, abstractmethod
 
 
@@ -14,5 +16,27 @@ class BaseLLM(ABC):
     def generate_text():
         raise NotImplementedError("Base class should implement this method.")
 
+    def stream_text(self, prompt, gen_config=None, **kwargs):
+        """
+        Yield the text of the completion as it is generated, then the complete
+        `LLMResponse` as the last item. Clients without streaming yield their
+        whole answer at once.
+        """
+        kwargs = {**kwargs, "gen_config": gen_config} if gen_config is not None else kwargs
+        response = self.generate_text(prompt, **kwargs)
+        yield response.text[0].content
+        yield response
+
+    async def astream_text(self, prompt, gen_config=None, **kwargs):
+        """Async iterator version of `stream_text`."""
+        kwargs = {**kwargs, "gen_config": gen_config} if gen_config is not None else kwargs
+        if inspect.iscoroutinefunction(self.generate_text):
+            response = await self.generate_text(prompt, **kwargs)
+        else:
+            # A synchronous client must not block the event loop.
+            response = await asyncio.to_thread(self.generate_text, prompt, **kwargs)
+        yield response.text[0].content
+        yield response
+
     # def embed():
     #     raise NotImplementedError("Base class should implement this method.")
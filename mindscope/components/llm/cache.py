@@ -0,0 +1,61 @@
+import hashlib
+import json
+import os
+from typing import Any, List
+
+from pydantic import BaseModel
+
+from ..core import DiskCache, CACHE_DIR
+from ..models import GenerationConfig, LLMResponse, Message
+
+
+class LLMCache(DiskCache):
+    """
+    On disk cache of LLM responses keyed by the messages, model and generation
+    config of the request. Expires entries after `ttl` seconds, one week by default.
+    """
+
+    def __init__(
+        self,
+        path: str = os.path.join(CACHE_DIR, "llm.sqlite"),
+        ttl: float | None = 7 * 24 * 60 * 60,
+        max_entries: int | None = 10_000,
+        max_bytes: int | None = None,
+    ):
+        super().__init__(
+            path=path, ttl=ttl, max_entries=max_entries, max_bytes=max_bytes
+        )
+
+    @staticmethod
+    def make_key(
+        provider: str,
+        messages: List[Message],
+        gen_config: GenerationConfig,
+        response_format: Any = None,
+    ) -> str:
+        if isinstance(response_format, type) and issubclass(response_format, BaseModel):
+            response_format = response_format.model_json_schema()
+
+        payload = {
+            "provider": provider,
+            "model": gen_config.model_name,
+            "messages": [
+                message.model_dump() if isinstance(message, BaseModel) else message
+                for message in messages
+            ],
+            "config": gen_config.model_dump(),
+            "response_format": response_format,
+        }
+        encoded = json.dumps(payload, sort_keys=True, default=str).encode("utf-8")
+        return hashlib.sha256(encoded).hexdigest()
+
+    def get_response(self, key: str) -> LLMResponse | None:
+        value = self.get(key)
+        if value is None:
+            return None
+        response = LLMResponse.model_validate_json(value)
+        response.config = GenerationConfig(**response.config)
+        return response
+
+    def set_response(self, key: str, response: LLMResponse) -> None:
+        self.set(key, response.model_dump_json().encode("utf-8"))
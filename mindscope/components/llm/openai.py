@@ -1,19 +1,29 @@
+import asyncio
 import os
-from typing import Dict, List, Any
+from typing import Any, AsyncIterator, Dict, Iterator, List, Tuple
 
-from openai import OpenAI, AzureOpenAI
-from openai.types.chat import ChatCompletion
+import httpx
+from openai import (
+    OpenAI,
+    AzureOpenAI,
+    AsyncOpenAI,
+    AsyncAzureOpenAI,
+    DefaultHttpxClient,
+    DefaultAsyncHttpxClient,
+)
+from openai.types.chat import ChatCompletion, ChatCompletionChunk
+from pydantic import BaseModel
 
 from .base import BaseLLM
+from .cache import LLMCache
+from .registry import CLIENT_REGISTRY
+from .scheduler import RequestScheduler
+from .tokens import count_message_tokens
+from ..core import INSTRUMENTATION
+from ..core.instrumentation import usage_attributes
 from ..models import GenerationConfig, Message, LLMResponse
 
 
-"""
-Todo:
-- add token counter.
-- Add cache service for same question
-"""
-
 """
 Bugs:
 - Not able to read api key when load_dotenv used in notebook in python api
@@ -30,16 +40,27 @@ class OpenAIClient(BaseLLM):
         api_version: str = None,
         azure_endpoint: str = None,
         model_name: str = "gpt-4o-mini",
+        cache: LLMCache | None = None,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        timeout: float | httpx.Timeout = 600.0,
+        scheduler: RequestScheduler | None = None,
     ):
         self.client = None
         self.provider = provider
-
+        # Responses of identical requests are served from here when set.
+        self.cache = cache
+        # Connection pool of the shared SDK client, see `ClientRegistry`.
+        self.max_connections = max_connections
+        self.max_keepalive_connections = max_keepalive_connections
+        self.timeout = timeout
         super().__init__(provider=provider, model_name=model_name)
 
         self.api_key = api_key if api_key else os.environ["OPENAI_API_KEY"]
 
         self.client_args = {
             "api_key": self.api_key,
+            "base_url": base_url,
             "organization": organization,
             "api_version": api_version,
             "azure_endpoint": azure_endpoint,
@@ -52,6 +73,13 @@ class OpenAIClient(BaseLLM):
                 "OpenAI key not set. Either pass pass to function or set environment variable `OPENAI_API_KEY` "
             )
 
+        # Paces requests and retries transient failures. By default every
+        # client of the same account and model shares one, see `ClientRegistry`.
+        self.scheduler = (
+            scheduler
+            if scheduler is not None
+            else CLIENT_REGISTRY.get_scheduler(self._scheduler_key())
+        )
         self.client = self._get_client()
 
     @property
@@ -63,30 +91,65 @@ class OpenAIClient(BaseLLM):
         config.model_name = self.model_name
         return config
 
-    def _get_client(self) -> None:
-        if self.provider.lower() == "azure":
-            self.client: AzureOpenAI
-            return AzureOpenAI()
+    def _client_key(self, kind: str) -> tuple:
+        return CLIENT_REGISTRY.make_key(
+            kind=kind,
+            provider=self.provider.lower(),
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_keepalive_connections,
+            timeout=self.timeout,
+            **self.client_args,
+        )
 
-        else:
-            self.client: OpenAI
-            return OpenAI()
+    def _scheduler_key(self) -> tuple:
+        account = {
+            name: value
+            for name, value in self.client_args.items()
+            if name in ("api_key", "base_url", "organization", "azure_endpoint")
+        }
+        return CLIENT_REGISTRY.make_key(
+            kind="scheduler", provider=self.provider.lower(), model_name=self.model_name, **account
+        )
 
-    def chat(
-        self, messages: List[Message], gen_config: GenerationConfig = GenerationConfig()
-    ):
-        """
-        chat(messages: List[dict], **kwargs) -> str
-        For providers that use structured conversation format (OpenAI, Anthropic, etc.).
+    def _client_kwargs(self, http_client_class) -> dict:
+        client_args = dict(self.client_args)
+        if self.provider.lower() != "azure":
+            client_args.pop("api_version", None)
+            client_args.pop("azure_endpoint", None)
+        limits = httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_keepalive_connections,
+        )
+        return {
+            **client_args,
+            "timeout": self.timeout,
+            # Retries are made by the scheduler.
+            "max_retries": 0,
+            "http_client": http_client_class(limits=limits, timeout=self.timeout),
+        }
 
-        Input: list of messages ({"role": "user"/"system"/"assistant", "content": "..."})
+    def _get_client(self) -> OpenAI | AzureOpenAI:
+        """Shared client of the process for this provider, endpoint and key."""
+        client_class = AzureOpenAI if self.provider.lower() == "azure" else OpenAI
+        return CLIENT_REGISTRY.get(
+            self._client_key("sync"),
+            lambda: client_class(**self._client_kwargs(DefaultHttpxClient)),
+        )
 
-        Output: generated assistant message.
-        """
-        if gen_config.model_name is None:
-            gen_config = self._set_model(gen_config)
+    def _cached(self, call, messages, gen_config, response_format=None) -> LLMResponse:
+        """Serve the response from the cache, or make the call and store it."""
+        if self.cache is None:
+            return call()
 
-        api_call_config = {
+        key = LLMCache.make_key(self.provider, messages, gen_config, response_format)
+        response = self.cache.get_response(key)
+        if response is None:
+            response = call()
+            self.cache.set_response(key, response)
+        return response
+
+    def _api_call_config(self, messages: List[Message], gen_config: GenerationConfig) -> dict:
+        return {
             "model": gen_config.model_name,
             "temperature": gen_config.temperature,
             "max_tokens": gen_config.max_tokens,
@@ -95,13 +158,22 @@ class OpenAIClient(BaseLLM):
             "messages": messages,
         }
 
-        api_response: ChatCompletion = self.client.chat.completions.create(
-            **api_call_config
-        )
-
-        # print(api_response)
+    def _request(self, api_call_config: dict, response_format: Any = None) -> ChatCompletion:
+        """One attempt at the API, retries of the scheduler get a span each."""
+        with INSTRUMENTATION.span("llm.request", model=api_call_config["model"]) as span:
+            if response_format is not None:
+                api_response = self.client.chat.completions.parse(
+                    **api_call_config, response_format=response_format
+                )
+            else:
+                api_response = self.client.chat.completions.create(**api_call_config)
+            if span.recording:
+                span.set(**usage_attributes(api_response.usage))
+        return api_response
 
-        response = LLMResponse(
+    @staticmethod
+    def _to_response(api_response: ChatCompletion, gen_config: GenerationConfig) -> LLMResponse:
+        return LLMResponse(
             text=[
                 Message(**choice.message.model_dump())
                 for choice in api_response.choices
@@ -110,9 +182,30 @@ class OpenAIClient(BaseLLM):
             usage=dict(api_response.usage),
         )
 
-        return response
+    def chat(
+        self, messages: List[Message], gen_config: GenerationConfig = GenerationConfig()
+    ):
+        """
+        chat(messages: List[dict], **kwargs) -> str
+        For providers that use structured conversation format (OpenAI, Anthropic, etc.).
+
+        Input: list of messages ({"role": "user"/"system"/"assistant", "content": "..."})
+
+        Output: generated assistant message.
+        """
+        if gen_config.model_name is None:
+            gen_config = self._set_model(gen_config)
+
+        api_call_config = self._api_call_config(messages, gen_config)
+
+        def call():
+            api_response: ChatCompletion = self.scheduler.run(
+                lambda: self._request(api_call_config),
+                tokens=count_message_tokens(messages),
+            )
+            return self._to_response(api_response, gen_config)
 
-        # return "This is chat functison called."
+        return self._cached(call, messages, gen_config)
 
     def generate_text(
         self,
@@ -123,32 +216,230 @@ class OpenAIClient(BaseLLM):
         if gen_config.model_name is None:
             gen_config = self._set_model(gen_config)
 
-        api_call_config = {
-            "model": gen_config.model_name,
-            "temperature": gen_config.temperature,
-            "max_tokens": gen_config.max_tokens,
-            "top_p": gen_config.top_p,
-            # "top_k": gen_config.top_k,
-            "messages": prompt,
-        }
+        api_call_config = self._api_call_config(prompt, gen_config)
 
-        if response_format is not None:
-            api_call_config["response_format"] = response_format
-            api_response: ChatCompletion = self.client.chat.completions.parse(
-                **api_call_config
-            )
-        else:
-            api_response: ChatCompletion = self.client.chat.completions.create(
-                **api_call_config
+        def call():
+            api_response: ChatCompletion = self.scheduler.run(
+                lambda: self._request(api_call_config, response_format),
+                tokens=count_message_tokens(prompt),
             )
+            return self._to_response(api_response, gen_config)
+
+        return self._cached(call, prompt, gen_config, response_format)
+
+    def _cached_response(
+        self, messages, gen_config, response_format=None
+    ) -> Tuple[str | None, LLMResponse | None]:
+        if self.cache is None:
+            return None, None
+        key = LLMCache.make_key(self.provider, messages, gen_config, response_format)
+        return key, self.cache.get_response(key)
+
+    @staticmethod
+    def _response_format_param(response_format: Any) -> dict:
+        """Strict JSON schema of a pydantic model, what `parse` sends for it."""
+        if isinstance(response_format, type) and issubclass(response_format, BaseModel):
+            return {
+                "type": "json_schema",
+                "json_schema": {
+                    "name": response_format.__name__,
+                    "schema": response_format.model_json_schema(),
+                    "strict": True,
+                },
+            }
+        return response_format
+
+    def _stream_config(self, api_call_config: dict, response_format: Any = None) -> dict:
+        # The last chunk of the stream carries the token usage.
+        config = {**api_call_config, "stream": True, "stream_options": {"include_usage": True}}
+        if response_format is not None:
+            config["response_format"] = self._response_format_param(response_format)
+        return config
+
+    @staticmethod
+    def _stream_delta(chunk: ChatCompletionChunk) -> str:
+        if chunk.choices and chunk.choices[0].delta.content:
+            return chunk.choices[0].delta.content
+        return ""
 
+    def _stream_response(
+        self, key: str | None, parts: List[str], usage: Any, gen_config: GenerationConfig
+    ) -> LLMResponse:
         response = LLMResponse(
-            text=[
-                Message(**choice.message.model_dump())
-                for choice in api_response.choices
-            ],
+            text=[Message(role="assistant", content="".join(parts))],
             config=gen_config,
-            usage=dict(api_response.usage),
+            usage=dict(usage) if usage is not None else None,
+        )
+        if key is not None:
+            self.cache.set_response(key, response)
+        return response
+
+    def stream_text(
+        self,
+        prompt: List[Message],
+        gen_config: GenerationConfig = GenerationConfig(),
+        response_format: Any = None,
+    ) -> Iterator[str | LLMResponse]:
+        """
+        Yield the text of the completion as the provider streams it, then the
+        complete `LLMResponse` as the last item. Complete responses are cached
+        like `generate_text` ones, a cached response is yielded at once.
+        """
+        if gen_config.model_name is None:
+            gen_config = self._set_model(gen_config)
+        key, response = self._cached_response(prompt, gen_config, response_format)
+        if response is not None:
+            yield response.text[0].content
+            yield response
+            return
+
+        api_call_config = self._stream_config(
+            self._api_call_config(prompt, gen_config), response_format
+        )
+        # Retries only cover opening the stream, not a stream broken halfway.
+        stream = self.scheduler.run(
+            lambda: self.client.chat.completions.create(**api_call_config),
+            tokens=count_message_tokens(prompt),
         )
+        parts, usage = [], None
+        try:
+            for chunk in stream:
+                delta = self._stream_delta(chunk)
+                if delta:
+                    parts.append(delta)
+                    yield delta
+                usage = chunk.usage or usage
+        finally:
+            # Closing the generator early releases the connection.
+            stream.close()
+        yield self._stream_response(key, parts, usage, gen_config)
+
+
+class AsyncOpenAIClient(OpenAIClient):
+    """
+    Asyncio counterpart of `OpenAIClient` on top of `AsyncOpenAI`, `chat` and
+    `generate_text` are coroutines.
+
+    At most `max_concurrency` requests are in flight at once, share one client
+    between Summarizers or Managers to bound the whole process.
+    """
+
+    def __init__(self, *args, max_concurrency: int = 8, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.max_concurrency = max_concurrency
+        self._semaphore = asyncio.Semaphore(max_concurrency)
 
+    def _get_client(self) -> None:
+        # Async clients belong to an event loop, they are resolved per loop
+        # by `_async_client` when a request is made.
+        return None
+
+    def _async_client(self) -> AsyncOpenAI | AsyncAzureOpenAI:
+        if self.client is not None:
+            return self.client
+        client_class = AsyncAzureOpenAI if self.provider.lower() == "azure" else AsyncOpenAI
+        return CLIENT_REGISTRY.get_async(
+            self._client_key("async"),
+            lambda: client_class(**self._client_kwargs(DefaultAsyncHttpxClient)),
+        )
+
+    async def _arequest(
+        self, api_call_config: dict, response_format: Any = None
+    ) -> ChatCompletion:
+        client = self._async_client()
+        async with self._semaphore:
+            with INSTRUMENTATION.span("llm.request", model=api_call_config["model"]) as span:
+                if response_format is not None:
+                    api_response = await client.chat.completions.parse(
+                        **api_call_config, response_format=response_format
+                    )
+                else:
+                    api_response = await client.chat.completions.create(**api_call_config)
+                if span.recording:
+                    span.set(**usage_attributes(api_response.usage))
+        return api_response
+
+    async def _acached(self, call, messages, gen_config, response_format=None) -> LLMResponse:
+        if self.cache is None:
+            return await call()
+
+        key = LLMCache.make_key(self.provider, messages, gen_config, response_format)
+        response = self.cache.get_response(key)
+        if response is None:
+            response = await call()
+            self.cache.set_response(key, response)
         return response
+
+    async def chat(
+        self, messages: List[Message], gen_config: GenerationConfig = GenerationConfig()
+    ):
+        if gen_config.model_name is None:
+            gen_config = self._set_model(gen_config)
+
+        api_call_config = self._api_call_config(messages, gen_config)
+
+        async def call():
+            api_response: ChatCompletion = await self.scheduler.arun(
+                lambda: self._arequest(api_call_config),
+                tokens=count_message_tokens(messages),
+            )
+            return self._to_response(api_response, gen_config)
+
+        return await self._acached(call, messages, gen_config)
+
+    async def generate_text(
+        self,
+        prompt: List[Message],
+        gen_config: GenerationConfig = GenerationConfig(),
+        response_format: Any = None,
+    ) -> LLMResponse:
+        if gen_config.model_name is None:
+            gen_config = self._set_model(gen_config)
+
+        api_call_config = self._api_call_config(prompt, gen_config)
+
+        async def call():
+            api_response: ChatCompletion = await self.scheduler.arun(
+                lambda: self._arequest(api_call_config, response_format),
+                tokens=count_message_tokens(prompt),
+            )
+            return self._to_response(api_response, gen_config)
+
+        return await self._acached(call, prompt, gen_config, response_format)
+
+    async def astream_text(
+        self,
+        prompt: List[Message],
+        gen_config: GenerationConfig = GenerationConfig(),
+        response_format: Any = None,
+    ) -> AsyncIterator[str | LLMResponse]:
+        """Async iterator version of `stream_text`, the stream holds a slot of `max_concurrency`."""
+        if gen_config.model_name is None:
+            gen_config = self._set_model(gen_config)
+        key, response = self._cached_response(prompt, gen_config, response_format)
+        if response is not None:
+            yield response.text[0].content
+            yield response
+            return
+
+        api_call_config = self._stream_config(
+            self._api_call_config(prompt, gen_config), response_format
+        )
+        client = self._async_client()
+        parts, usage = [], None
+        async with self._semaphore:
+            stream = await self.scheduler.arun(
+                lambda: client.chat.completions.create(**api_call_config),
+                tokens=count_message_tokens(prompt),
+            )
+            try:
+                async for chunk in stream:
+                    delta = self._stream_delta(chunk)
+                    if delta:
+                        parts.append(delta)
+                        yield delta
+                    usage = chunk.usage or usage
+            finally:
+                # Stopping early or cancelling releases the connection with the slot.
+                await stream.close()
+        yield self._stream_response(key, parts, usage, gen_config)
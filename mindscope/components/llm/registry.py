@@ -0,0 +1,86 @@
+import asyncio
+import hashlib
+import threading
+import weakref
+from typing import Any, Callable, Dict, Hashable
+
+from .scheduler import DEFAULT_REQUESTS_PER_MINUTE, DEFAULT_TOKENS_PER_MINUTE, RequestScheduler
+
+
+class ClientRegistry:
+    """
+    Process wide pool of provider SDK clients, so every `OpenAIClient` built
+    for the same provider, endpoint and credentials shares one HTTP connection
+    pool and its keep-alive connections.
+
+    Async clients are bound to the event loop they were created in, they are
+    kept per running loop and dropped with it.
+
+    It also holds one `RequestScheduler` per account and model, so the clients
+    of an account count against the same rate limits. New schedulers get the
+    `scheduler_defaults` limits.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._clients: Dict[Hashable, Any] = {}
+        self._loop_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[Hashable, Any]]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._schedulers: Dict[Hashable, RequestScheduler] = {}
+        self.scheduler_defaults: Dict[str, Any] = {
+            "requests_per_minute": DEFAULT_REQUESTS_PER_MINUTE,
+            "tokens_per_minute": DEFAULT_TOKENS_PER_MINUTE,
+        }
+
+    @staticmethod
+    def make_key(**fields) -> tuple:
+        """Registry key of a client, secrets are hashed rather than kept as is."""
+        if fields.get("api_key"):
+            fields["api_key"] = hashlib.sha256(fields["api_key"].encode("utf-8")).hexdigest()
+        return tuple(sorted((name, repr(value)) for name, value in fields.items()))
+
+    def get(self, key: Hashable, factory: Callable[[], Any]) -> Any:
+        """Client registered under `key`, built with `factory` on first use."""
+        with self._lock:
+            client = self._clients.get(key)
+            if client is None:
+                client = self._clients[key] = factory()
+            return client
+
+    def get_async(self, key: Hashable, factory: Callable[[], Any]) -> Any:
+        """Like `get`, for the event loop running the caller."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            clients = self._loop_clients.setdefault(loop, {})
+            client = clients.get(key)
+            if client is None:
+                client = clients[key] = factory()
+            return client
+
+    def get_scheduler(self, key: Hashable) -> RequestScheduler:
+        """Scheduler shared under `key`, built with `scheduler_defaults` on first use."""
+        with self._lock:
+            scheduler = self._schedulers.get(key)
+            if scheduler is None:
+                scheduler = self._schedulers[key] = RequestScheduler(**self.scheduler_defaults)
+            return scheduler
+
+    def clear(self):
+        """Close the synchronous clients and forget every registered client and scheduler."""
+        with self._lock:
+            clients = list(self._clients.values())
+            self._clients.clear()
+            self._loop_clients.clear()
+            self._schedulers.clear()
+        for client in clients:
+            client.close()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._clients) + sum(
+                len(clients) for clients in self._loop_clients.values()
+            )
+
+
+CLIENT_REGISTRY = ClientRegistry()
@@ -0,0 +1,199 @@
+import asyncio
+import logging
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Awaitable, Callable, Dict
+
+from openai import APIConnectionError, APIStatusError
+
+logger = logging.getLogger(__name__)
+
+# Status codes worth another attempt, the same ones the OpenAI SDK retries.
+RETRY_STATUS_CODES = {408, 409, 429}
+
+# Limits of the schedulers shared per account and model, the usage tier 1
+# limits of gpt-4o-mini. Change them through `CLIENT_REGISTRY.scheduler_defaults`.
+DEFAULT_REQUESTS_PER_MINUTE = 500
+DEFAULT_TOKENS_PER_MINUTE = 200_000
+
+
+class TokenBucket:
+    """
+    Token bucket refilled continuously at `rate_per_minute`, holding at most
+    one minute worth of tokens.
+
+    `reserve` never blocks: it takes the tokens right away, letting the bucket
+    go negative, and returns how long the caller has to wait before using them.
+    """
+
+    def __init__(self, rate_per_minute: float, clock: Callable[[], float] = time.monotonic):
+        self.capacity = float(rate_per_minute)
+        self.rate = rate_per_minute / 60
+        self.tokens = self.capacity
+        self.clock = clock
+        self.updated = clock()
+
+    def reserve(self, amount: float) -> float:
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        # A single request larger than the bucket would wait forever otherwise.
+        self.tokens -= min(amount, self.capacity)
+        return max(0.0, -self.tokens / self.rate)
+
+
+def retry_after(error: Exception) -> float | None:
+    """Seconds the provider asked to wait through `Retry-After` headers, if any."""
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    headers = response.headers
+    try:
+        if "retry-after-ms" in headers:
+            return float(headers["retry-after-ms"]) / 1000
+        if "retry-after" in headers:
+            value = headers["retry-after"]
+            try:
+                return float(value)
+            except ValueError:
+                retry_at = parsedate_to_datetime(value)
+                return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        pass
+    return None
+
+
+def is_retryable(error: Exception) -> bool:
+    if isinstance(error, APIConnectionError):
+        return True
+    if isinstance(error, APIStatusError):
+        return error.status_code in RETRY_STATUS_CODES or error.status_code >= 500
+    return False
+
+
+class RequestScheduler:
+    """
+    Paces requests to a provider and retries the transient failures.
+
+    Requests and prompt tokens are limited per minute with token buckets, the
+    token side uses the estimated prompt size of each request. Rate limits,
+    timeouts and 5xx errors are retried up to `max_retries` times, waiting for
+    `Retry-After` when the provider sends it and with jittered exponential
+    backoff otherwise.
+
+    Share one scheduler between clients using the same account so their
+    requests count against the same limits.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: float | None = None,
+        tokens_per_minute: float | None = None,
+        max_retries: int = 5,
+        base_delay: float = 1.0,
+        max_delay: float = 60.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.request_bucket = TokenBucket(requests_per_minute, clock) if requests_per_minute else None
+        self.token_bucket = TokenBucket(tokens_per_minute, clock) if tokens_per_minute else None
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._lock = threading.Lock()
+        self._stats = {
+            "requests": 0,
+            "retries": 0,
+            "failures": 0,
+            "queue_depth": 0,
+            "max_queue_depth": 0,
+            "wait_time": 0.0,
+        }
+
+    def _reserve(self, tokens: int) -> float:
+        with self._lock:
+            wait = 0.0
+            if self.request_bucket is not None:
+                wait = max(wait, self.request_bucket.reserve(1))
+            if self.token_bucket is not None and tokens:
+                wait = max(wait, self.token_bucket.reserve(tokens))
+            return wait
+
+    def _retry_delay(self, error: Exception, attempt: int) -> float | None:
+        """Delay before the next attempt, or None when `error` is final."""
+        if attempt >= self.max_retries or not is_retryable(error):
+            return None
+        delay = retry_after(error)
+        if delay is None:
+            delay = random.uniform(0, min(self.max_delay, self.base_delay * 2**attempt))
+        return min(delay, self.max_delay)
+
+    def _enter_queue(self):
+        with self._lock:
+            self._stats["queue_depth"] += 1
+            self._stats["max_queue_depth"] = max(
+                self._stats["max_queue_depth"], self._stats["queue_depth"]
+            )
+
+    def _leave_queue(self, waited: float):
+        with self._lock:
+            self._stats["queue_depth"] -= 1
+            self._stats["wait_time"] += waited
+
+    def _record(self, key: str):
+        with self._lock:
+            self._stats[key] += 1
+
+    def run(self, call: Callable[[], Any], tokens: int = 0) -> Any:
+        """Run `call` once the limits allow it, retrying transient failures."""
+        attempt = 0
+        wait = self._reserve(tokens)
+        while True:
+            if wait:
+                self._enter_queue()
+                time.sleep(wait)
+                self._leave_queue(wait)
+            self._record("requests")
+            try:
+                return call()
+            except Exception as e:
+                delay = self._retry_delay(e, attempt)
+                if delay is None:
+                    self._record("failures")
+                    raise
+                logger.warning(f"Request failed, retrying in {delay:.2f}s : {e}")
+                self._record("retries")
+                attempt += 1
+                wait = max(delay, self._reserve(tokens))
+
+    async def arun(self, call: Callable[[], Awaitable[Any]], tokens: int = 0) -> Any:
+        """Coroutine version of `run`, `call` returns an awaitable."""
+        attempt = 0
+        wait = self._reserve(tokens)
+        while True:
+            if wait:
+                self._enter_queue()
+                await asyncio.sleep(wait)
+                self._leave_queue(wait)
+            self._record("requests")
+            try:
+                return await call()
+            except Exception as e:
+                delay = self._retry_delay(e, attempt)
+                if delay is None:
+                    self._record("failures")
+                    raise
+                logger.warning(f"Request failed, retrying in {delay:.2f}s : {e}")
+                self._record("retries")
+                attempt += 1
+                wait = max(delay, self._reserve(tokens))
+
+    def stats(self) -> Dict[str, float]:
+        """Counters for tuning throughput: requests, retries, queue depth and waits."""
+        with self._lock:
+            stats = dict(self._stats)
+        waits = stats["requests"] or 1
+        stats["mean_wait"] = stats["wait_time"] / waits
+        return stats
@@ -0,0 +1,37 @@
+import math
+import re
+from typing import List
+
+from pydantic import BaseModel
+
+from ..models import Message
+
+# Splits text roughly the way BPE tokenizers do: words with a leading space or
+# underscore, numbers in groups of up to three digits, and runs of punctuation.
+_TOKEN_PATTERN = re.compile(r"[ _]?[^\W\d_]+| ?\d{1,3}| ?[^\w\s]+|_+|\s+")
+
+# Tokens added by the chat format around every message and the reply.
+MESSAGE_OVERHEAD_TOKENS = 4
+REPLY_OVERHEAD_TOKENS = 3
+
+
+def count_tokens(text: str) -> int:
+    """
+    Estimate the number of tokens of `text` locally, without a tokenizer
+    download. Close to OpenAI tokenizers on English and JSON, within ~15%.
+    """
+    tokens = 0
+    for piece in _TOKEN_PATTERN.findall(text):
+        # Long words are split into several sub word tokens.
+        tokens += math.ceil(len(piece.strip()) / 8) if piece[-1].isalpha() else 1
+    return tokens
+
+
+def count_message_tokens(messages: List[Message]) -> int:
+    """Estimate the prompt tokens of a list of chat messages."""
+    tokens = REPLY_OVERHEAD_TOKENS
+    for message in messages:
+        if isinstance(message, BaseModel):
+            message = message.model_dump()
+        tokens += MESSAGE_OVERHEAD_TOKENS + count_tokens(str(message["content"]))
+    return tokens
@@ -1,15 +1,21 @@
 """
 Todo:
     - Update file structure
-    - Add logic to handle multiple persona: ps manager part is easy but how to handle goals and other feature for multiple persona is challenging thus skipping for now.
 """
 
+import os
+from typing import AsyncIterator, Dict, Iterator, List
+
 import polars as pl
 
-from .core import EMPTY_DF
-from .utils.manager import get_dataframe_from_filepath
+from .core import EMPTY_DF, ProfileCache, INSTRUMENTATION
+from .utils.manager import get_dataframe_from_filepath, get_file_statistics, has_file_statistics
 from .summarizer import Summarizer
 from .persona import Persona
+from .analyzer import PersonaAnalyzer
+from .llm import BaseLLM, LLMCache
+from .models import EnrichmentEvent, PersonaAnalysis, Summary
+from .utils.summarizer import enrichment_events
 
 
 class Manager:
@@ -20,51 +26,249 @@ class Manager:
 
     - Components:
         - Summarizer
+        - PersonaAnalyzer
     """
 
-    def __init__(self, data: pl.DataFrame = EMPTY_DF, filepath: str = ""):
+    def __init__(
+        self,
+        data: pl.DataFrame | pl.LazyFrame = EMPTY_DF,
+        filepath: str = "",
+        lazy: bool = False,
+        llm_cache: LLMCache | None = None,
+        llm_client: BaseLLM | None = None,
+        profile_cache: ProfileCache | None = None,
+        content_hash: bool = False,
+        summarizer_options: dict | None = None,
+        load_options: dict | None = None,
+        file_statistics: bool = False,
+    ):
         """
         Takes dataframe or file_path as argument if both given then dataframe will be prioritized.
 
-        Requires tabular format for now.
+        Requires tabular format for now. The file is only read when its data is
+        first needed.
+
+        :param: lazy
+        bool : Scan the file instead of reading it, for files larger than memory.
+
+        :param: llm_cache
+        LLMCache : Cache of LLM responses shared by the components.
+
+        :param: llm_client
+        BaseLLM : Client used instead of the default one, share an
+        `AsyncOpenAIClient` between managers to limit concurrent requests.
+
+        :param: profile_cache
+        ProfileCache : Summaries of files already profiled with the same
+        options, served without reading the file while it is unchanged.
+
+        :param: content_hash
+        bool : Also fingerprint the file by its content, not only by size and
+        modification time.
+
+        :param: summarizer_options
+        dict : Summarizer attributes to override, e.g. `{"CATEGORICAL_THRESHOLD": 0.1}`.
+
+        :param: load_options
+        dict : Options of `get_dataframe_from_filepath`, e.g. `{"columns": [...], "n_rows": 1000}`
+        to read only a projection of the file.
+
+        :param: file_statistics
+        bool : Answer the row count, min, max and null counts of a parquet
+        file from its footer. The file is then scanned, so only the columns
+        needing other statistics are read.
         """
-        if isinstance(data, pl.DataFrame):
-            self._data = data
-        elif filepath:
-            self._data = get_dataframe_from_filepath(filepath)
-            self._filepath = filepath
-        else:
+        if data is None and not filepath:
             raise ValueError("Either data or filepath must be provided.")
-        self._data = data
+
+        has_data = isinstance(data, pl.LazyFrame) or (
+            data is not None and not data.is_empty()
+        )
+        # Loaded on first use, a cached summary does not need the data.
+        self._from_file: bool = not has_data and bool(filepath)
+        self._data = None if self._from_file else data
         self._filepath = filepath
+        self._lazy = lazy
+        self.profile_cache = profile_cache
+        self.content_hash = content_hash
+        self.summarizer_options: dict = dict(summarizer_options or {})
+        self.load_options: dict = dict(load_options or {})
+        self.file_statistics = file_statistics
+        self.llm_cache = llm_cache
+        self.llm_client = llm_client
         self.summarizer: Summarizer = None
+        # Last summary, reused by the persona analyses
+        self.summary: Summary | dict = None
         self.persona: Persona = None
-        # self.personas: Dict[str, Persona] = None
+        self.personas: Dict[str, Persona] = {}
 
     @property
     def data(self):
+        if self._data is None and self._from_file:
+            # Footer statistics pay off when only the other columns are read.
+            lazy = self._lazy or self._uses_file_statistics()
+            with INSTRUMENTATION.span("manager.load", filepath=self._filepath, lazy=lazy) as span:
+                self._data = get_dataframe_from_filepath(
+                    self._filepath, lazy=lazy, **self.load_options
+                )
+                if span.recording and isinstance(self._data, pl.DataFrame):
+                    span.set(
+                        rows=self._data.height,
+                        columns=self._data.width,
+                        estimated_size_mb=self._data.estimated_size("mb"),
+                    )
         return self._data
 
     @data.setter
     def data(self, value):
         self._data = value
 
-    def summarize(self, n_samples=5, enrich=False):
+    def _uses_file_statistics(self) -> bool:
+        return (
+            self.file_statistics
+            and self._from_file
+            and has_file_statistics(self._filepath, self.load_options.get("n_rows"))
+        )
+
+    def _get_summarizer(self) -> Summarizer:
+        if isinstance(self.data, pl.DataFrame) and self.data.is_empty():
+            raise ValueError(
+                "Please provider data to summarize. Assign Manager a dataset."
+            )
+        if not self.summarizer:
+            file_statistics = None
+            if self._uses_file_statistics():
+                file_statistics = get_file_statistics(
+                    self._filepath,
+                    n_rows=self.load_options.get("n_rows"),
+                    schema_overrides=self.load_options.get("schema_overrides"),
+                )
+            self.summarizer = Summarizer(
+                self.data,
+                filename=os.path.basename(self._filepath),
+                llm_cache=self.llm_cache,
+                llm_client=self.llm_client,
+                file_statistics=file_statistics,
+            )
+            for name, value in self.summarizer_options.items():
+                setattr(self.summarizer, name, value)
+        return self.summarizer
+
+    def _profile_key(self, **options) -> str | None:
+        """Profile cache key of the file and options, None when not cacheable."""
+        if self.profile_cache is None or not self._from_file:
+            return None
+        fingerprint = ProfileCache.fingerprint(self._filepath, content_hash=self.content_hash)
+        options = {
+            **options,
+            "lazy": self._lazy,
+            "summarizer_options": self.summarizer_options,
+            "load_options": self.load_options,
+            "file_statistics": self.file_statistics,
+            "model_name": getattr(self.llm_client, "model_name", None),
+        }
+        return ProfileCache.make_key(fingerprint, options)
+
+    def invalidate_cache(self) -> None:
+        """Forget the cached profiles of this manager's file."""
+        self.summary = None
+        if self.profile_cache is not None and self._filepath:
+            self.profile_cache.invalidate(self._filepath)
+
+    def summarize(self, n_samples=5, enrich=False, approximate=False):
         """
         Docstring will go here
 
         :param: enrich
         bool : Set true to use it for
 
+        :param: approximate
+        bool : Use sketches and samples for distinct counts, medians and categories.
         """
-        if self.data.is_empty():
-            raise ValueError(
-                "Please provider data to summarize. Assign Manager a dataset."
+        with INSTRUMENTATION.span("manager.summarize", filepath=self._filepath) as span:
+            key = self._profile_key(n_samples=n_samples, enrich=enrich, approximate=approximate)
+            summary = self.profile_cache.get_summary(key) if key else None
+            span.set(cache_hit=summary is not None)
+            if summary is None:
+                summary = self._get_summarizer().summarize(
+                    n_samples=n_samples, enrich=enrich, approximate=approximate
+                )
+                if key:
+                    self.profile_cache.set_summary(key, summary)
+        self.summary = summary
+        return summary
+
+    async def asummarize(self, n_samples=5, enrich=False, approximate=False):
+        """
+        Coroutine version of `summarize`, for enriching many datasets
+        concurrently from one event loop.
+        """
+        with INSTRUMENTATION.span("manager.summarize", filepath=self._filepath) as span:
+            key = self._profile_key(n_samples=n_samples, enrich=enrich, approximate=approximate)
+            summary = self.profile_cache.get_summary(key) if key else None
+            span.set(cache_hit=summary is not None)
+            if summary is None:
+                summary = await self._get_summarizer().asummarize(
+                    n_samples=n_samples, enrich=enrich, approximate=approximate
+                )
+                if key:
+                    self.profile_cache.set_summary(key, summary)
+        self.summary = summary
+        return summary
+
+    def stream_summarize(self, n_samples=5, approximate=False) -> Iterator[EnrichmentEvent]:
+        """
+        Enriched `summarize` yielding the dataset description and every column
+        summary as soon as the LLM has written them, see
+        `Summarizer.stream_summarize`. A cached summary is replayed at once.
+        """
+        key = self._profile_key(n_samples=n_samples, enrich=True, approximate=approximate)
+        cached = self.profile_cache.get_summary(key) if key else None
+        if cached is not None:
+            events = enrichment_events(cached)
+        else:
+            events = self._get_summarizer().stream_summarize(
+                n_samples=n_samples, approximate=approximate
             )
-        if not self.summarizer:
-            self.summarizer = Summarizer(self.data)
+        for event in events:
+            if event.kind == "summary":
+                self.summary = event.summary
+                if key and cached is None:
+                    self.profile_cache.set_summary(key, event.summary)
+            yield event
+
+    async def astream_summarize(
+        self, n_samples=5, approximate=False
+    ) -> AsyncIterator[EnrichmentEvent]:
+        """Async iterator version of `stream_summarize`."""
+        key = self._profile_key(n_samples=n_samples, enrich=True, approximate=approximate)
+        cached = self.profile_cache.get_summary(key) if key else None
+        if cached is not None:
+            for event in enrichment_events(cached):
+                if event.kind == "summary":
+                    self.summary = event.summary
+                yield event
+            return
+
+        async for event in self._get_summarizer().astream_summarize(
+            n_samples=n_samples, approximate=approximate
+        ):
+            if event.kind == "summary":
+                self.summary = event.summary
+                if key:
+                    self.profile_cache.set_summary(key, event.summary)
+            yield event
 
-        summary = self.summarizer.summarize(n_samples=n_samples, enrich=enrich)
+    def update(self, new_rows: pl.DataFrame | pl.LazyFrame, n_samples=5):
+        """
+        Refresh the summary with rows appended to the dataset, reading only the
+        new rows once the state of the existing ones is known.
+        """
+        summary = self._get_summarizer().update(new_rows, n_samples=n_samples)
+        self._data = self.summarizer.data
+        # The data no longer matches the file, its cached profiles do not apply.
+        self._from_file = False
+        self.summary = summary
         return summary
 
     def set_persona(self, persona: Persona) -> None:
@@ -75,16 +279,61 @@ class Manager:
             raise AttributeError("Persona should have name.")
 
         self.persona = persona
+        self.personas[persona.name] = persona
+
+    def set_personas(self, personas: List[Persona]) -> None:
+        """
+        Register personas to analyze the dataset for, replacing the ones with
+        the same name.
+        """
+        for persona in personas:
+            if not persona.name:
+                raise AttributeError("Persona name not found.")
+
+        self.personas.update({persona.name: persona for persona in personas})
 
-        # if persona.name.lower() in self.personas.keys():
-        #     self.personas[persona.name.lower()] = persona
-        # else:
-        #     self.personas[persona.name.lower()] = persona
+    def _get_personas(self, personas: List[Persona] | None) -> List[Persona]:
+        personas = personas if personas is not None else list(self.personas.values())
+        if not personas:
+            raise ValueError("Please set personas to analyze the dataset for.")
+        return personas
 
-    # def set_personas(self, personas: List[Persona]) -> None:
-    #     for persona in personas:
-    #         if not persona.name:
-    #             raise AttributeError("Persona name not found.")
+    def _get_analyzer(self) -> PersonaAnalyzer:
+        return PersonaAnalyzer(
+            self.summary, llm_cache=self.llm_cache, llm_client=self.llm_client
+        )
+
+    def analyze(
+        self,
+        personas: List[Persona] | None = None,
+        n_samples=5,
+        enrich=False,
+        approximate=False,
+    ) -> Dict[str, PersonaAnalysis]:
+        """
+        Analyze the dataset for every persona, keyed by persona name.
+
+        The dataset is profiled once, the last summary is reused when there is
+        one, and the persona analyses run concurrently on it.
+
+        :param: personas
+        List[Persona] : Personas to analyze for, defaults to the ones set with
+        `set_persona` and `set_personas`.
+        """
+        personas = self._get_personas(personas)
+        if self.summary is None:
+            self.summarize(n_samples=n_samples, enrich=enrich, approximate=approximate)
+        return self._get_analyzer().analyze(personas)
 
-    #     update_dict = {persona.name: persona for persona in personas}
-    #     self.personas.update(update_dict)
+    async def aanalyze(
+        self,
+        personas: List[Persona] | None = None,
+        n_samples=5,
+        enrich=False,
+        approximate=False,
+    ) -> Dict[str, PersonaAnalysis]:
+        """Coroutine version of `analyze`."""
+        personas = self._get_personas(personas)
+        if self.summary is None:
+            await self.asummarize(n_samples=n_samples, enrich=enrich, approximate=approximate)
+        return await self._get_analyzer().aanalyze(personas)
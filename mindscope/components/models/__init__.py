@@ -1,4 +1,14 @@
 from .llm import GenerationConfig, Message, LLMResponse
-from .summarizer import Summary
+from .summarizer import Summary, EnrichmentEvent, Enrichment, ColumnEnrichment
+from .persona import PersonaAnalysis
 
-__all__ = ["GenerationConfig", "Message", "LLMResponse", "Summary"]
+__all__ = [
+    "GenerationConfig",
+    "Message",
+    "LLMResponse",
+    "Summary",
+    "EnrichmentEvent",
+    "Enrichment",
+    "ColumnEnrichment",
+    "PersonaAnalysis",
+]
@@ -0,0 +1,187 @@
+"""
+Columnar form of a summary: one row per dataset column in a polars DataFrame,
+stored as Parquet or Arrow IPC. Common statistics get typed columns so many
+profiles can be queried together, everything else is kept as type-tagged JSON
+so `Summary -> frame -> Summary` is lossless.
+"""
+
+import base64
+import json
+import math
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from typing import Any, Dict, List
+
+import polars as pl
+
+TYPE_KEY = "__type__"
+
+# Dataset fields of every row, repeated so concatenated profiles stay queryable.
+DATASET_FIELDS = {"filename": pl.String, "name": pl.String, "description": pl.String}
+# Column fields with a typed frame column, the others go to `extra`.
+COLUMN_FIELDS = {
+    "column": pl.String,
+    "type": pl.String,
+    "dtype": pl.String,
+    "null_count": pl.Int64,
+    "not_null_count": pl.Int64,
+    "min": pl.Float64,
+    "max": pl.Float64,
+    "mean": pl.Float64,
+    "median": pl.Float64,
+    "std": pl.Float64,
+    "summary": pl.String,
+}
+FRAME_SCHEMA = pl.Schema(
+    {
+        **DATASET_FIELDS,
+        # Type-tagged JSON of the other dataset fields
+        "dataset_extra": pl.String,
+        # Index of the column in the dataset, null for a summary without columns
+        "position": pl.Int32,
+        **COLUMN_FIELDS,
+        "samples": pl.String,
+        "extra": pl.String,
+    }
+)
+
+
+def _identity(value: Any) -> Any:
+    return value
+
+
+def _encode_float(value: float) -> Any:
+    return value if math.isfinite(value) else {TYPE_KEY: "float", "value": str(value)}
+
+
+def _encode_dict(value: dict) -> Any:
+    if all(isinstance(key, str) for key in value) and TYPE_KEY not in value:
+        return {key: encode_value(item) for key, item in value.items()}
+    return {
+        TYPE_KEY: "dict",
+        "value": [[encode_value(key), encode_value(item)] for key, item in value.items()],
+    }
+
+
+# Encoders by type, a subclass uses the one of its closest listed base
+_ENCODERS = {
+    type(None): _identity,
+    bool: _identity,
+    int: _identity,
+    str: _identity,
+    float: _encode_float,
+    datetime: lambda value: {TYPE_KEY: "datetime", "value": value.isoformat()},
+    date: lambda value: {TYPE_KEY: "date", "value": value.isoformat()},
+    time: lambda value: {TYPE_KEY: "time", "value": value.isoformat()},
+    timedelta: lambda value: {TYPE_KEY: "timedelta", "value": [value.days, value.seconds, value.microseconds]},
+    Decimal: lambda value: {TYPE_KEY: "decimal", "value": str(value)},
+    bytes: lambda value: {TYPE_KEY: "bytes", "value": base64.b64encode(value).decode("ascii")},
+    list: lambda value: [encode_value(item) for item in value],
+    tuple: lambda value: {TYPE_KEY: "tuple", "value": [encode_value(item) for item in value]},
+    dict: _encode_dict,
+}
+
+
+def encode_value(value: Any) -> Any:
+    """A JSON document of `value`, tagging the types JSON cannot tell apart."""
+    for cls in type(value).__mro__:
+        if cls in _ENCODERS:
+            return _ENCODERS[cls](value)
+    raise TypeError(f"Object of type {value.__class__.__name__} cannot be stored in a summary frame")
+
+
+_DECODERS = {
+    "float": float,
+    "datetime": datetime.fromisoformat,
+    "date": date.fromisoformat,
+    "time": time.fromisoformat,
+    "timedelta": lambda value: timedelta(days=value[0], seconds=value[1], microseconds=value[2]),
+    "decimal": Decimal,
+    "bytes": base64.b64decode,
+    "tuple": lambda value: tuple(decode_value(item) for item in value),
+    "dict": lambda value: {decode_value(key): decode_value(item) for key, item in value},
+}
+
+
+def decode_value(value: Any) -> Any:
+    """Inverse of `encode_value`."""
+    if isinstance(value, list):
+        return [decode_value(item) for item in value]
+    if isinstance(value, dict):
+        if TYPE_KEY in value:
+            return _DECODERS[value[TYPE_KEY]](value["value"])
+        return {key: decode_value(item) for key, item in value.items()}
+    return value
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(encode_value(value))
+
+
+def _loads(value: str | None) -> Any:
+    return None if value is None else decode_value(json.loads(value))
+
+
+def _fits(value: Any, dtype: pl.DataType) -> bool:
+    """Whether the typed frame column holds `value` without changing it."""
+    if value is None or isinstance(value, bool):
+        return value is None
+    if dtype == pl.String:
+        return isinstance(value, str)
+    if dtype == pl.Int64:
+        return isinstance(value, int) and -(2**63) <= value < 2**63
+    return isinstance(value, float) or (isinstance(value, int) and float(value) == value)
+
+
+def summary_to_frame(summary: dict) -> pl.DataFrame:
+    """One row per column of a summary dict, see `Summary.to_frame`."""
+    # Dataset fields that are not strings are kept with the other dataset fields.
+    dataset = {
+        key: summary[key]
+        for key in DATASET_FIELDS
+        if key in summary and _fits(summary[key], pl.String)
+    }
+    dataset_extra = {
+        key: value
+        for key, value in summary.items()
+        if key not in dataset and key != "columns"
+    }
+    dataset_extra = _dumps(dataset_extra) if dataset_extra else None
+
+    data: Dict[str, List] = {name: [] for name in FRAME_SCHEMA}
+    # A row without position keeps the dataset fields of a summary without columns.
+    columns = summary.get("columns") or [None]
+    for position, column in enumerate(columns):
+        for key in DATASET_FIELDS:
+            data[key].append(dataset.get(key))
+        data["dataset_extra"].append(dataset_extra)
+        data["position"].append(None if column is None else position)
+        column = dict(column or {})
+        for key, dtype in COLUMN_FIELDS.items():
+            fits = key in column and _fits(column[key], dtype)
+            data[key].append(column.pop(key) if fits else None)
+        data["samples"].append(_dumps(column.pop("samples")) if "samples" in column else None)
+        data["extra"].append(_dumps(column) if column else None)
+    return pl.DataFrame(data, schema=FRAME_SCHEMA)
+
+
+def summary_from_frame(frame: pl.DataFrame) -> dict:
+    """Summary dict of a frame written by `summary_to_frame`."""
+    if frame.is_empty():
+        raise ValueError("A summary frame has at least one row.")
+    rows = frame.sort("position", nulls_last=True).to_dicts()
+    first = rows[0]
+    summary = {key: first[key] for key in DATASET_FIELDS if first[key] is not None}
+    summary.update(_loads(first["dataset_extra"]) or {})
+
+    columns = []
+    for row in rows:
+        if row["position"] is None:
+            continue
+        column = {key: row[key] for key in COLUMN_FIELDS if row[key] is not None}
+        if row["samples"] is not None:
+            column["samples"] = _loads(row["samples"])
+        column.update(_loads(row["extra"]) or {})
+        columns.append(column)
+    summary["columns"] = columns
+    return summary
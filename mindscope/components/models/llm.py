@@ -1,4 +1,4 @@
-from typing import List, Any
+from typing import Dict, List, Any
 
 from pydantic import BaseModel
 
@@ -25,3 +25,4 @@ class LLMResponse(BaseModel):
     logprobs: Any | None = None  # logprobs if available
     usage: Any | None = None  # usage statistics from the provider
     response: Any | None = None  # full response from the provider
+    estimated_tokens: Dict[str, int] | None = None  # local token estimates of the prompt
@@ -0,0 +1,12 @@
+from pydantic import BaseModel, ConfigDict
+from typing import List
+
+
+class PersonaAnalysis(BaseModel):
+    persona: str
+    summary: str = ""
+    relevant_columns: List[str] = []
+    insights: List[str] = []
+    recommendations: List[str] = []
+
+    model_config: ConfigDict = ConfigDict(extra="allow")
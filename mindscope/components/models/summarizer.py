@@ -1,6 +1,10 @@
 from pydantic import BaseModel, ConfigDict
 from typing import Any, List
 
+import polars as pl
+
+from .frame import summary_from_frame, summary_to_frame
+
 
 class Column(BaseModel):
     column: Any
@@ -26,3 +30,61 @@ class Summary(BaseModel):
     columns: List[Column] = []
 
     model_config: ConfigDict = ConfigDict(extra="allow")
+
+    def to_frame(self) -> pl.DataFrame:
+        """
+        One row per column with typed `min`, `max`, `mean`, `median`, `std`
+        and counts, so profiles of many datasets can be concatenated and
+        queried. Samples and dtype specific statistics are type-tagged JSON
+        in `samples` and `extra`, `Summary.from_frame` restores them exactly.
+        """
+        return summary_to_frame(self.model_dump())
+
+    @classmethod
+    def from_frame(cls, frame: pl.DataFrame) -> "Summary":
+        return cls(**summary_from_frame(frame))
+
+    def write_parquet(self, path: str) -> None:
+        self.to_frame().write_parquet(path)
+
+    def write_ipc(self, path: str) -> None:
+        self.to_frame().write_ipc(path)
+
+    @classmethod
+    def read_parquet(cls, path: str) -> "Summary":
+        return cls.from_frame(pl.read_parquet(path))
+
+    @classmethod
+    def read_ipc(cls, path: str) -> "Summary":
+        return cls.from_frame(pl.read_ipc(path))
+
+
+class EnrichmentEvent(BaseModel):
+    """
+    Progress of a streamed enrichment: the dataset `description`, the summary
+    of one `column`, or the final merged `summary`.
+    """
+
+    kind: str
+    column: Any = None
+    text: str = ""
+    summary: Summary | None = None
+
+
+class ColumnEnrichment(BaseModel):
+    column: str
+    summary: str
+
+    model_config: ConfigDict = ConfigDict(extra="forbid")
+
+
+class Enrichment(BaseModel):
+    """
+    What the LLM returns for a batch of columns, used as a strict
+    `response_format` and merged into the local `Summary`.
+    """
+
+    description: str
+    columns: List[ColumnEnrichment]
+
+    model_config: ConfigDict = ConfigDict(extra="forbid")
@@ -4,16 +4,24 @@ from .utils.persona import from_json
 
 
 class Persona:
-    def __init__(self, name: str):
+    def __init__(
+        self,
+        name: str,
+        description: str = None,
+        goals: List[str] = None,
+        pain_points: List[str] = None,
+        preferences: Dict[str, str] = None,
+        traits: Dict[str, str] = None,
+    ):
         self._name: str = name
-        self._description: str = None
-        self._goals: List[str] = None
-        self._pain_points: List[str] = None
-        self._preference: Dict[str, str] = {
+        self._description: str = description
+        self._goals: List[str] = goals
+        self._pain_points: List[str] = pain_points
+        self._preference: Dict[str, str] = preferences or {
             "tone": "trustworthy",
             "detail_level": "medium",
         }
-        self._trait: Dict[str, str] = None
+        self._trait: Dict[str, str] = traits
         self.readable_json_formats = ["json", "yaml"]
 
     def to_dict(self):
@@ -76,6 +84,14 @@ class Persona:
     def preferences(self, value):
         self._preference = value
 
+    @property
+    def traits(self):
+        return self._trait
+
+    @traits.setter
+    def traits(self, value):
+        self._trait = value
+
     @staticmethod
     def from_file_path(path: str):
         extn = path.split(".")[-1]
@@ -94,6 +110,7 @@ class Persona:
             persona.goals = data.get("goals")
             persona.pain_points = data.get("pain_points")
             persona.preferences = data.get("preferences")
+            persona.traits = data.get("traits")
 
             return persona
         except Exception as e:
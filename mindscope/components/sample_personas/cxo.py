@@ -94,4 +94,4 @@ CHEIF_TECHNOLOGY_OFFICER = Persona(
 
 
 
-__all__ ['CHEIF_FINANCIAL_OFFICER', 'CHEIF_MARKETING_OFFICER', 'CHEIF_STRATEGY_OFFICER', 'CHEIF_INFORMATION_SECURITY_OFFICER','CHEIF_TECHNOLOGY_OFFICER' ]
+__all__ = ['CHEIF_FINANCIAL_OFFICER', 'CHEIF_MARKETING_OFFICER', 'CHEIF_STRATEGY_OFFICER', 'CHEIF_INFORMATION_SECURITY_OFFICER','CHEIF_TECHNOLOGY_OFFICER' ]
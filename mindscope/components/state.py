@@ -0,0 +1,82 @@
+import os
+import pickle
+from typing import Dict
+
+import polars as pl
+
+from .utils.state import merge_column_states, merge_samples
+
+
+class SummaryState:
+    """
+    Mergeable statistics of every column of a dataset: counts, sums, min/max,
+    HyperLogLog registers, quantile sketches, category counts and a hashed
+    sample of rows.
+
+    The state of appended rows merges into the state of the existing ones, so
+    a summary can be refreshed in time proportional to the new rows only.
+    Hashes are only stable within a polars version, states built with
+    different versions cannot be merged.
+    """
+
+    def __init__(
+        self,
+        schema: pl.Schema,
+        n_rows: int,
+        columns: Dict[str, dict],
+        samples: dict,
+        categorical_limit: int,
+    ):
+        self.schema = schema
+        self.n_rows = n_rows
+        self.columns = columns
+        self.samples = samples
+        self.categorical_limit = categorical_limit
+        self.polars_version: str = pl.__version__
+
+    def __repr__(self):
+        return f"SummaryState(n_rows={self.n_rows}, n_columns={len(self.schema)})"
+
+    @property
+    def date_formats(self) -> Dict[str, str | None]:
+        """Formats of the string columns tracked as dates."""
+        return {
+            name: column["date_format"]
+            for name, column in self.columns.items()
+            if "date_format" in column
+        }
+
+    def merge(self, other: "SummaryState") -> "SummaryState":
+        """State of the rows of both states, neither one is modified."""
+        if self.polars_version != other.polars_version:
+            raise ValueError(
+                f"State built with polars {self.polars_version} cannot be merged with one "
+                f"built with polars {other.polars_version}, rebuild it with `build_state`."
+            )
+        if dict(self.schema) != dict(other.schema):
+            raise ValueError("States of datasets with different schemas cannot be merged.")
+
+        return SummaryState(
+            schema=self.schema,
+            n_rows=self.n_rows + other.n_rows,
+            columns={
+                name: merge_column_states(column, other.columns[name], self.categorical_limit)
+                for name, column in self.columns.items()
+            },
+            samples=merge_samples(self.samples, other.samples),
+            categorical_limit=self.categorical_limit,
+        )
+
+    def save(self, path: str) -> None:
+        """Store the state, e.g. next to the summary it was built with."""
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            pickle.dump(self, f)
+
+    @staticmethod
+    def load(path: str) -> "SummaryState":
+        if not os.path.exists(path):
+            raise FileNotFoundError("No file found at given path")
+        with open(path, "rb") as f:
+            return pickle.load(f)
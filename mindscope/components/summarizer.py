@@ -1,42 +1,221 @@
-import copy
+import asyncio
+import inspect
 import json
 import logging
+import queue
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Callable, Dict, Iterator, List, Tuple
 
 import polars as pl
 
-from mindscope.components.models import LLMResponse, GenerationConfig, Summary
-from mindscope.components.llm import llm
+from mindscope.components.models import (
+    LLMResponse,
+    GenerationConfig,
+    Summary,
+    Enrichment,
+    EnrichmentEvent,
+)
+from mindscope.components.llm import llm, BaseLLM, LLMCache, count_message_tokens
+from .core import INSTRUMENTATION
+from .core.instrumentation import usage_attributes
 from .utils.summarizer import (
     try_parse_dates,
     try_generic_string_parse,
     try_categorical_parse,
     datetime_serializer,
+    column_family,
+    profile_expressions,
+    split_profile,
+    date_parse_stats,
+    infer_date_format,
+    batch_columns,
+    compact_summary,
+    merge_enrichments,
+    row_sample_mask,
+    known_stats,
+    known_properties,
+    quantile_rank_error,
+    missed_category_frequency,
+    HLL_RELATIVE_STANDARD_ERROR,
+    StatsDict,
+)
+from .utils.json_stream import IncrementalJSONParser, FIELD, ITEM
+from .utils.sampling import sample_indices, gather_rows
+from .utils.relationships import strongest_relationships
+from .utils.distribution import (
+    HISTOGRAM_FAMILIES,
+    distribution_stats,
+    distribution_properties,
+    histogram_edges,
+    histogram_expr,
+    physical_expr,
+    state_distribution_stats,
+)
+from .utils.state import (
+    FAMILY_STATE_STATS,
+    STRING_STATE_STATS,
+    value_counts,
+    sample_expressions,
+    split_samples,
+    column_state,
+    column_stats,
+    hll_relative_standard_error,
 )
-from .templates.summarizer import SUMMARIZER_ENRICH_SYSTEM_PROMPT, SUMMARIZER_USER_PROMPT
+from .state import SummaryState
+from .prompts.summarizer import SUMMARIZER_ENRICH_SYSTEM_PROMPT, SUMMARIZER_USER_PROMPT
 
 logger = logging.getLogger(__name__)
 
 
+class _BatchStream:
+    """
+    One enrichment batch being streamed, shared by the sync and async
+    drivers: text chunks are parsed into events handed to `emit`, and the
+    final `LLMResponse` is kept.
+    """
+
+    def __init__(self, span, estimated_tokens: dict, emit: Callable[[EnrichmentEvent], None]):
+        self.span = span
+        self.estimated_tokens = estimated_tokens
+        self.emit = emit
+        self.parser = IncrementalJSONParser()
+        self.response: LLMResponse | None = None
+        self.started = time.perf_counter()
+
+    def add(self, item: str | LLMResponse) -> None:
+        if isinstance(item, LLMResponse):
+            self.response = item
+            return
+        if not self.parser.text:
+            self.span.set(time_to_first_token=time.perf_counter() - self.started)
+        for kind, key, value in self.parser.feed(item):
+            if kind == FIELD and key == "description" and value:
+                self.emit(EnrichmentEvent(kind="description", text=str(value)))
+            elif kind == ITEM and key == "columns" and isinstance(value, dict) and value.get("summary"):
+                self.emit(EnrichmentEvent(kind="column", column=value.get("column"), text=str(value["summary"])))
+
+    def result(self) -> LLMResponse:
+        if self.response is None:
+            raise RuntimeError("The enrichment stream ended without a complete response.")
+        self.span.set(**usage_attributes(self.response.usage))
+        self.response.estimated_tokens = self.estimated_tokens
+        return self.response
+
+
 class Summarizer:
     # Todo: Should be move the data into a new class named Dataset.
-    def __init__(self, data: pl.DataFrame, filename: str = ""):
+    def __init__(
+        self,
+        data: pl.DataFrame | pl.LazyFrame,
+        filename: str = "",
+        date_formats: Dict[str, str | None] | None = None,
+        llm_cache: LLMCache | None = None,
+        llm_client: BaseLLM | None = None,
+        state: SummaryState | None = None,
+        file_statistics: dict | None = None,
+    ):
         """
         Initialize the summarizer with a polars dataframe.
+
+        A LazyFrame (e.g. from `pl.scan_csv`) is profiled as a lazy query on the
+        streaming engine, so the data never has to fit in memory.
+
+        `date_formats` maps string columns to the date format recorded in a
+        previous summary, those columns skip format inference.
+
+        `llm_cache` serves enrichment of an unchanged summary without calling the LLM.
+        `llm_client` replaces the default OpenAI client, e.g. to share one
+        `AsyncOpenAIClient` and its concurrency limit between many datasets.
+
+        `state` is the `SummaryState` of `data` saved by an earlier run, so
+        `update` only has to read the appended rows.
+
+        `file_statistics` are statistics of `data` stored with its file, as
+        returned by `read_parquet_statistics`. They are not computed again, the
+        summary lists the properties of each column answered from them in
+        `metadata_statistics`.
         """
-        self.summary: dict = {
-            "filename": filename,
-            "name": "",  # Dataset name should be given by LLM maximum 3 word if not given by user.
-            "description": "",  # LLM should generate this if not given by user.
-        }
+        # Dataset name should be given by LLM maximum 3 word if not given by user.
+        self.name: str = ""
+        # LLM should generate this if not given by user.
+        self.description: str = ""
+        self.summary: dict = self._new_summary(filename)
         self.data = data
-        self.N_ROWS: int = self.data.height
-        self.N_COLUMNS: int = self.data.width
+        self.is_lazy: bool = isinstance(data, pl.LazyFrame)
+        self.schema: pl.Schema = (
+            data.collect_schema() if self.is_lazy else data.schema
+        )
+        self.file_statistics: dict | None = file_statistics
+        if file_statistics is not None and self.is_lazy:
+            self.N_ROWS: int = file_statistics["n_rows"]
+        else:
+            self.N_ROWS: int = (
+                self._collect(data.select(pl.len())).item() if self.is_lazy else data.height
+            )
+        self.N_COLUMNS: int = len(self.schema)
         self.filename = filename
+        self.llm_cache = llm_cache
+        self.llm_client = llm_client
+        # Mergeable statistics refreshed by `update`
+        self.state: SummaryState | None = state
         # Threshold for identifying categorical columns
         self.CATEGORICAL_THRESHOLD: float = 0.05
         # Threshold for identifying date-like columns
         self.DATE_LIKE_THRESHOLD: float = 0.9
+        # Non null values of a string column probed before trying a full date parse
+        self.DATE_PROBE_SIZE: int = 1000
+        # Date formats confirmed per column, reused by later runs
+        self.date_formats: Dict[str, str | None] = dict(date_formats or {})
         self.CATEGORICAL_UNIQUE_LIMIT: int = 50
+        # Most frequent values reported per string column, 0 for none
+        self.TOP_VALUES_LIMIT: int = 5
+        # Equal width bins of the histogram of numeric and temporal columns, 0 for none
+        self.HISTOGRAM_BINS: int = 10
+        # Seed of the column samples, fixed so an unchanged dataset gives the same
+        # summary and its enrichment can be served from the LLM cache. None
+        # draws other rows on every run.
+        self.SAMPLE_SEED: int | None = 0
+        # Column whose values the sampled rows are spread across, e.g. a category
+        self.SAMPLE_STRATIFY_BY: str | None = None
+        # Rows used by the approximate mode for medians and category lists
+        self.APPROXIMATE_SAMPLE_SIZE: int = 100_000
+        self.APPROXIMATE_SEED: int = 0
+        # Confidence level of the error bounds reported by the approximate mode
+        self.APPROXIMATE_CONFIDENCE: float = 0.99
+        # Strongest column pairs reported in `relationships`, 0 skips the stage
+        self.RELATIONSHIPS_TOP_K: int = 0
+        # Rows the relationships are computed from, a seeded sample of larger data
+        self.RELATIONSHIP_SAMPLE_SIZE: int = 20_000
+        # Input tokens of columns sent per enrichment request
+        self.ENRICH_BATCH_TOKENS: int = 2000
+        # Output tokens allowed per enrichment request
+        self.ENRICH_MAX_TOKENS: int = 4028
+        # Enrichment requests sent at once by the synchronous client
+        self.ENRICH_MAX_WORKERS: int = 4
+        # Responses of the last enrichment, with their estimated prompt tokens
+        self.llm_responses: List[LLMResponse] = []
+
+    def _new_summary(self, filename: str) -> dict:
+        return {
+            "filename": filename,
+            "name": self.name,
+            "description": self.description,
+        }
+
+    @staticmethod
+    def _collect(query: pl.LazyFrame) -> pl.DataFrame:
+        return query.collect(engine="streaming")
+
+    def _select(self, exprs, data: pl.DataFrame | pl.LazyFrame | None = None) -> pl.DataFrame:
+        data = self.data if data is None else data
+        if isinstance(data, pl.LazyFrame):
+            return self._collect(data.select(exprs))
+        # Going through the lazy engine lets polars share common subexpressions,
+        # e.g. one date parse feeding its count, min and max.
+        return data.lazy().select(exprs).collect()
 
     def _is_categorical(self, n_unique):
         check = (
@@ -46,173 +225,824 @@ class Summarizer:
         )
         return check
 
-    def _handle_numeric_column(self, column_data: pl.Series):
-        logger.debug(f"_handle_numeric_column called for column : {column_data.name}")
+    def _handle_numeric_column(self, name: str, dtype: pl.DataType, stats: dict):
+        logger.debug(f"_handle_numeric_column called for column : {name}")
         return {
-            "column": column_data.name,
+            "column": name,
             "type": "numeric",
-            "dtype": str(column_data.dtype),
-            "min": column_data.min(),
-            "max": column_data.max(),
-            "mean": column_data.mean(),
-            "median": column_data.median(),
-            "std": column_data.std(),
-            "null_count": column_data.null_count(),
-            "not_null_count": column_data.count(),
+            "dtype": str(dtype),
+            "min": stats["min"],
+            "max": stats["max"],
+            "mean": stats["mean"],
+            "median": stats["median"],
+            "std": stats["std"],
+            "null_count": stats["null_count"],
+            "not_null_count": stats["not_null_count"],
         }
 
-    def _handle_temporal_column(self, column_data: pl.Series):
-        logger.debug(f"_handle_temporal_column called for column : {column_data.name}")
+    def _handle_temporal_column(self, name: str, dtype: pl.DataType, stats: dict):
+        logger.debug(f"_handle_temporal_column called for column : {name}")
         return {
-            "column": column_data.name,
+            "column": name,
             "type": "date",
-            "dtype": str(column_data.dtype),
-            "min_date": column_data.min(),
-            "max_date": column_data.max(),
-            "null_count": column_data.null_count(),
-            "not_null_count": column_data.count(),
-            "min_max_diff": column_data.max() - column_data.min(),
+            "dtype": str(dtype),
+            "min_date": stats["min"],
+            "max_date": stats["max"],
+            "null_count": stats["null_count"],
+            "not_null_count": stats["not_null_count"],
+            "min_max_diff": stats["min_max_diff"],
         }
 
-    def _handle_boolean_column(self, column_data: pl.Series):
-        logger.debug(f"_handle_boolean_column called for column : {column_data.name}")
+    def _handle_boolean_column(self, name: str, dtype: pl.DataType, stats: dict):
+        logger.debug(f"_handle_boolean_column called for column : {name}")
         return {
-            "column": column_data.name,
+            "column": name,
             "type": "boolean",
-            "dtype": str(column_data.dtype),
-            "true_count": column_data.sum(),
-            "false_count": column_data.count() - column_data.sum(),
-            "null_count": column_data.null_count(),
-            "not_null_count": column_data.count(),
+            "dtype": str(dtype),
+            "true_count": stats["true_count"],
+            "false_count": stats["not_null_count"] - stats["true_count"],
+            "null_count": stats["null_count"],
+            "not_null_count": stats["not_null_count"],
         }
 
-    def _handle_categorical_column(self, column_data: pl.Series):
-        logger.debug(
-            f"_handle_categorical_column called for column : {column_data.name}"
-        )
+    def _handle_categorical_column(self, name: str, dtype: pl.DataType, stats: dict):
+        logger.debug(f"_handle_categorical_column called for column : {name}")
         return {
-            "column": column_data.name,
-            "dtype": str(column_data.dtype),
+            "column": name,
+            "dtype": str(dtype),
             "type": "categorical",
-            "categories": column_data.unique().sort().to_list(),
-            "n_categories": column_data.n_unique(),
-            "null_count": column_data.null_count(),
-            "not_null_count": column_data.count(),
+            "categories": stats["categories"],
+            "n_categories": stats["n_unique"],
+            "null_count": stats["null_count"],
+            "not_null_count": stats["not_null_count"],
         }
 
-    def _handle_string_column(self, column_data: pl.Series):
-        properties = try_parse_dates(column_data, self.DATE_LIKE_THRESHOLD)
+    def _handle_string_column(self, name: str, dtype: pl.DataType, stats: dict):
+        properties = try_parse_dates(name, dtype, stats, self.DATE_LIKE_THRESHOLD)
         if properties is not None:
             return properties
 
-        if self._is_categorical(column_data.n_unique()):
-            properties = try_categorical_parse(column_data)
+        if self._is_categorical(stats["n_unique"]):
+            return try_categorical_parse(name, dtype, stats)
 
-        if properties is not None:
-            return properties
+        return try_generic_string_parse(name, dtype, stats)
 
-        properties = try_generic_string_parse(column_data)
-        if properties is not None:
-            return properties
-        else:
-            {
-                "column": column_data.name,
-                "type": "string",
-                "dtype": str(column_data.dtype),
-                "null_count": column_data.null_count(),
-                "not_null_count": column_data.count(),
-                "n_unique": column_data.n_unique(),
+    def _handle_other_column(self, name: str, dtype: pl.DataType, stats: dict):
+        return {
+            "column": name,
+            "dtype": str(dtype),
+            "type": "other",
+            "null_count": stats["null_count"],
+            "not_null_count": stats["not_null_count"],
+        }
+
+    # Check data type family and call respective handle function.
+    def _handle_column(self, name: str, dtype: pl.DataType, stats: dict):
+        handlers = {
+            "numeric": self._handle_numeric_column,
+            "temporal": self._handle_temporal_column,
+            "boolean": self._handle_boolean_column,
+            "categorical": self._handle_categorical_column,
+            "string": self._handle_string_column,
+            "other": self._handle_other_column,
+        }
+        return handlers[column_family(dtype)](name, dtype, stats)
+
+    def _string_stats(self) -> dict:
+        limit = self.CATEGORICAL_UNIQUE_LIMIT
+        probe_size = self.DATE_PROBE_SIZE
+        return {
+            # Complete whenever the column is categorical, as that needs n_unique < limit.
+            "categories": lambda col: col.unique().head(limit).sort().implode(),
+            "date_probe": lambda col: col.drop_nulls().head(probe_size).implode(),
+        }
+
+    def _detect_date_formats(self, profile: dict) -> dict:
+        """
+        Pick the string columns that look like dates from their probe, reusing
+        the formats confirmed on earlier runs.
+        """
+        formats = {}
+        for name, dtype in self.schema.items():
+            if column_family(dtype) != "string":
+                continue
+            probe = pl.Series(profile[name].pop("date_probe"), dtype=pl.Utf8)
+            if name in self.date_formats:
+                formats[name] = self.date_formats[name]
+                continue
+            logger.debug(f"Trying to parse date column : {name}")
+            is_date, fmt = infer_date_format(probe, self.DATE_LIKE_THRESHOLD)
+            if is_date:
+                formats[name] = fmt
+        return formats
+
+    def _date_stats(self, formats: dict) -> dict:
+        exprs = [
+            builder(pl.col(name)).alias(f"{index}::{stat}")
+            for index, (name, fmt) in enumerate(formats.items())
+            for stat, builder in date_parse_stats(fmt).items()
+        ]
+        try:
+            row = self._select(exprs).row(0, named=True)
+        except Exception as e:
+            # Inferring a format over a whole column can fail, retry one by one.
+            logger.debug(f"Failed to parse date columns together : {e.__class__} : {e}")
+            if len(formats) == 1:
+                return {}
+            stats = {}
+            for name, fmt in formats.items():
+                stats.update(self._date_stats({name: fmt}))
+            return stats
+
+        return {
+            name: {
+                "date_format": fmt,
+                **{
+                    stat: row[f"{index}::{stat}"]
+                    for stat in date_parse_stats(fmt)
+                },
             }
-        return
+            for index, (name, fmt) in enumerate(formats.items())
+        }
 
-    def _handle_other_column(self, column_data: pl.Series):
+    def _parse_dates(self, profile: dict) -> None:
+        """
+        Fully parse only the columns whose probe looked like dates, all in one
+        `select`, and remember the formats that held up for later runs.
+        """
+        formats = self._detect_date_formats(profile)
+        if not formats:
+            return
+
+        date_stats = self._date_stats(formats)
+        for name in formats.keys() - date_stats.keys():
+            self.date_formats.pop(name, None)
+
+        for name, stats in date_stats.items():
+            profile[name].update(stats)
+            not_null_count = profile[name]["not_null_count"]
+            is_date = (
+                not_null_count > 0
+                and stats["date::count"] / not_null_count >= self.DATE_LIKE_THRESHOLD
+            )
+            if is_date:
+                self.date_formats[name] = stats["date_format"]
+            else:
+                self.date_formats.pop(name, None)
+
+    def _approximate_stats(self) -> dict:
+        """
+        Replace the exact statistics that need the whole column in memory by a
+        HyperLogLog distinct count and values read from a uniform row sample.
+        """
+        mask = row_sample_mask(
+            self.N_ROWS, self.APPROXIMATE_SAMPLE_SIZE, self.APPROXIMATE_SEED
+        )
+        limit = self.CATEGORICAL_UNIQUE_LIMIT
         return {
-            "column": column_data.name,
-            "dtype": str(column_data.dtype),
-            "type": "other",
-            "null_count": column_data.null_count(),
-            "not_null_count": column_data.count(),
+            "numeric": {
+                "median": lambda col: col.filter(mask).median(),
+                "sample_size": lambda col: col.filter(mask).count(),
+            },
+            "string": {
+                "n_unique": lambda col: col.approx_n_unique(),
+                "categories": lambda col: col.filter(mask).unique().head(limit).sort().implode(),
+                "sample_size": lambda col: col.filter(mask).count(),
+            },
+        }
+
+    def _error_bounds(self, properties: dict, stats: dict) -> dict:
+        confidence = self.APPROXIMATE_CONFIDENCE
+        sample_size = stats.get("sample_size")
+        bounds = {}
+        if "median" in properties and sample_size:
+            bounds["median"] = {
+                "method": "uniform sample",
+                "sample_size": sample_size,
+                "rank_error": quantile_rank_error(sample_size, confidence),
+                "confidence": confidence,
+            }
+        for key in ["n_unique", "n_categories"]:
+            if key in properties and properties["type"] != "categorical":
+                bounds[key] = {
+                    "method": "hyperloglog",
+                    "relative_standard_error": HLL_RELATIVE_STANDARD_ERROR,
+                }
+        if properties["type"] == "categorical string" and sample_size:
+            bounds["categories"] = {
+                "method": "uniform sample",
+                "sample_size": sample_size,
+                "max_missed_frequency": missed_category_frequency(sample_size, confidence),
+                "confidence": confidence,
+            }
+        return bounds
+
+    def _known_stats(self) -> Dict[str, dict]:
+        """Statistics of each column answered by `file_statistics`."""
+        if not self.file_statistics:
+            return {}
+        columns = self.file_statistics["columns"]
+        return {
+            name: known_stats(columns[name], dtype)
+            for name, dtype in self.schema.items()
+            if name in columns
         }
 
-    # Check data type and call respective handle function.
-    def _handle_column(self, dtype: pl.DataType, column_data: pl.Series):
-        if dtype.is_numeric():
-            properties = self._handle_numeric_column(column_data)
-        elif dtype.is_temporal():
-            properties = self._handle_temporal_column(column_data)
-        elif isinstance(dtype, pl.Boolean):
-            properties = self._handle_boolean_column(column_data)
-        elif isinstance(dtype, pl.Categorical):
-            properties = self._handle_categorical_column(column_data)
-        elif isinstance(dtype, pl.Utf8):
-            properties = self._handle_string_column(column_data)
-        else:  # handle other
-            properties = self._handle_other_column(column_data)
-
-        return properties
-
-    def _column_properties(self, n_samples):
-        data = copy.deepcopy(self.data)
+    def _profile(self, approximate: bool = False, known: Dict[str, dict] | None = None) -> dict:
+        """
+        Compute the statistics of all columns, including category lists of
+        string columns, in a single `select`. String columns that look like
+        dates are parsed in a second one. Statistics known from the file are
+        not computed, a column needing no other statistic is not read.
+        """
+        if not self.schema:
+            return {}
+
+        extra_stats = {"string": self._string_stats()}
+        distributions = distribution_stats(self.TOP_VALUES_LIMIT)
+        extras = [distributions, self._approximate_stats()] if approximate else [distributions]
+        for extra in extras:
+            for family, stats in extra.items():
+                extra_stats[family] = {**extra_stats.get(family, {}), **stats}
+
+        with INSTRUMENTATION.span(
+            "summarizer.profile", columns=len(self.schema), approximate=approximate
+        ) as span:
+            known = self._known_stats() if known is None else known
+            exprs = profile_expressions(self.schema, extra_stats, known=known)
+            row = self._select(exprs).row(0, named=True) if exprs else {}
+            profile = split_profile(row, self.schema, extra_stats, known=known)
+            if span.recording:
+                span.set(known_stats=sum(len(stats) for stats in known.values()))
+
+        with INSTRUMENTATION.span("summarizer.date_parsing") as span:
+            self._parse_dates(profile)
+            if span.recording:
+                span.set(date_columns=[name for name in profile if "date_format" in profile[name]])
+        return profile
+
+    def _histograms(self, profile: dict) -> None:
+        """
+        Add the histogram of every numeric and temporal column to its profile,
+        all counted in one `select` over the bounds found by the profile, or
+        read from the file footer. Only the binned columns are read.
+        """
+        if not self.HISTOGRAM_BINS:
+            return
+        edges = {}
+        for name, dtype in self.schema.items():
+            if column_family(dtype) not in HISTOGRAM_FAMILIES:
+                continue
+            stats = profile[name]
+            column_edges = histogram_edges(stats["min"], stats["max"], dtype, self.HISTOGRAM_BINS)
+            if column_edges is None:
+                continue
+            if len(column_edges) == 2 and column_edges[0] == column_edges[1]:
+                stats["histogram"] = (column_edges, [stats["not_null_count"]])
+            else:
+                edges[name] = column_edges
+        if not edges:
+            return
+
+        with INSTRUMENTATION.span("summarizer.histograms", columns=len(edges)):
+            exprs = [
+                histogram_expr(physical_expr(pl.col(name), self.schema[name]), column_edges).alias(name)
+                for name, column_edges in edges.items()
+            ]
+            row = self._select(exprs).row(0, named=True)
+        for name, column_edges in edges.items():
+            profile[name]["histogram"] = (column_edges, row[name])
+
+    def _sample_rows(self, n_samples: int) -> pl.DataFrame:
+        """
+        One seeded uniform sample of whole rows, so the samples of all columns
+        come from the same records. The rows are picked from the row count
+        alone, a LazyFrame is then read once to gather them.
+        """
+        seed = self.SAMPLE_SEED if self.SAMPLE_SEED is not None else random.getrandbits(32)
+        stratify_by = self.SAMPLE_STRATIFY_BY
+        with INSTRUMENTATION.span("summarizer.sample", rows=n_samples, stratify_by=stratify_by):
+            strata = None
+            if stratify_by is not None:
+                if stratify_by not in self.schema:
+                    raise ValueError(f"Column {stratify_by} to stratify samples by not found.")
+                strata = self._select(pl.col(stratify_by)).to_series()
+            indices = sample_indices(self.N_ROWS, n_samples, seed, strata=strata)
+            if indices.is_empty():
+                return pl.DataFrame(schema=self.schema)
+            return gather_rows(self.data, indices)
+
+    def _relationships(self, columns: List[dict]) -> List[dict]:
+        """
+        The `RELATIONSHIPS_TOP_K` strongest correlations between numeric
+        columns and associations between categorical and boolean ones, read
+        from at most `RELATIONSHIP_SAMPLE_SIZE` rows.
+        """
+        numeric = [column["column"] for column in columns if column["type"] == "numeric"]
+        categorical = {
+            column["column"]: 2 if column["type"] == "boolean" else column["n_categories"]
+            for column in columns
+            if column["type"] == "boolean"
+            or 0 < (column.get("n_categories") or 0) <= self.CATEGORICAL_UNIQUE_LIMIT
+        }
+        with INSTRUMENTATION.span(
+            "summarizer.relationships", numeric=len(numeric), categorical=len(categorical)
+        ) as span:
+            if len(numeric) < 2 and len(categorical) < 2:
+                return []
+            data = self.data.select(numeric + list(categorical))
+            if self.N_ROWS > self.RELATIONSHIP_SAMPLE_SIZE:
+                seed = self.SAMPLE_SEED if self.SAMPLE_SEED is not None else random.getrandbits(32)
+                rows = gather_rows(
+                    data, sample_indices(self.N_ROWS, self.RELATIONSHIP_SAMPLE_SIZE, seed)
+                )
+            else:
+                rows = self._collect(data) if self.is_lazy else data
+            span.set(rows=rows.height)
+            return strongest_relationships(rows, numeric, categorical, self.RELATIONSHIPS_TOP_K)
+
+    def _column_properties(self, n_samples, approximate=False):
+        samples = self._sample_rows(n_samples)
         property_list = []
+        # Small frames fit in the sample anyway, so they are always exact.
+        approximate = approximate and self.N_ROWS > self.APPROXIMATE_SAMPLE_SIZE
+        known = self._known_stats()
+        profile = self._profile(approximate=approximate, known=known)
+        self._histograms(profile)
 
-        for column in data.columns:
+        for column, dtype in self.schema.items():
             logger.debug(f"Running for : {column}")
-            dtype = data[column].dtype
-            column_data = data[column]
-
-            properties = self._handle_column(dtype, column_data)
-            samples: pl.Series = column_data.sample(
-                n_samples, with_replacement=False, shuffle=True
-            )
-            properties["samples"] = samples.to_list()
+            # Statistics come from the batched profile, this only builds the properties.
+            with INSTRUMENTATION.span("summarizer.column", column=column, dtype=str(dtype)) as span:
+                properties = self._handle_column(column, dtype, profile[column])
+                properties.update(distribution_properties(dtype, profile[column]))
+                if approximate:
+                    error_bounds = self._error_bounds(properties, profile[column])
+                    if error_bounds:
+                        properties["error_bounds"] = error_bounds
+                if column in known:
+                    properties["metadata_statistics"] = known_properties(
+                        properties, known[column]
+                    )
+                properties["samples"] = samples[column].to_list()
+                if span.recording:
+                    span.set(type=properties["type"])
+                    if not self.is_lazy:
+                        # Columns are read in place, polars shares the underlying Arrow buffers.
+                        span.set(estimated_size_mb=self.data[column].estimated_size("mb"))
             property_list.append(properties)
 
         return property_list
 
-    def _enrich(self, summary: dict):
+    def _state_stats(self) -> StatsDict:
+        limit = self.CATEGORICAL_UNIQUE_LIMIT
+        string_stats = {**STRING_STATE_STATS, "counts": lambda col: value_counts(col, limit)}
+        return {**FAMILY_STATE_STATS, "categorical": string_stats, "string": string_stats}
+
+    def _state_of(self, data, offset: int, date_formats: dict) -> SummaryState:
+        """State of `data` whose first row is row `offset` of the dataset, in one `select`."""
+        family_stats = self._state_stats()
+        exprs = [pl.len().alias("state::n_rows")]
+        exprs += profile_expressions(self.schema, family_stats=family_stats)
+        exprs += [
+            builder(pl.col(name)).alias(f"date::{index}::{stat}")
+            for index, (name, fmt) in enumerate(date_formats.items())
+            for stat, builder in date_parse_stats(fmt).items()
+        ]
+        exprs += sample_expressions(self.schema, offset, self.SAMPLE_SEED or 0)
+        row = self._select(exprs, data).row(0, named=True)
+
+        profile = split_profile(row, self.schema, family_stats=family_stats)
+        for index, (name, fmt) in enumerate(date_formats.items()):
+            profile[name]["date_format"] = fmt
+            for stat in date_parse_stats(fmt):
+                profile[name][stat] = row[f"date::{index}::{stat}"]
+
+        return SummaryState(
+            schema=self.schema,
+            n_rows=row["state::n_rows"],
+            columns={
+                name: column_state(stats, self.CATEGORICAL_UNIQUE_LIMIT)
+                for name, stats in profile.items()
+            },
+            samples=split_samples(row, self.schema),
+            categorical_limit=self.CATEGORICAL_UNIQUE_LIMIT,
+        )
+
+    def build_state(self) -> SummaryState:
         """
-        # Docstring will go here.
+        Compute the mergeable state of the whole dataset in one pass, to be
+        stored with `SummaryState.save` and refreshed with `update`.
+        """
+        with INSTRUMENTATION.span("summarizer.build_state", rows=self.N_ROWS):
+            probes = {}
+            string_columns = [
+                name for name, dtype in self.schema.items() if column_family(dtype) == "string"
+            ]
+            if string_columns:
+                limit = self.DATE_PROBE_SIZE
+                row = self._select(
+                    [pl.col(name).drop_nulls().head(limit).implode() for name in string_columns]
+                ).row(0, named=True)
+                probes = {name: {"date_probe": row[name]} for name in string_columns}
+            formats = self._detect_date_formats(probes)
 
-        Todo:
-        - add feature to give custom input for enrich summary generator.
-        - Add response format validator.
-        - Add Generation Config handler.
+            state = self._state_of(self.data, offset=0, date_formats=formats)
+            for name in formats:
+                column = state.columns[name]
+                is_date = (
+                    column["not_null_count"] > 0
+                    and column["date::count"] / column["not_null_count"] >= self.DATE_LIKE_THRESHOLD
+                )
+                if is_date:
+                    self.date_formats[name] = column["date_format"]
+                else:
+                    # Not tracked as a date, later rows cannot change the verdict much.
+                    for key in ["date_format", *date_parse_stats(None)]:
+                        column.pop(key)
+                    self.date_formats.pop(name, None)
+
+        self.state = state
+        return state
+
+    def _state_error_bounds(self, properties: dict, state: dict) -> dict:
+        bounds = {}
+        rank_error = state["quantiles"]["rank_error"] if "quantiles" in state else 0
+        for key in ["median", "histogram"]:
+            if key in properties and rank_error:
+                bounds[key] = {"method": "quantile sketch", "rank_error": rank_error}
+        if "hll" in state and state["counts"] is None:
+            for key in ["n_unique", "n_categories"]:
+                if key in properties:
+                    bounds[key] = {
+                        "method": "hyperloglog",
+                        "relative_standard_error": hll_relative_standard_error(),
+                    }
+            error = state.get("heavy_hitters", {}).get("error")
+            if "top_values" in properties and error:
+                bounds["top_values"] = {"method": "heavy hitters", "max_undercount": error}
+        return bounds
+
+    def _state_summary(self, n_samples: int = 3) -> dict:
+        summary = self._new_summary(self.filename)
+        columns = []
+        for name, dtype in self.schema.items():
+            column = self.state.columns[name]
+            stats = column_stats(column)
+            stats.update(
+                state_distribution_stats(dtype, column, self.TOP_VALUES_LIMIT, self.HISTOGRAM_BINS)
+            )
+            properties = self._handle_column(name, dtype, stats)
+            properties.update(distribution_properties(dtype, stats))
+            error_bounds = self._state_error_bounds(properties, column)
+            if error_bounds:
+                properties["error_bounds"] = error_bounds
+            properties["samples"] = self.state.samples["rows"][name][:n_samples]
+            columns.append(properties)
+        summary["columns"] = columns
+        return summary
+
+    def update(self, new_rows: pl.DataFrame | pl.LazyFrame, n_samples: int = 3) -> dict:
         """
-        llm_client = llm(provider="openai")
+        Refresh the summary with rows appended to the dataset, reading only
+        `new_rows`. The first call builds the state of the existing data unless
+        one was given to the constructor.
+
+        Statistics come from the merged `state`: medians from a quantile sketch
+        and, past `CATEGORICAL_UNIQUE_LIMIT` values, distinct counts from
+        HyperLogLog, each with an entry in the column `error_bounds`.
+        """
+        new_schema = (
+            new_rows.collect_schema() if isinstance(new_rows, pl.LazyFrame) else new_rows.schema
+        )
+        if dict(new_schema) != dict(self.schema):
+            raise ValueError("New rows should have the same schema as the dataset.")
+
+        if self.state is None:
+            self.build_state()
+        with INSTRUMENTATION.span("summarizer.update") as span:
+            new_state = self._state_of(
+                new_rows, offset=self.state.n_rows, date_formats=self.state.date_formats
+            )
+            self.state = self.state.merge(new_state)
+            span.set(new_rows=new_state.n_rows, rows=self.state.n_rows)
+
+        if self.is_lazy:
+            self.data = pl.concat([self.data, new_rows.lazy()], how="vertical")
+        else:
+            new_rows = new_rows.collect() if isinstance(new_rows, pl.LazyFrame) else new_rows
+            self.data = pl.concat([self.data, new_rows], how="vertical", rechunk=False)
+        self.N_ROWS = self.state.n_rows
+
+        summary = self._state_summary(n_samples=n_samples)
+        self.summary = summary
+        return summary
+
+    def _llm_client(self, is_async: bool = False) -> BaseLLM:
+        if self.llm_client is not None:
+            return self.llm_client
+        return llm(provider="openai", is_async=is_async, cache=self.llm_cache)
+
+    def _enrich_messages(self, summary: dict) -> list:
         prompt = SUMMARIZER_USER_PROMPT.format(
             json.dumps(summary, default=datetime_serializer)
         )
-        messages = [
+        return [
             {"role": "system", "content": SUMMARIZER_ENRICH_SYSTEM_PROMPT},
             {"role": "user", "content": prompt},
         ]
 
-        gen_config = GenerationConfig(max_tokens=4028, temperature=0.2)
-        response: LLMResponse = llm_client.generate_text(
-            messages,
-            gen_config=gen_config,
-            # response_format=Summary,
-        )
+    def _enrich_batches(self, summary: dict) -> List[Tuple[list, Dict[str, int]]]:
+        """
+        One prompt per batch of columns fitting `ENRICH_BATCH_TOKENS`. A batch
+        is only compacted when it exceeds the budget, and loses its samples or
+        distributions only when it is a single column still too large. Every
+        prompt comes with its estimated token count before and after compaction.
+        """
+        with INSTRUMENTATION.span("summarizer.enrich.prompts") as span:
+            header = {key: value for key, value in summary.items() if key != "columns"}
+
+            batches = []
+            steps = []
+            for original in batch_columns(summary["columns"], self.ENRICH_BATCH_TOKENS):
+                compacted, batch_steps = compact_summary(
+                    {"columns": original}, self.ENRICH_BATCH_TOKENS, lossy=len(original) == 1
+                )
+                steps += [step for step in batch_steps if step not in steps]
+                messages = self._enrich_messages({**header, "columns": compacted["columns"]})
+                estimated_tokens = {
+                    "prompt_before_compaction": count_message_tokens(
+                        self._enrich_messages({**header, "columns": original})
+                    ),
+                    "prompt_after_compaction": count_message_tokens(messages),
+                }
+                batches.append((messages, estimated_tokens))
+            if steps:
+                logger.info(f"Compacted enrichment batches with: {', '.join(steps)}")
+            span.set(compaction_steps=steps)
+        return batches
+
+    @staticmethod
+    def _parse_enrichment(response: LLMResponse) -> dict:
         content = (response.text[0].content).strip()
         try:
-            content = json.loads(content)
+            return Enrichment.model_validate_json(content).model_dump()
         except Exception as e:
-            print(f"Failed to parse to json, returning string. : {e}")
-        content = Summary(**content)
-        return content
+            logger.warning(f"Failed to parse enrichment against its schema, skipping batch. : {e}")
+            return {}
 
-    def summarize(self, n_samples=3, enrich=False):
-        summary = copy.deepcopy(self.summary)
-        column_properties = self._column_properties(n_samples=n_samples)
+    def _enrich(self, summary: dict):
+        """
+        Enrich the summary with a dataset description and per column summaries.
 
-        if "columns" not in summary:
-            summary["columns"] = column_properties
-        else:
-            columns: list = summary["columns"]
-            columns.extend(column_properties)
-            summary["columns"] = columns
-        if enrich:
-            summary = self._enrich(summary)
+        Columns are sent in token budgeted batches as concurrent requests. The
+        LLM answers with only the summaries, under the strict `Enrichment`
+        schema, and they are merged back into the local summary. The responses,
+        with their estimated prompt tokens, are kept in `llm_responses`.
+
+        Todo:
+        - add feature to give custom input for enrich summary generator.
+        - Add Generation Config handler.
+        """
+        llm_client = self._llm_client()
+        gen_config = GenerationConfig(max_tokens=self.ENRICH_MAX_TOKENS, temperature=0.2)
+
+        with INSTRUMENTATION.span("summarizer.enrich") as span:
+            batches = self._enrich_batches(summary)
+            span.set(batches=len(batches))
+            # Worker threads do not inherit the current span.
+            parent = INSTRUMENTATION.current()
+
+            def enrich_batch(batch):
+                messages, estimated_tokens = batch
+                with INSTRUMENTATION.span("llm.generate_text", parent=parent, **estimated_tokens) as llm_span:
+                    response: LLMResponse = llm_client.generate_text(
+                        messages, gen_config=gen_config, response_format=Enrichment
+                    )
+                    llm_span.set(**usage_attributes(response.usage))
+                response.estimated_tokens = estimated_tokens
+                return response
+
+            with ThreadPoolExecutor(max_workers=self.ENRICH_MAX_WORKERS) as executor:
+                self.llm_responses = list(executor.map(enrich_batch, batches))
+            enrichments = [self._parse_enrichment(response) for response in self.llm_responses]
+            return Summary(**merge_enrichments(summary, enrichments))
+
+    async def _aenrich(self, summary: dict):
+        llm_client = self._llm_client(is_async=True)
+        gen_config = GenerationConfig(max_tokens=self.ENRICH_MAX_TOKENS, temperature=0.2)
+
+        async def enrich_batch(batch):
+            messages, estimated_tokens = batch
+            with INSTRUMENTATION.span("llm.generate_text", **estimated_tokens) as llm_span:
+                if inspect.iscoroutinefunction(llm_client.generate_text):
+                    response = await llm_client.generate_text(
+                        messages, gen_config=gen_config, response_format=Enrichment
+                    )
+                else:
+                    # A synchronous client must not block the event loop.
+                    response = await asyncio.to_thread(
+                        llm_client.generate_text,
+                        messages,
+                        gen_config=gen_config,
+                        response_format=Enrichment,
+                    )
+                llm_span.set(**usage_attributes(response.usage))
+            response.estimated_tokens = estimated_tokens
+            return response
+
+        with INSTRUMENTATION.span("summarizer.enrich") as span:
+            batches = self._enrich_batches(summary)
+            span.set(batches=len(batches))
+            self.llm_responses = await asyncio.gather(*(enrich_batch(batch) for batch in batches))
+            enrichments = [self._parse_enrichment(response) for response in self.llm_responses]
+            return Summary(**merge_enrichments(summary, enrichments))
+
+    def _finish_stream(self, summary: dict, responses: List[LLMResponse]) -> EnrichmentEvent:
+        self.llm_responses = responses
+        enrichments = [self._parse_enrichment(response) for response in responses]
+        return EnrichmentEvent(kind="summary", summary=Summary(**merge_enrichments(summary, enrichments)))
+
+    @staticmethod
+    def _keep_event(event: EnrichmentEvent, summary: dict, seen: set) -> bool:
+        """Only the first description of the batches, and none when the user gave one."""
+        if event.kind != "description":
+            return True
+        if summary.get("description") or "description" in seen:
+            return False
+        seen.add("description")
+        return True
+
+    def _stream_batch(self, batch, stream_text, parent, emit, stopped: threading.Event) -> LLMResponse | None:
+        """Stream one batch in a worker thread, None once `stopped` is set."""
+        messages, estimated_tokens = batch
+        stream = stream_text(messages)
+        try:
+            with INSTRUMENTATION.span("llm.stream_text", parent=parent, **estimated_tokens) as span:
+                batch_stream = _BatchStream(span, estimated_tokens, emit)
+                for item in stream:
+                    if stopped.is_set():
+                        return None
+                    batch_stream.add(item)
+                return batch_stream.result()
+        finally:
+            emit(None)
+            stream.close()
+
+    def _stream_enrich(self, summary: dict) -> Iterator[EnrichmentEvent]:
+        """
+        Stream the enrichment of every batch in worker threads, and yield each
+        column summary as soon as the incremental parser completes it.
+        """
+        llm_client = self._llm_client()
+        gen_config = GenerationConfig(max_tokens=self.ENRICH_MAX_TOKENS, temperature=0.2)
+        batches = self._enrich_batches(summary)
+        # Worker threads do not inherit the current span.
+        parent = INSTRUMENTATION.current()
+        events: queue.Queue = queue.Queue()
+        stopped = threading.Event()
+
+        def stream_text(messages):
+            return llm_client.stream_text(messages, gen_config=gen_config, response_format=Enrichment)
+
+        seen = set()
+        executor = ThreadPoolExecutor(max_workers=self.ENRICH_MAX_WORKERS)
+        try:
+            futures = [
+                executor.submit(self._stream_batch, batch, stream_text, parent, events.put, stopped)
+                for batch in batches
+            ]
+            finished = 0
+            while finished < len(futures):
+                event = events.get()
+                if event is None:
+                    finished += 1
+                elif self._keep_event(event, summary, seen):
+                    yield event
+            responses = [future.result() for future in futures]
+        finally:
+            # The caller may stop iterating early: batches not started are
+            # dropped and running streams close at their next chunk, without
+            # waiting for them.
+            stopped.set()
+            executor.shutdown(wait=False, cancel_futures=True)
+        yield self._finish_stream(summary, responses)
+
+    async def _astream_batch(self, batch, astream_text, emit) -> LLMResponse:
+        """Async counterpart of `_stream_batch`, stopped by cancelling its task."""
+        messages, estimated_tokens = batch
+        stream = astream_text(messages)
+        try:
+            with INSTRUMENTATION.span("llm.stream_text", **estimated_tokens) as span:
+                batch_stream = _BatchStream(span, estimated_tokens, emit)
+                async for item in stream:
+                    batch_stream.add(item)
+                return batch_stream.result()
+        finally:
+            emit(None)
+            await stream.aclose()
+
+    async def _astream_enrich(self, summary: dict) -> AsyncIterator[EnrichmentEvent]:
+        llm_client = self._llm_client(is_async=True)
+        gen_config = GenerationConfig(max_tokens=self.ENRICH_MAX_TOKENS, temperature=0.2)
+        events: asyncio.Queue = asyncio.Queue()
+
+        def astream_text(messages):
+            return llm_client.astream_text(messages, gen_config=gen_config, response_format=Enrichment)
+
+        tasks = [
+            asyncio.create_task(self._astream_batch(batch, astream_text, events.put_nowait))
+            for batch in self._enrich_batches(summary)
+        ]
+        try:
+            seen = set()
+            finished = 0
+            while finished < len(tasks):
+                event = await events.get()
+                if event is None:
+                    finished += 1
+                elif self._keep_event(event, summary, seen):
+                    yield event
+            responses = await asyncio.gather(*tasks)
+        finally:
+            # The caller may stop iterating early.
+            for task in tasks:
+                task.cancel()
+        yield self._finish_stream(summary, responses)
+
+    def _local_summary(self, n_samples=3, approximate=False) -> dict:
+        # A fresh summary on every run, so repeated calls never share state.
+        summary = self._new_summary(self.filename)
+        summary["columns"] = self._column_properties(
+            n_samples=n_samples, approximate=approximate
+        )
+        if self.RELATIONSHIPS_TOP_K:
+            summary["relationships"] = self._relationships(summary["columns"])
+        return summary
+
+    def summarize(self, n_samples=3, enrich=False, approximate=False):
+        """
+        Profile every column and optionally enrich the summary with an LLM.
+
+        With `approximate=True` distinct counts use HyperLogLog, and medians and
+        category lists are read from a uniform sample of `APPROXIMATE_SAMPLE_SIZE`
+        rows. Each approximated value gets an entry in the column `error_bounds`.
+        """
+        with INSTRUMENTATION.span(
+            "summarizer.summarize", rows=self.N_ROWS, columns=self.N_COLUMNS, lazy=self.is_lazy
+        ) as span:
+            if span.recording and not self.is_lazy:
+                span.set(estimated_size_mb=self.data.estimated_size("mb"))
+            summary = self._local_summary(n_samples=n_samples, approximate=approximate)
+            if enrich:
+                summary = self._enrich(summary)
+
+        self.summary = summary
+        return summary
+
+    def stream_summarize(self, n_samples=3, approximate=False) -> Iterator[EnrichmentEvent]:
+        """
+        Profile the dataset, then enrich it from streamed completions. The
+        dataset description and every column summary are yielded as soon as
+        the model has written them, the last event holds the merged `Summary`,
+        also kept in `summary`.
+
+            for event in summarizer.stream_summarize():
+                if event.kind == "column":
+                    print(event.column, event.text)
+        """
+        summary = self._local_summary(n_samples=n_samples, approximate=approximate)
+        for event in self._stream_enrich(summary):
+            if event.kind == "summary":
+                self.summary = event.summary
+            yield event
+
+    async def astream_summarize(
+        self, n_samples=3, approximate=False
+    ) -> AsyncIterator[EnrichmentEvent]:
+        """Async iterator version of `stream_summarize`."""
+        summary = await asyncio.to_thread(
+            self._local_summary, n_samples=n_samples, approximate=approximate
+        )
+        async for event in self._astream_enrich(summary):
+            if event.kind == "summary":
+                self.summary = event.summary
+            yield event
+
+    async def asummarize(self, n_samples=3, enrich=False, approximate=False):
+        """
+        Coroutine version of `summarize`. Profiling runs in a worker thread and
+        enrichment awaits an async LLM client, so the event loop is never blocked.
+        """
+        with INSTRUMENTATION.span(
+            "summarizer.summarize", rows=self.N_ROWS, columns=self.N_COLUMNS, lazy=self.is_lazy
+        ):
+            # `to_thread` carries the current span over to the worker thread.
+            summary = await asyncio.to_thread(
+                self._local_summary, n_samples=n_samples, approximate=approximate
+            )
+            if enrich:
+                summary = await self._aenrich(summary)
 
         self.summary = summary
         return summary
@@ -0,0 +1,133 @@
+"""
+Distributions of columns: the most frequent values of string columns and
+equal width histograms of numeric and temporal ones. Top values join the
+profiling `select`, histograms of all columns take a second one once the
+bounds are known. Both are rebuilt from the sketches of a `SummaryState`,
+so full and updated summaries agree within the error bounds of the latter.
+"""
+
+import bisect
+import math
+from typing import Any, Dict, List
+
+import polars as pl
+
+from .state import COUNT_FIELD
+from .summarizer import column_family
+
+# Families getting `top_values` and the ones getting a `histogram`
+TOP_VALUE_FAMILIES = ["string", "categorical"]
+HISTOGRAM_FAMILIES = ["numeric", "temporal"]
+
+
+def top_values_expr(col: pl.Expr, limit: int) -> pl.Expr:
+    """The `limit` most frequent non null values with their counts, ties in value order."""
+    counts = col.drop_nulls().value_counts(name=COUNT_FIELD).implode()
+    # Sorted within the list, the streaming engine does not keep the order of a `sort_by`.
+    row = pl.element()
+    return counts.list.eval(
+        row.sort_by(row.struct[1], row.struct[0].cast(pl.String), descending=[True, False])
+    ).list.head(limit)
+
+
+def distribution_stats(top_values_limit: int) -> Dict[str, dict]:
+    """Statistics to add per family to `profile_expressions`, none for a zero limit."""
+    if not top_values_limit:
+        return {}
+    return {
+        family: {"top_values": lambda col: top_values_expr(col, top_values_limit)}
+        for family in TOP_VALUE_FAMILIES
+    }
+
+
+def physical_value(value: Any, dtype: pl.DataType) -> float:
+    if column_family(dtype) == "temporal":
+        value = pl.Series([value], dtype=dtype).to_physical().item()
+    return float(value)
+
+
+def histogram_edges(minimum: Any, maximum: Any, dtype: pl.DataType, bins: int) -> List[float] | None:
+    """
+    Edges of `bins` equal width bins from the column minimum to its maximum,
+    as physical values. A constant column has a single bin, a column without
+    finite bounds none.
+    """
+    if minimum is None or maximum is None:
+        return None
+    low, high = physical_value(minimum, dtype), physical_value(maximum, dtype)
+    if not (math.isfinite(low) and math.isfinite(high)):
+        return None
+    if not high > low:
+        return [low, high]
+    return [low + (high - low) * i / bins for i in range(bins)] + [high]
+
+
+def physical_expr(col: pl.Expr, dtype: pl.DataType) -> pl.Expr:
+    """A column on the scale of `physical_value`, so its values fall within the edges."""
+    if column_family(dtype) == "temporal":
+        return col.to_physical()
+    # Decimals are physically scaled integers, their float value is meant.
+    return col.cast(pl.Float64)
+
+
+def histogram_expr(col: pl.Expr, edges: List[float]) -> pl.Expr:
+    """
+    Counts per bin of a column given by `physical_expr`. Bins are closed on
+    the right, the first one on both sides.
+    """
+    return col.hist(bins=edges, include_breakpoint=False).implode()
+
+
+def histogram_counts(values: List[float], weights: List[float], edges: List[float]) -> List[float]:
+    """Counts per bin of weighted values, binned like `histogram_expr`."""
+    counts = [0.0] * (len(edges) - 1)
+    for value, weight in zip(values, weights):
+        if edges[0] <= value <= edges[-1]:
+            counts[bisect.bisect_left(edges, value, 1, len(edges) - 1) - 1] += weight
+    return counts
+
+
+def histogram(edges: List[float], counts: List[float], dtype: pl.DataType) -> dict:
+    """The `histogram` property of a column: edges in the column's type and counts."""
+    if column_family(dtype) == "temporal":
+        edges = pl.Series(edges).round().cast(pl.Int64).cast(dtype).to_list()
+    return {"edges": edges, "counts": [round(count) for count in counts]}
+
+
+def distribution_properties(dtype: pl.DataType, stats: dict) -> dict:
+    """`top_values` and `histogram` properties of a column summary."""
+    properties = {}
+    if stats.get("top_values"):
+        properties["top_values"] = [
+            dict(zip(["value", "count"], row.values())) for row in stats["top_values"]
+        ]
+    if stats.get("histogram"):
+        properties["histogram"] = histogram(*stats["histogram"], dtype)
+    return properties
+
+
+def state_distribution_stats(
+    dtype: pl.DataType, state: dict, top_values_limit: int, histogram_bins: int
+) -> dict:
+    """
+    `top_values` and `histogram` statistics rebuilt from a column state. Top
+    values are exact while its category counts are kept, and come from its
+    heavy hitters sketch past that, undercounted by at most its `error`.
+    Histograms bin the points of its quantile sketch.
+    """
+    family = column_family(dtype)
+    stats = {}
+    counts = state.get("counts")
+    if counts is None and "heavy_hitters" in state:
+        counts = state["heavy_hitters"]["counts"]
+    if top_values_limit and family in TOP_VALUE_FAMILIES and counts is not None:
+        ranked = sorted(counts.items(), key=lambda item: (-item[1], str(item[0])))
+        stats["top_values"] = [
+            {"value": value, COUNT_FIELD: count} for value, count in ranked[:top_values_limit]
+        ]
+    if histogram_bins and family in HISTOGRAM_FAMILIES and "quantiles" in state:
+        edges = histogram_edges(state["min"], state["max"], dtype, histogram_bins)
+        if edges is not None:
+            sketch = state["quantiles"]
+            stats["histogram"] = (edges, histogram_counts(sketch["values"], sketch["weights"], edges))
+    return stats
@@ -0,0 +1,134 @@
+import json
+import logging
+from typing import Any, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Events of `IncrementalJSONParser.feed`: a finished value of a top level key,
+# or a finished item of a top level array.
+FIELD = "field"
+ITEM = "item"
+
+
+class IncrementalJSONParser:
+    """
+    Parses a JSON object while it is being generated, one chunk at a time.
+
+    Every top level value is reported once complete as `("field", key, value)`,
+    and every item of a top level array as soon as it is complete as
+    `("item", key, value)`, before the array itself is. Text before the
+    opening brace, such as a markdown fence, and after the closing one is
+    ignored. Fragments that fail to parse are skipped, the complete text
+    should still be parsed once the stream ends.
+    """
+
+    def __init__(self):
+        self.text: str = ""
+        self.done: bool = False
+        self._pos = 0
+        self._stack: List[str] = []
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        # Reading a key or a value of the top level object
+        self._expect_key = True
+        self._key: str | None = None
+        self._value_start: int | None = None
+        self._item_start: int | None = None
+
+    def _in_top_array(self) -> bool:
+        return len(self._stack) == 2 and self._stack[1] == "["
+
+    def _load(self, start: int, end: int) -> Tuple[bool, Any]:
+        fragment = self.text[start:end]
+        try:
+            return True, json.loads(fragment)
+        except json.JSONDecodeError as e:
+            logger.debug(f"Skipping unparsable fragment {fragment[:50]!r} : {e}")
+            return False, None
+
+    def _emit(self, events: list, kind: str, start: int, end: int) -> None:
+        ok, value = self._load(start, end)
+        if ok:
+            events.append((kind, self._key, value))
+
+    def _end_value(self, events: list, end: int) -> None:
+        """Close the pending top level value or array item ending at `end`."""
+        depth = len(self._stack)
+        if depth == 2 and self._in_top_array() and self._item_start is not None:
+            self._emit(events, ITEM, self._item_start, end)
+            self._item_start = None
+        elif depth == 1 and self._value_start is not None:
+            self._emit(events, FIELD, self._value_start, end)
+            self._value_start = None
+
+    def _start_value(self, pos: int) -> None:
+        depth = len(self._stack)
+        if depth == 1 and not self._expect_key and self._value_start is None:
+            self._value_start = pos
+        elif depth == 2 and self._in_top_array() and self._item_start is None:
+            self._item_start = pos
+
+    def _string_char(self, events: list, pos: int, char: str) -> None:
+        """A character inside a string, its closing quote ends a key or a value."""
+        if self._escape:
+            self._escape = False
+        elif char == "\\":
+            self._escape = True
+        elif char == '"':
+            self._in_string = False
+            if len(self._stack) == 1 and self._expect_key:
+                _, self._key = self._load(self._string_start, pos + 1)
+            else:
+                self._end_value(events, pos + 1)
+
+    def _open_string(self, pos: int) -> None:
+        self._in_string = True
+        self._string_start = pos
+        if not (len(self._stack) == 1 and self._expect_key):
+            self._start_value(pos)
+
+    def _close_container(self, events: list, pos: int) -> None:
+        # A number, boolean or null runs until its container closes.
+        if (self._value_start or self._item_start) is not None:
+            self._end_value(events, pos)
+        self._stack.pop()
+        if self._stack:
+            self._end_value(events, pos + 1)
+        else:
+            self.done = True
+
+    def _separator(self, events: list, pos: int, char: str) -> None:
+        """A comma ends the pending value. At the top level a key follows a comma, a value a colon."""
+        if char == ",":
+            self._end_value(events, pos)
+        if len(self._stack) == 1:
+            self._expect_key = char == ","
+
+    def _step(self, events: list, pos: int, char: str) -> None:
+        if self._in_string:
+            self._string_char(events, pos, char)
+        elif not self._stack:
+            if char == "{":
+                self._stack.append(char)
+        elif char == '"':
+            self._open_string(pos)
+        elif char in "{[":
+            self._start_value(pos)
+            self._stack.append(char)
+        elif char in "}]":
+            self._close_container(events, pos)
+        elif char in ",:":
+            self._separator(events, pos, char)
+        elif not char.isspace():
+            self._start_value(pos)
+
+    def feed(self, chunk: str) -> List[Tuple[str, str, Any]]:
+        """Add the next chunk of text, returns the values it completed."""
+        self.text += chunk
+        events = []
+        while self._pos < len(self.text) and not self.done:
+            pos = self._pos
+            self._pos += 1
+            self._step(events, pos, self.text[pos])
+        return events
@@ -1,23 +1,140 @@
+import glob
+import logging
 import os
+from typing import List, Tuple
 
 import polars as pl
 
 from mindscope.components.core import LoaderDict, FileReadError
+from .parquet import read_parquet_statistics
 
+logger = logging.getLogger(__name__)
 
-def get_dataframe_from_filepath(filepath: str, encoding: str = "utf-8"):
-    if not os.path.exists(filepath):
+# Formats with a polars scanner, they can be read lazily, from globs and
+# from (hive partitioned) directories.
+SCAN_EXTENSIONS = ["csv", "parquet", "ipc", "arrow", "feather", "ndjson", "jsonl"]
+# Formats whose scanner understands `key=value` partition directories.
+HIVE_EXTENSIONS = ["parquet", "ipc", "arrow", "feather"]
+# Other extensions of the formats `get_dataframe_from_filepath` reads.
+EXTENSION_ALIASES = {"xls": "xlsx", "arrow": "ipc", "feather": "ipc", "jsonl": "ndjson"}
+# Every extension `get_dataframe_from_filepath` reads.
+READ_EXTENSIONS = ["csv", "xlsx", "parquet", "ipc", "json", "ndjson", *EXTENSION_ALIASES]
+
+
+def _directory_extension(directory: str) -> str:
+    """Extension of the first data file found below `directory`."""
+    for root, _, files in sorted(os.walk(directory)):
+        for name in sorted(files):
+            extn = name.split(".")[-1].lower()
+            if extn in SCAN_EXTENSIONS:
+                return extn
+    raise FileNotFoundError(f"No readable file found in directory {directory}.")
+
+
+def _resolve_source(filepath: str) -> Tuple[str, str, bool | None, bool]:
+    """
+    The source to read for `filepath`, its format, the hive partitioning
+    option and whether it has to be scanned: globs and directories are.
+    """
+    is_glob = glob.has_magic(filepath)
+    is_directory = os.path.isdir(filepath)
+    if is_glob:
+        if not glob.glob(filepath, recursive=True):
+            raise FileNotFoundError("No file matches given pattern..")
+    elif not os.path.exists(filepath):
         raise FileNotFoundError("Given file not found..")
 
-    extn = filepath.split(".")[-1]
-    mapping: LoaderDict = {
-        "csv": lambda: pl.read_csv(filepath, encoding=encoding),
-        "xlsx": lambda: pl.read_excel(filepath, encoding=encoding),
-        "xls": lambda: pl.read_excel(filepath, encoding=encoding),
-        "parquet": lambda: pl.read_parquet(filepath),
-        "json": lambda: pl.read_json(filepath, orient="records", encoding=encoding),
+    extn = _directory_extension(filepath) if is_directory else filepath.split(".")[-1].lower()
+    source = filepath
+    if is_directory and extn not in HIVE_EXTENSIONS:
+        source = os.path.join(filepath, "**", f"*.{extn}")
+    hive_partitioning = True if is_directory else None
+    return source, EXTENSION_ALIASES.get(extn, extn), hive_partitioning, is_glob or is_directory
+
+
+def _scan_loaders(
+    source: str, n_rows: int | None, hive_partitioning: bool | None, text_options: dict
+) -> LoaderDict:
+    # Scanners only read utf8 encoded text.
+    return {
+        "csv": lambda: pl.scan_csv(source, n_rows=n_rows, **text_options),
+        "parquet": lambda: pl.scan_parquet(
+            source, n_rows=n_rows, hive_partitioning=hive_partitioning
+        ),
+        "ipc": lambda: pl.scan_ipc(
+            source, n_rows=n_rows, memory_map=True, hive_partitioning=hive_partitioning
+        ),
+        "ndjson": lambda: pl.scan_ndjson(source, n_rows=n_rows, **text_options),
     }
 
+
+def _read_loaders(
+    source: str, encoding: str, columns: List[str] | None, n_rows: int | None, text_options: dict
+) -> LoaderDict:
+    return {
+        "csv": lambda: pl.read_csv(
+            source, encoding=encoding, columns=columns, n_rows=n_rows, **text_options
+        ),
+        "xlsx": lambda: pl.read_excel(source, columns=columns, **text_options),
+        "parquet": lambda: pl.read_parquet(source, columns=columns, n_rows=n_rows),
+        "ipc": lambda: pl.read_ipc(source, columns=columns, n_rows=n_rows, memory_map=True),
+        "json": lambda: pl.read_json(source, **text_options),
+        "ndjson": lambda: pl.read_ndjson(source, n_rows=n_rows, **text_options),
+    }
+
+
+def _apply_options(
+    df: pl.DataFrame | pl.LazyFrame,
+    extn: str,
+    columns: List[str] | None,
+    n_rows: int | None,
+    schema_overrides: dict | None,
+) -> pl.DataFrame | pl.LazyFrame:
+    """Options the loader of `extn` may not have applied itself."""
+    if columns is not None:
+        # A no-op for readers that already projected, a pushdown for scans.
+        df = df.select(columns)
+    if n_rows is not None:
+        df = df.head(n_rows)
+    if schema_overrides and extn in ["parquet", "ipc"]:
+        # Binary formats carry their schema, overrides are casts.
+        schema = df.collect_schema()
+        df = df.cast(
+            {name: dtype for name, dtype in schema_overrides.items() if name in schema}
+        )
+    return df
+
+
+def get_dataframe_from_filepath(
+    filepath: str,
+    encoding: str = "utf-8",
+    lazy: bool = False,
+    columns: List[str] | None = None,
+    n_rows: int | None = None,
+    schema_overrides: dict | None = None,
+    infer_schema_length: int | None = 100,
+):
+    """
+    Load a file into a polars DataFrame.
+
+    With `lazy=True` the file is scanned instead and a LazyFrame is returned,
+    so files larger than memory can be profiled on the streaming engine.
+
+    `filepath` may also be a glob pattern or a directory, e.g. a hive
+    partitioned dataset (`year=2024/month=01/...`). Both are always scanned.
+
+    `columns` and `n_rows` are pushed down to the reader, so only the selected
+    columns and rows are read from disk. `schema_overrides` sets the dtype of
+    some columns and `infer_schema_length` the rows used to infer the others,
+    for text formats. Arrow IPC (Feather) files are memory mapped.
+    """
+    source, extn, hive_partitioning, scan = _resolve_source(filepath)
+    text_options = {"schema_overrides": schema_overrides, "infer_schema_length": infer_schema_length}
+    if lazy or scan:
+        mapping = _scan_loaders(source, n_rows, hive_partitioning, text_options)
+    else:
+        mapping = _read_loaders(source, encoding, columns, n_rows, text_options)
+
     if extn not in mapping:
         raise KeyError(
             f"Given extension {extn} not in mapping \
@@ -25,12 +142,53 @@ def get_dataframe_from_filepath(filepath: str, encoding: str = "utf-8"):
         )
 
     try:
-        df: pl.DataFrame = mapping[extn]()
+        df = _apply_options(mapping[extn](), extn, columns, n_rows, schema_overrides)
+        if isinstance(df, pl.LazyFrame) and not lazy:
+            df = df.collect()
+
+        if lazy:
+            # Surface unreadable files here rather than on the first collect.
+            is_empty = df.head(1).collect().is_empty()
+        else:
+            is_empty = df.is_empty()
     except Exception as e:
         message = f"Not able to read file : {e.__class__} : {e}"
         raise FileReadError(message)
 
-    if df.is_empty():
-        raise pl.errors.EmptyDataError("File loaded but no data found.")
+    if is_empty:
+        raise pl.exceptions.NoDataError("File loaded but no data found.")
 
     return df
+
+
+def has_file_statistics(filepath: str, n_rows: int | None = None) -> bool:
+    """
+    Whether the footer of `filepath` describes the data it loads: a single
+    parquet file read whole.
+    """
+    return (
+        n_rows is None
+        and filepath.lower().endswith(".parquet")
+        and os.path.isfile(filepath)
+        and not glob.has_magic(filepath)
+    )
+
+
+def get_file_statistics(
+    filepath: str, n_rows: int | None = None, schema_overrides: dict | None = None
+) -> dict | None:
+    """
+    Statistics of the parquet file at `filepath` read from its footer, see
+    `read_parquet_statistics`, or None when the file does not have usable
+    ones. Columns cast by `schema_overrides` are left out.
+    """
+    if not has_file_statistics(filepath, n_rows):
+        return None
+    try:
+        statistics = read_parquet_statistics(filepath)
+    except Exception as e:
+        logger.warning(f"Not able to read statistics of {filepath} : {e.__class__} : {e}")
+        return None
+    for name in schema_overrides or {}:
+        statistics["columns"].pop(name, None)
+    return statistics
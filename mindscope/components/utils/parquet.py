@@ -0,0 +1,257 @@
+"""
+Statistics of a parquet file read from its footer, without reading any page.
+
+The footer is a Thrift (compact protocol) `FileMetaData` holding the row count
+and, per row group and column, optional min, max and null counts. Only the
+handful of fields used here are decoded, the others are skipped.
+"""
+
+import logging
+import os
+import struct
+from typing import Any, Dict, List
+
+import polars as pl
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"PAR1"
+
+# Thrift compact protocol types
+_STOP, _TRUE, _FALSE, _BYTE, _I16, _I32, _I64, _DOUBLE = range(8)
+_BINARY, _LIST, _SET, _MAP, _STRUCT = range(8, 13)
+
+# Parquet physical types
+_INT32, _INT64, _FLOAT, _DOUBLE_TYPE = 1, 2, 4, 5
+
+# Field ids of the parquet.thrift structures
+_FILE_SCHEMA, _FILE_NUM_ROWS, _FILE_ROW_GROUPS = 2, 3, 4
+_SCHEMA_TYPE, _SCHEMA_NAME, _SCHEMA_NUM_CHILDREN = 1, 4, 5
+_ROW_GROUP_COLUMNS, _ROW_GROUP_NUM_ROWS = 1, 3
+_CHUNK_META_DATA = 3
+_META_PATH, _META_STATISTICS = 3, 12
+_STATS_MAX, _STATS_MIN, _STATS_NULL_COUNT, _STATS_MAX_VALUE, _STATS_MIN_VALUE = 1, 2, 3, 5, 6
+
+# Statistics answered from the footer
+METADATA_STATS = ["min", "max", "null_count", "not_null_count"]
+
+
+class _CompactReader:
+    """Decodes Thrift compact protocol structs into `{field_id: value}` dicts."""
+
+    def __init__(self, buffer: bytes):
+        self.buffer = buffer
+        self.pos = 0
+
+    def _byte(self) -> int:
+        value = self.buffer[self.pos]
+        self.pos += 1
+        return value
+
+    def _varint(self) -> int:
+        shift = result = 0
+        while True:
+            byte = self._byte()
+            result |= (byte & 0x7F) << shift
+            if not byte & 0x80:
+                return result
+            shift += 7
+
+    def _zigzag(self) -> int:
+        value = self._varint()
+        return (value >> 1) ^ -(value & 1)
+
+    def _binary(self) -> bytes:
+        size = self._varint()
+        value = self.buffer[self.pos : self.pos + size]
+        self.pos += size
+        return value
+
+    def _value(self, kind: int) -> Any:
+        if kind in (_TRUE, _FALSE):
+            return kind == _TRUE
+        if kind == _BYTE:
+            return self._byte()
+        if kind in (_I16, _I32, _I64):
+            return self._zigzag()
+        if kind == _DOUBLE:
+            value = struct.unpack_from("<d", self.buffer, self.pos)[0]
+            self.pos += 8
+            return value
+        if kind == _BINARY:
+            return self._binary()
+        if kind in (_LIST, _SET):
+            return self._list()
+        if kind == _MAP:
+            return self._map()
+        if kind == _STRUCT:
+            return self.read_struct()
+        raise ValueError(f"Unknown thrift compact type {kind}.")
+
+    def _list(self) -> list:
+        header = self._byte()
+        size, kind = header >> 4, header & 0x0F
+        if size == 15:
+            size = self._varint()
+        if kind in (_TRUE, _FALSE):
+            # Booleans of a list take one byte each.
+            return [self._byte() == _TRUE for _ in range(size)]
+        return [self._value(kind) for _ in range(size)]
+
+    def _map(self) -> dict:
+        size = self._varint()
+        if not size:
+            return {}
+        kinds = self._byte()
+        return {self._value(kinds >> 4): self._value(kinds & 0x0F) for _ in range(size)}
+
+    def read_struct(self) -> Dict[int, Any]:
+        fields = {}
+        field_id = 0
+        while True:
+            header = self._byte()
+            kind = header & 0x0F
+            if kind == _STOP:
+                return fields
+            delta = header >> 4
+            field_id = field_id + delta if delta else self._zigzag()
+            fields[field_id] = self._value(kind)
+
+
+def read_footer(path: str) -> Dict[int, Any]:
+    """The raw `FileMetaData` of a parquet file, reading only its footer."""
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        size = f.tell()
+        if size < 12:
+            raise ValueError(f"{path} is too small to be a parquet file.")
+        f.seek(size - 8)
+        tail = f.read(8)
+        if tail[4:] != MAGIC:
+            raise ValueError(f"{path} is not a parquet file.")
+        length = struct.unpack("<i", tail[:4])[0]
+        f.seek(size - 8 - length)
+        return _CompactReader(f.read(length)).read_struct()
+
+
+def _decode(raw: bytes, physical_type: int, dtype: pl.DataType) -> Any:
+    """A min or max of the footer as a value of the polars `dtype`."""
+    if physical_type in (_INT32, _INT64):
+        size = 4 if physical_type == _INT32 else 8
+        value = int.from_bytes(raw[:size], "little", signed=not dtype.is_unsigned_integer())
+        if dtype.is_integer():
+            return value
+        # Dates, datetimes and durations are stored as their physical integer.
+        return pl.Series([value], dtype=pl.Int64).cast(dtype).item()
+    if physical_type == _FLOAT:
+        return struct.unpack("<f", raw[:4])[0]
+    if physical_type == _DOUBLE_TYPE:
+        return struct.unpack("<d", raw[:8])[0]
+    raise ValueError(f"Unsupported physical type {physical_type}.")
+
+
+def _has_footer_min_max(dtype: pl.DataType) -> bool:
+    """Whether the footer min and max of a column are the ones polars computes."""
+    if dtype.is_integer() or dtype in (pl.Float32, pl.Float64, pl.Date):
+        return True
+    # Other temporal types with a time zone compare by their UTC instant anyway.
+    return isinstance(dtype, (pl.Datetime, pl.Duration))
+
+
+def _column_statistics(
+    chunks: List[dict], physical_type: int, dtype: pl.DataType, n_rows: int
+) -> dict:
+    """Statistics of one column over its row groups, leaving out those some row group lacks."""
+    null_counts = [chunk["stats"].get(_STATS_NULL_COUNT) for chunk in chunks]
+    stats = {}
+    if all(count is not None for count in null_counts):
+        stats["null_count"] = sum(null_counts)
+        stats["not_null_count"] = n_rows - stats["null_count"]
+    if physical_type not in (_INT32, _INT64, _FLOAT, _DOUBLE_TYPE) or not _has_footer_min_max(dtype):
+        return stats
+
+    minimums, maximums = [], []
+    for chunk, null_count in zip(chunks, null_counts):
+        if null_count is not None and null_count == chunk["num_rows"]:
+            continue  # An all null row group has no min or max.
+        # Readers only trust the legacy fields for signed orders.
+        legacy = not dtype.is_unsigned_integer()
+        minimum = chunk["stats"].get(_STATS_MIN_VALUE, chunk["stats"].get(_STATS_MIN) if legacy else None)
+        maximum = chunk["stats"].get(_STATS_MAX_VALUE, chunk["stats"].get(_STATS_MAX) if legacy else None)
+        if minimum is None or maximum is None:
+            return stats
+        minimums.append(_decode(minimum, physical_type, dtype))
+        maximums.append(_decode(maximum, physical_type, dtype))
+    if dtype.is_float() and any(value != value for value in minimums + maximums):
+        return stats  # NaN bounds do not tell the min and max polars reports.
+    stats["min"] = min(minimums) if minimums else None
+    stats["max"] = max(maximums) if maximums else None
+    return stats
+
+
+def _leaf_physical_types(footer: Dict[int, Any]) -> Dict[str, int]:
+    """Physical type of the top level leaf columns, nested columns are left out."""
+    physical_types = {}
+    # The root element comes first.
+    elements = footer.get(_FILE_SCHEMA, [])[1:]
+    index = 0
+    while index < len(elements):
+        element = elements[index]
+        name = element[_SCHEMA_NAME].decode()
+        if element.get(_SCHEMA_NUM_CHILDREN):
+            # Skip the whole group of a nested column.
+            remaining = element[_SCHEMA_NUM_CHILDREN]
+            while remaining:
+                index += 1
+                remaining += elements[index].get(_SCHEMA_NUM_CHILDREN, 0) - 1
+        else:
+            physical_types[name] = element.get(_SCHEMA_TYPE)
+        index += 1
+    return physical_types
+
+
+def _column_chunks(footer: Dict[int, Any], names: Dict[str, int]) -> Dict[str, List[dict]]:
+    """Row count and statistics of each row group of the `names` columns."""
+    chunks: Dict[str, List[dict]] = {name: [] for name in names}
+    for row_group in footer.get(_FILE_ROW_GROUPS, []):
+        for chunk in row_group.get(_ROW_GROUP_COLUMNS, []):
+            meta = chunk.get(_CHUNK_META_DATA, {})
+            path_in_schema = [part.decode() for part in meta.get(_META_PATH, [])]
+            if len(path_in_schema) == 1 and path_in_schema[0] in chunks:
+                chunks[path_in_schema[0]].append(
+                    {
+                        "num_rows": row_group.get(_ROW_GROUP_NUM_ROWS),
+                        "stats": meta.get(_META_STATISTICS, {}),
+                    }
+                )
+    return chunks
+
+
+def read_parquet_statistics(
+    path: str, schema: pl.Schema | None = None
+) -> Dict[str, dict]:
+    """
+    Row count and, per top level column, `min`, `max`, `null_count` and
+    `not_null_count` from the footer of the parquet file at `path`.
+
+    A statistic is left out of a column when a row group does not record it,
+    it then has to be computed from the data. `schema` is the polars schema
+    of the file, read from the footer when not given. Nested columns, strings,
+    booleans and decimals only get null counts.
+    """
+    schema = schema if schema is not None else pl.read_parquet_schema(path)
+    footer = read_footer(path)
+    n_rows = footer.get(_FILE_NUM_ROWS, 0)
+
+    physical_types = _leaf_physical_types(footer)
+    chunks = _column_chunks(footer, physical_types)
+
+    columns = {}
+    for name, dtype in schema.items():
+        if name not in physical_types:
+            continue
+        try:
+            columns[name] = _column_statistics(chunks[name], physical_types[name], dtype, n_rows)
+        except Exception as e:
+            logger.debug(f"Ignoring footer statistics of {name} : {e.__class__} : {e}")
+    return {"n_rows": n_rows, "columns": columns}
@@ -0,0 +1,234 @@
+"""
+Relationships between columns: Pearson and Spearman correlations of numeric
+columns and Cramér's V of low cardinality categorical ones.
+
+Every measure of a block of columns against another comes from a few matrix
+products, so no Python loop runs over pairs. Blocks bound the memory to a
+few row x block matrices, and only the strongest pairs of each block are kept.
+"""
+
+import heapq
+from typing import Dict, List, Tuple
+
+import numpy as np
+import polars as pl
+
+# Numeric columns per block, and categories of categorical columns per block.
+# A block takes about rows x size x 8 bytes, or 4 for categories.
+RELATIONSHIP_BLOCK_COLUMNS = 128
+RELATIONSHIP_BLOCK_CATEGORIES = 512
+
+# Fewer rows observed together leave a pair out.
+MIN_PAIR_ROWS = 3
+
+Pairs = List[Tuple[float, int, dict]]
+
+
+def _blocks(sizes: List[int], block_size: int) -> List[List[int]]:
+    """Consecutive positions whose sizes add up to at most `block_size`, at least one each."""
+    blocks, block, total = [], [], 0
+    for position, size in enumerate(sizes):
+        if block and total + size > block_size:
+            blocks.append(block)
+            block, total = [], 0
+        block.append(position)
+        total += size
+    if block:
+        blocks.append(block)
+    return blocks
+
+
+def _keep_strongest(pairs: Pairs, candidates: Pairs, top_k: int) -> Pairs:
+    return heapq.nlargest(top_k, pairs + candidates, key=lambda pair: pair[:2])
+
+
+def _block_candidates(
+    strength: np.ndarray, same_block: bool, top_k: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Row and column indices of the `top_k` strongest finite pairs of a block."""
+    strength = np.where(np.isfinite(strength), strength, -np.inf)
+    if same_block:
+        # A block against itself: each pair once, never a column with itself.
+        strength = np.where(np.triu(np.ones(strength.shape, dtype=bool), k=1), strength, -np.inf)
+    flat = strength.ravel()
+    k = min(top_k, flat.size)
+    if not k:
+        return np.empty(0, dtype=int), np.empty(0, dtype=int)
+    best = np.argpartition(flat, flat.size - k)[flat.size - k :]
+    best = best[np.isfinite(flat[best])]
+    return np.unravel_index(best, strength.shape)
+
+
+def _centered(block: pl.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+    """Columns centered on their mean with missing values as 0, and the 0/1 mask of present ones."""
+    array = block.to_numpy().astype(np.float64)
+    mask = ~np.isnan(array)
+    array = np.where(mask, array, 0.0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean = array.sum(axis=0) / mask.sum(axis=0)
+    # Centering keeps the sums of squares away from cancellation.
+    return np.where(mask, array - np.nan_to_num(mean), 0.0), mask.astype(np.float64)
+
+
+def _pearson(a: Tuple[np.ndarray, np.ndarray], b: Tuple[np.ndarray, np.ndarray]) -> np.ndarray:
+    """Pearson correlation of every column of `a` with every column of `b`, over rows where both are present."""
+    (xa, ma), (xb, mb) = a, b
+    if ma.all() and mb.all():
+        # No missing value: the centered columns give it in one product.
+        with np.errstate(divide="ignore", invalid="ignore"):
+            r = (xa.T @ xb) / np.sqrt(np.outer((xa * xa).sum(axis=0), (xb * xb).sum(axis=0)))
+        valid = np.outer(np.ptp(xa, axis=0) > 0, np.ptp(xb, axis=0) > 0) & (len(xa) >= MIN_PAIR_ROWS)
+        return np.where(valid, np.clip(r, -1.0, 1.0), np.nan)
+    n = ma.T @ mb
+    sum_a, sum_b = xa.T @ mb, ma.T @ xb
+    squares_a, squares_b = (xa * xa).T @ mb, ma.T @ (xb * xb)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cov = xa.T @ xb - sum_a * sum_b / n
+        var_a = squares_a - sum_a * sum_a / n
+        var_b = squares_b - sum_b * sum_b / n
+        r = cov / np.sqrt(var_a * var_b)
+    # Relative to the sums of squares, a constant column has no variance left.
+    valid = (n >= MIN_PAIR_ROWS) & (var_a > 1e-9 * squares_a) & (var_b > 1e-9 * squares_b)
+    return np.where(valid, np.clip(r, -1.0, 1.0), np.nan)
+
+
+def numeric_correlations(frame: pl.DataFrame, names: List[str], top_k: int) -> Pairs:
+    """
+    The `top_k` pairs of numeric columns with the strongest Pearson or
+    Spearman correlation, as `(strength, order, entry)`. Spearman correlates
+    the ranks of each column over its non null values.
+    """
+    pairs: Pairs = []
+    values = frame.select(
+        pl.when(pl.col(name).cast(pl.Float64).is_finite()).then(pl.col(name).cast(pl.Float64))
+        for name in names
+    )
+    # Ranked once, the blocks are then only sliced out of both frames.
+    ranks = values.select(pl.all().rank("average").cast(pl.Float64))
+
+    def prepare(block: List[int]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        columns = [names[p] for p in block]
+        centered_values, mask = _centered(values.select(columns))
+        return centered_values, mask, _centered(ranks.select(columns))[0]
+
+    blocks = _blocks([1] * len(names), RELATIONSHIP_BLOCK_COLUMNS)
+    for i, block_a in enumerate(blocks):
+        values_a, mask_a, ranks_a = prepare(block_a)
+        for block_b in blocks[i:]:
+            same_block = block_b is block_a
+            if same_block:
+                values_b, mask_b, ranks_b = values_a, mask_a, ranks_a
+            else:
+                values_b, mask_b, ranks_b = prepare(block_b)
+            pearson = _pearson((values_a, mask_a), (values_b, mask_b))
+            spearman = _pearson((ranks_a, mask_a), (ranks_b, mask_b))
+            strength = np.fmax(np.abs(pearson), np.abs(spearman))
+            rows, cols = _block_candidates(strength, same_block, top_k)
+            candidates = [
+                (
+                    float(strength[r, c]),
+                    -(block_a[r] * len(names) + block_b[c]),
+                    {
+                        "columns": [names[block_a[r]], names[block_b[c]]],
+                        "pearson": float(pearson[r, c]),
+                        "spearman": float(spearman[r, c]),
+                    },
+                )
+                for r, c in zip(rows, cols)
+            ]
+            pairs = _keep_strongest(pairs, candidates, top_k)
+    return pairs
+
+
+def _indicator_block(codes: pl.DataFrame) -> Tuple[np.ndarray, List[int]]:
+    """One 0/1 column per category code of each column, none set for a null, and the category count of each column."""
+    # An all null column keeps one empty category.
+    sizes = [(code.max() or 0) + 1 for code in codes.iter_columns()]
+    offsets = np.cumsum([0] + sizes[:-1])
+    matrix = codes.to_numpy()
+    # A float32 matrix product counts exactly up to 2**24 rows.
+    indicators = np.zeros((codes.height, sum(sizes)), dtype=np.float32)
+    rows, columns = np.nonzero(~np.isnan(matrix.astype(np.float64)))
+    indicators[rows, offsets[columns] + matrix[rows, columns].astype(np.int64)] = 1.0
+    return indicators, sizes
+
+
+def _cramers_v(
+    a: Tuple[np.ndarray, List[int]], b: Tuple[np.ndarray, List[int]]
+) -> np.ndarray:
+    """
+    Cramér's V of every column of `a` with every column of `b`, over rows
+    where both are present. All contingency tables of the two blocks are the
+    sub matrices of one product of their indicators.
+    """
+    (da, sizes_a), (db, sizes_b) = a, b
+    starts_a = np.cumsum([0] + sizes_a[:-1])
+    starts_b = np.cumsum([0] + sizes_b[:-1])
+    table = (da.T @ db).astype(np.float64)
+    # Margins of each table: category counts of one column where the other is present.
+    rows = np.add.reduceat(table, starts_b, axis=1)
+    cols = np.add.reduceat(table, starts_a, axis=0)
+    n = np.add.reduceat(rows, starts_a, axis=0)
+    expected = np.repeat(rows, sizes_b, axis=1) * np.repeat(cols, sizes_a, axis=0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratio = np.where(expected > 0, table * table / expected, 0.0)
+        phi2 = np.add.reduceat(np.add.reduceat(ratio, starts_a, axis=0), starts_b, axis=1) - 1.0
+        # Categories seen in each table, counted as integers: booleans would just be or-ed.
+        k_a = np.add.reduceat((rows > 0).astype(np.int64), starts_a, axis=0)
+        k_b = np.add.reduceat((cols > 0).astype(np.int64), starts_b, axis=1)
+        v = np.sqrt(np.clip(phi2, 0.0, None) / (np.minimum(k_a, k_b) - 1))
+    valid = (n >= MIN_PAIR_ROWS) & (np.minimum(k_a, k_b) > 1)
+    return np.where(valid, np.clip(v, 0.0, 1.0), np.nan)
+
+
+def categorical_associations(
+    frame: pl.DataFrame, names: List[str], n_categories: List[int], top_k: int
+) -> Pairs:
+    """The `top_k` pairs of categorical columns with the strongest Cramér's V, as `(strength, order, entry)`."""
+    pairs: Pairs = []
+    codes = frame.select(
+        (pl.col(name).cast(pl.String).rank("dense") - 1).cast(pl.Int64) for name in names
+    )
+    blocks = _blocks(n_categories, RELATIONSHIP_BLOCK_CATEGORIES)
+    for i, block_a in enumerate(blocks):
+        indicators_a = _indicator_block(codes.select(names[p] for p in block_a))
+        for block_b in blocks[i:]:
+            same_block = block_b is block_a
+            indicators_b = (
+                indicators_a
+                if same_block
+                else _indicator_block(codes.select(names[p] for p in block_b))
+            )
+            v = _cramers_v(indicators_a, indicators_b)
+            rows, cols = _block_candidates(v, same_block, top_k)
+            candidates = [
+                (
+                    float(v[r, c]),
+                    -(block_a[r] * len(names) + block_b[c]),
+                    {"columns": [names[block_a[r]], names[block_b[c]]], "cramers_v": float(v[r, c])},
+                )
+                for r, c in zip(rows, cols)
+            ]
+            pairs = _keep_strongest(pairs, candidates, top_k)
+    return pairs
+
+
+def strongest_relationships(
+    frame: pl.DataFrame,
+    numeric: List[str],
+    categorical: Dict[str, int],
+    top_k: int,
+) -> List[dict]:
+    """
+    The `top_k` strongest relationships between the `numeric` columns and
+    between the `categorical` ones (name to category count) of `frame`,
+    strongest first. Correlations rank by their absolute value.
+    """
+    pairs = numeric_correlations(frame, numeric, top_k) if len(numeric) > 1 else []
+    if len(categorical) > 1:
+        pairs += categorical_associations(
+            frame, list(categorical), list(categorical.values()), top_k
+        )
+    # A stable sort, numeric pairs come first on ties.
+    pairs = sorted(pairs, key=lambda pair: pair[0], reverse=True)
+    return [entry for _, _, entry in pairs[:top_k]]
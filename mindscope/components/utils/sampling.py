@@ -0,0 +1,63 @@
+import polars as pl
+
+# Row indices hashed at once, bounds the memory of drawing a sample.
+SAMPLE_BLOCK_ROWS = 1 << 20
+
+_INDEX = "__mindscope_index"
+_KEY = "__mindscope_key"
+_STRATUM = "__mindscope_stratum"
+_RANK = "__mindscope_rank"
+
+
+def _keep_smallest(frame: pl.DataFrame, size: int, stratified: bool) -> pl.DataFrame:
+    if not stratified:
+        return frame.bottom_k(size, by=_KEY)
+    return frame.filter(pl.col(_KEY).rank("ordinal").over(_STRATUM) <= size)
+
+
+def sample_indices(
+    n_rows: int, size: int, seed: int, strata: pl.Series | None = None
+) -> pl.Series:
+    """
+    Indices of a uniform sample of `size` rows out of `n_rows`, without
+    replacement: the rows with the smallest hash of their index, like the
+    samples of a `SummaryState`. Only the row count is needed, not the data,
+    and the hashes are computed in blocks so memory stays bounded.
+
+    With `strata`, the values of a key column, every stratum gets a row before
+    any gets a second one, so small groups show up in the sample as well.
+    """
+    size = min(size, n_rows)
+    stratified = strata is not None
+    kept = None
+    for start in range(0, n_rows if size else 0, SAMPLE_BLOCK_ROWS):
+        end = min(start + SAMPLE_BLOCK_ROWS, n_rows)
+        block = pl.select(pl.int_range(start, end, dtype=pl.UInt64).alias(_INDEX)).with_columns(
+            pl.col(_INDEX).hash(seed).alias(_KEY)
+        )
+        if stratified:
+            block = block.with_columns(strata.slice(start, end - start).alias(_STRATUM))
+        block = _keep_smallest(block, size, stratified)
+        kept = block if kept is None else _keep_smallest(pl.concat([kept, block]), size, stratified)
+
+    if kept is None:
+        return pl.Series(_INDEX, [], dtype=pl.UInt64)
+    if stratified:
+        # Round robin over the strata, each round in hash order.
+        kept = kept.with_columns(pl.col(_KEY).rank("ordinal").over(_STRATUM).alias(_RANK))
+        return kept.sort(_RANK, _KEY).head(size)[_INDEX]
+    return kept.sort(_KEY)[_INDEX]
+
+
+def gather_rows(data: pl.DataFrame | pl.LazyFrame, indices: pl.Series) -> pl.DataFrame:
+    """The rows at `indices`, in that order. A LazyFrame is read in one streaming pass."""
+    if isinstance(data, pl.DataFrame):
+        return data.select(pl.all().gather(indices))
+    rows = (
+        data.with_row_index(_INDEX)
+        .with_columns(pl.col(_INDEX).cast(pl.UInt64))
+        .filter(pl.col(_INDEX).is_in(indices))
+        .collect(engine="streaming")
+    )
+    order = pl.DataFrame({_INDEX: indices.cast(pl.UInt64)})
+    return order.join(rows, on=_INDEX, how="left", maintain_order="left").drop(_INDEX)
@@ -0,0 +1,367 @@
+import bisect
+import math
+from datetime import date, datetime, time
+from typing import Callable, Dict, List
+
+import polars as pl
+
+# Registers of the HyperLogLog sketches of string columns, 2**12 registers
+# give a relative standard error of about 1.6%.
+HLL_PRECISION = 12
+HASH_SEED = 0
+# Points kept by the quantile sketch of numeric and temporal columns.
+QUANTILE_SKETCH_SIZE = 1000
+# Rows kept as samples in a summary state.
+STATE_SAMPLE_SIZE = 10
+# Most frequent values kept per string column, bounds the top values of updates.
+HEAVY_HITTERS_SIZE = 100
+COUNT_FIELD = "__count__"
+
+
+def hll_relative_standard_error(precision: int = HLL_PRECISION) -> float:
+    return 1.04 / math.sqrt(2**precision)
+
+
+def hll_register_keys(col: pl.Expr, precision: int = HLL_PRECISION) -> pl.Expr:
+    """
+    Distinct `register * 64 + rank` pairs of a column, where the register is
+    picked by the top bits of the value hash and the rank is one more than the
+    leading zeros of the remaining bits. Folded into registers by `hll_registers`.
+    """
+    hashed = col.drop_nulls().hash(HASH_SEED)
+    register = (hashed // (2 ** (64 - precision))).cast(pl.Int64)
+    remaining = hashed & pl.lit(2 ** (64 - precision) - 1, dtype=pl.UInt64)
+    rank = remaining.bitwise_leading_zeros().cast(pl.Int64) - precision + 1
+    return (register * 64 + rank).unique().implode()
+
+
+def hll_registers(keys: List[int], precision: int = HLL_PRECISION) -> bytes:
+    registers = bytearray(2**precision)
+    for key in keys:
+        register, rank = divmod(key, 64)
+        if rank > registers[register]:
+            registers[register] = rank
+    return bytes(registers)
+
+
+def hll_merge(left: bytes, right: bytes) -> bytes:
+    return bytes(map(max, left, right))
+
+
+def hll_estimate(registers: bytes) -> float:
+    """Distinct count estimated from HyperLogLog registers, with small range correction."""
+    m = len(registers)
+    alpha = 0.7213 / (1 + 1.079 / m)
+    estimate = alpha * m * m / sum(2.0**-rank for rank in registers)
+    zeros = registers.count(0)
+    if estimate <= 2.5 * m and zeros:
+        estimate = m * math.log(m / zeros)
+    return estimate
+
+
+def quantile_points(col: pl.Expr, size: int = QUANTILE_SKETCH_SIZE) -> pl.Expr:
+    """
+    About `size` evenly spaced values of the sorted column, or every value of
+    shorter columns. Each point stands for the same share of the rows.
+    """
+    values = col.drop_nulls().sort()
+    index = values.cum_count().cast(pl.Int64) - 1
+    n = values.count()
+    keep = (index == 0) | ((index * size) // n != ((index - 1) * size) // n)
+    return values.filter(keep).implode()
+
+
+def quantile_sketch(points: List[float], count: int, size: int = QUANTILE_SKETCH_SIZE) -> dict:
+    weight = count / len(points) if points else 0.0
+    return {
+        "values": [float(point) for point in points],
+        "weights": [weight] * len(points),
+        # Evenly spaced points of a sorted column are exact to one point.
+        "rank_error": 0.0 if count <= size else 1 / size,
+    }
+
+
+def quantile_merge(left: dict, right: dict, size: int = QUANTILE_SKETCH_SIZE) -> dict:
+    """
+    Merge two quantile sketches, compacting them back to `size` points when too
+    large. Every compaction adds up to `1 / size` to the rank error, rebuild the
+    state once it grows too large for the use case.
+    """
+    pairs = sorted(
+        zip(left["values"] + right["values"], left["weights"] + right["weights"])
+    )
+    # Rank errors are relative to the rows of each sketch.
+    left_total, right_total = sum(left["weights"]), sum(right["weights"])
+    rank_error = (
+        left["rank_error"] * left_total + right["rank_error"] * right_total
+    ) / ((left_total + right_total) or 1)
+    if len(pairs) <= 2 * size:
+        return {
+            "values": [value for value, _ in pairs],
+            "weights": [weight for _, weight in pairs],
+            "rank_error": rank_error,
+        }
+
+    total = sum(weight for _, weight in pairs)
+    values, cumulative = [], 0.0
+    targets = iter((j + 0.5) * total / size for j in range(size))
+    target = next(targets)
+    for value, weight in pairs:
+        cumulative += weight
+        while target is not None and cumulative >= target:
+            values.append(value)
+            target = next(targets, None)
+    return {
+        "values": values,
+        "weights": [total / size] * len(values),
+        "rank_error": rank_error + 1 / size,
+    }
+
+
+def quantile(sketch: dict, q: float) -> float | None:
+    if not sketch["values"]:
+        return None
+    cumulative, total = [], 0.0
+    for weight in sketch["weights"]:
+        total += weight
+        cumulative.append(total)
+    values = sketch["values"]
+    index = min(bisect.bisect_left(cumulative, q * total), len(values) - 1)
+    if cumulative[index] == q * total and index + 1 < len(values):
+        # Exactly between two points, average them like `median` does.
+        return (values[index] + values[index + 1]) / 2
+    return values[index]
+
+
+def value_counts(col: pl.Expr, limit: int) -> pl.Expr:
+    """Counts of at most `limit + 1` distinct values, one more than `limit` means too many."""
+    return col.drop_nulls().value_counts(name=COUNT_FIELD).head(limit + 1).implode()
+
+
+def counts_from_rows(rows: List[dict], limit: int) -> Dict | None:
+    if len(rows) > limit:
+        return None
+    counts = {}
+    for row in rows:
+        count = row.pop(COUNT_FIELD)
+        counts[next(iter(row.values()))] = count
+    return counts
+
+
+def counts_merge(left: Dict | None, right: Dict | None, limit: int) -> Dict | None:
+    """Merge category counts, dropped for good once more than `limit` values are seen."""
+    if left is None or right is None:
+        return None
+    merged = dict(left)
+    for value, count in right.items():
+        merged[value] = merged.get(value, 0) + count
+    return merged if len(merged) <= limit else None
+
+
+def heavy_hitter_counts(col: pl.Expr, size: int = HEAVY_HITTERS_SIZE) -> pl.Expr:
+    """Counts of the `size + 1` most frequent values, the last one bounds the counts left out."""
+    return col.drop_nulls().value_counts(sort=True, name=COUNT_FIELD).head(size + 1).implode()
+
+
+def heavy_hitters_from_rows(rows: List[dict], size: int = HEAVY_HITTERS_SIZE) -> dict:
+    """
+    Sketch of the most frequent values: counts of at most `size` values and
+    an `error`, the most any value can be undercounted. Values left out were
+    seen at most `error` times.
+    """
+    counts = {}
+    for row in rows[:size]:
+        count = row.pop(COUNT_FIELD)
+        counts[next(iter(row.values()))] = count
+    error = rows[size][COUNT_FIELD] if len(rows) > size else 0
+    return {"counts": counts, "error": error}
+
+
+def heavy_hitters_merge(left: dict, right: dict, size: int = HEAVY_HITTERS_SIZE) -> dict:
+    """
+    Merge two heavy hitter sketches. Counts add up, a value missing from one
+    side may have been seen up to that side's `error` times there, and the
+    largest count dropped to keep `size` values joins the error.
+    """
+    merged = dict(left["counts"])
+    for value, count in right["counts"].items():
+        merged[value] = merged.get(value, 0) + count
+    ranked = sorted(merged.items(), key=lambda item: (-item[1], str(item[0])))
+    dropped = ranked[size][1] if len(ranked) > size else 0
+    return {
+        "counts": dict(ranked[:size]),
+        "error": left["error"] + right["error"] + dropped,
+    }
+
+
+# Mergeable statistics of every dtype family, keyed like `FAMILY_STATS`.
+NUMERIC_STATE_STATS: Dict[str, Callable[[pl.Expr], pl.Expr]] = {
+    "min": lambda col: col.min(),
+    "max": lambda col: col.max(),
+    "sum": lambda col: col.cast(pl.Float64).sum(),
+    # Sum of squared deviations from the mean, merged with Chan's formula.
+    "m2": lambda col: (col.cast(pl.Float64) - col.cast(pl.Float64).mean()).pow(2).sum(),
+    "quantile_points": quantile_points,
+    "null_count": lambda col: col.null_count(),
+    "not_null_count": lambda col: col.count(),
+}
+
+TEMPORAL_STATE_STATS: Dict[str, Callable[[pl.Expr], pl.Expr]] = {
+    "min": lambda col: col.min(),
+    "max": lambda col: col.max(),
+    # Sketch of the physical values, for histograms
+    "quantile_points": lambda col: quantile_points(col.to_physical()),
+    "null_count": lambda col: col.null_count(),
+    "not_null_count": lambda col: col.count(),
+}
+
+BOOLEAN_STATE_STATS: Dict[str, Callable[[pl.Expr], pl.Expr]] = {
+    "true_count": lambda col: col.sum(),
+    "null_count": lambda col: col.null_count(),
+    "not_null_count": lambda col: col.count(),
+}
+
+STRING_STATE_STATS: Dict[str, Callable[[pl.Expr], pl.Expr]] = {
+    "hll_keys": hll_register_keys,
+    "heavy_hitters": heavy_hitter_counts,
+    "null_count": lambda col: col.null_count(),
+    "not_null_count": lambda col: col.count(),
+}
+
+OTHER_STATE_STATS: Dict[str, Callable[[pl.Expr], pl.Expr]] = {
+    "null_count": lambda col: col.null_count(),
+    "not_null_count": lambda col: col.count(),
+}
+
+FAMILY_STATE_STATS = {
+    "numeric": NUMERIC_STATE_STATS,
+    "temporal": TEMPORAL_STATE_STATS,
+    "boolean": BOOLEAN_STATE_STATS,
+    "categorical": STRING_STATE_STATS,
+    "string": STRING_STATE_STATS,
+    "other": OTHER_STATE_STATS,
+}
+
+
+def sample_expressions(schema: pl.Schema, offset: int, seed: int, size: int = STATE_SAMPLE_SIZE) -> List[pl.Expr]:
+    """
+    The `size` rows with the smallest hash of their index, counted from
+    `offset`, so samples of appended rows merge into a uniform sample.
+    """
+    key = (pl.int_range(pl.len(), dtype=pl.UInt64) + offset).hash(seed)
+    return [key.sort().head(size).implode().alias("samples::keys")] + [
+        pl.col(name).sort_by(key).head(size).implode().alias(f"samples::{index}")
+        for index, name in enumerate(schema)
+    ]
+
+
+def split_samples(row: dict, schema: pl.Schema) -> dict:
+    return {
+        "keys": row["samples::keys"],
+        "rows": {name: row[f"samples::{index}"] for index, name in enumerate(schema)},
+    }
+
+
+def column_state(stats: dict, limit: int) -> dict:
+    """Turn the statistics selected with `FAMILY_STATE_STATS` into a mergeable column state."""
+    state = {
+        key: value
+        for key, value in stats.items()
+        if key not in {"quantile_points", "hll_keys", "counts", "heavy_hitters"}
+    }
+    if "quantile_points" in stats:
+        state["quantiles"] = quantile_sketch(stats["quantile_points"], stats["not_null_count"])
+    if "hll_keys" in stats:
+        state["hll"] = hll_registers(stats["hll_keys"])
+        state["counts"] = counts_from_rows(stats["counts"], limit)
+    if "heavy_hitters" in stats:
+        state["heavy_hitters"] = heavy_hitters_from_rows(stats["heavy_hitters"])
+    return state
+
+
+def _min(left, right):
+    return right if left is None else left if right is None else min(left, right)
+
+
+def _max(left, right):
+    return right if left is None else left if right is None else max(left, right)
+
+
+def merge_column_states(left: dict, right: dict, limit: int) -> dict:
+    """Merge the states of one column computed over two sets of rows."""
+    merged = {
+        "null_count": left["null_count"] + right["null_count"],
+        "not_null_count": left["not_null_count"] + right["not_null_count"],
+    }
+    for key in ["min", "max", "date::min", "date::max"]:
+        if key in left:
+            merge = _min if key.endswith("min") else _max
+            merged[key] = merge(left[key], right[key])
+    for key in ["true_count", "date::count"]:
+        if key in left:
+            merged[key] = left[key] + right[key]
+    if "date_format" in left:
+        merged["date_format"] = left["date_format"]
+    if "sum" in left:
+        n_left, n_right = left["not_null_count"], right["not_null_count"]
+        n = n_left + n_right
+        merged["sum"] = left["sum"] + right["sum"]
+        delta = (
+            right["sum"] / n_right - left["sum"] / n_left if n_left and n_right else 0.0
+        )
+        merged["m2"] = left["m2"] + right["m2"] + delta**2 * n_left * n_right / (n or 1)
+    if "quantiles" in left and "quantiles" in right:
+        merged["quantiles"] = quantile_merge(left["quantiles"], right["quantiles"])
+    if "hll" in left:
+        merged["hll"] = hll_merge(left["hll"], right["hll"])
+        merged["counts"] = counts_merge(left["counts"], right["counts"], limit)
+    if "heavy_hitters" in left and "heavy_hitters" in right:
+        merged["heavy_hitters"] = heavy_hitters_merge(left["heavy_hitters"], right["heavy_hitters"])
+    return merged
+
+
+def merge_samples(left: dict, right: dict, size: int = STATE_SAMPLE_SIZE) -> dict:
+    """Keep the `size` rows with the smallest hashed row index out of both states."""
+    keys = left["keys"] + right["keys"]
+    order = sorted(range(len(keys)), key=keys.__getitem__)[:size]
+    return {
+        "keys": [keys[i] for i in order],
+        "rows": {
+            name: [(values + right["rows"][name])[i] for i in order]
+            for name, values in left["rows"].items()
+        },
+    }
+
+
+def _difference(high, low):
+    if isinstance(high, time):
+        high, low = (datetime.combine(date.min, value) for value in (high, low))
+    return high - low
+
+
+def column_stats(state: dict) -> dict:
+    """Statistics of a column state, shaped like a column profile."""
+    stats = {
+        key: value
+        for key, value in state.items()
+        if key not in {"sum", "m2", "quantiles", "hll", "counts", "heavy_hitters"}
+    }
+    count = state["not_null_count"]
+    if "sum" in state:
+        stats["mean"] = state["sum"] / count if count else None
+        stats["std"] = math.sqrt(state["m2"] / (count - 1)) if count > 1 else None
+        stats["median"] = quantile(state["quantiles"], 0.5)
+    elif "min" in state:
+        has_range = state["min"] is not None and state["max"] is not None
+        stats["min_max_diff"] = _difference(state["max"], state["min"]) if has_range else None
+    if "hll" in state:
+        # Like polars `n_unique` and `unique`, null counts as a value.
+        has_null = state["null_count"] > 0
+        counts = state["counts"]
+        if counts is not None:
+            stats["n_unique"] = len(counts) + has_null
+            stats["categories"] = [None] * has_null + sorted(counts)
+        else:
+            stats["n_unique"] = round(hll_estimate(state["hll"])) + has_null
+            stats["categories"] = []
+    return stats
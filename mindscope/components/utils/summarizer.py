@@ -1,82 +1,473 @@
+import json
 import logging
-from datetime import datetime, timedelta
+import math
+from datetime import date, datetime, time, timedelta
+from typing import Any, Callable, Dict, List, Tuple
 
 import polars as pl
 
+from mindscope.components.llm.tokens import count_tokens
+from mindscope.components.models import EnrichmentEvent, Summary
+
 logger = logging.getLogger(__name__)
 
+# Statistics evaluated for every column of a dtype family. Each entry maps the
+# statistic name to a builder taking the column expression.
+NUMERIC_STATS: Dict[str, Callable[[pl.Expr], pl.Expr]] = {
+    "min": lambda col: col.min(),
+    "max": lambda col: col.max(),
+    "mean": lambda col: col.mean(),
+    "median": lambda col: col.median(),
+    "std": lambda col: col.std(),
+    "null_count": lambda col: col.null_count(),
+    "not_null_count": lambda col: col.count(),
+}
+
+TEMPORAL_STATS: Dict[str, Callable[[pl.Expr], pl.Expr]] = {
+    "min": lambda col: col.min(),
+    "max": lambda col: col.max(),
+    "min_max_diff": lambda col: col.max() - col.min(),
+    "null_count": lambda col: col.null_count(),
+    "not_null_count": lambda col: col.count(),
+}
+
+BOOLEAN_STATS: Dict[str, Callable[[pl.Expr], pl.Expr]] = {
+    "true_count": lambda col: col.sum(),
+    "null_count": lambda col: col.null_count(),
+    "not_null_count": lambda col: col.count(),
+}
+
+CATEGORICAL_STATS: Dict[str, Callable[[pl.Expr], pl.Expr]] = {
+    "categories": lambda col: col.unique().sort().implode(),
+    "n_unique": lambda col: col.n_unique(),
+    "null_count": lambda col: col.null_count(),
+    "not_null_count": lambda col: col.count(),
+}
+
+STRING_STATS: Dict[str, Callable[[pl.Expr], pl.Expr]] = {
+    "n_unique": lambda col: col.n_unique(),
+    "null_count": lambda col: col.null_count(),
+    "not_null_count": lambda col: col.count(),
+}
+
+OTHER_STATS: Dict[str, Callable[[pl.Expr], pl.Expr]] = {
+    "null_count": lambda col: col.null_count(),
+    "not_null_count": lambda col: col.count(),
+}
+
+StatsDict = Dict[str, Dict[str, Callable[[pl.Expr], pl.Expr]]]
+
+FAMILY_STATS: StatsDict = {
+    "numeric": NUMERIC_STATS,
+    "temporal": TEMPORAL_STATS,
+    "boolean": BOOLEAN_STATS,
+    "categorical": CATEGORICAL_STATS,
+    "string": STRING_STATS,
+    "other": OTHER_STATS,
+}
+
+
+def column_family(dtype: pl.DataType) -> str:
+    """Map a polars dtype to the family used to pick its statistics."""
+    if dtype.is_numeric():
+        return "numeric"
+    elif dtype.is_temporal():
+        return "temporal"
+    elif isinstance(dtype, pl.Boolean):
+        return "boolean"
+    elif isinstance(dtype, pl.Categorical):
+        return "categorical"
+    elif isinstance(dtype, pl.Utf8):
+        return "string"
+    return "other"
+
+
+# Polars estimates distinct counts with HyperLogLog over 2**14 registers.
+HLL_RELATIVE_STANDARD_ERROR = 1.04 / math.sqrt(2**14)
+
+
+def row_sample_mask(n_rows: int, sample_size: int, seed: int) -> pl.Expr:
+    """
+    Mask keeping a uniform random subset of about `sample_size` rows. Rows are
+    picked by hashing their index, so no column has to be shuffled or gathered.
+    """
+    fraction = min(1.0, sample_size / n_rows) if n_rows else 1.0
+    threshold = pl.lit(int(fraction * (2**64 - 1)), dtype=pl.UInt64)
+    return pl.int_range(pl.len(), dtype=pl.UInt64).hash(seed) <= threshold
+
+
+def quantile_rank_error(sample_size: int, confidence: float) -> float:
+    """DKW bound on the rank error of a quantile read from a uniform sample."""
+    return math.sqrt(math.log(2 / (1 - confidence)) / (2 * sample_size))
+
+
+def missed_category_frequency(sample_size: int, confidence: float) -> float:
+    """Frequency above which a category is missed by a uniform sample with probability below 1 - confidence."""
+    return math.log(1 / (1 - confidence)) / sample_size
+
+
+def _stat_alias(index: int, stat: str) -> str:
+    # Column position keeps aliases unique whatever the column names look like.
+    return f"{index}::{stat}"
+
 
-def try_generic_string_parse(column_data: pl.Series):
+def _family_stats(
+    dtype: pl.DataType, extra_stats: StatsDict | None, family_stats: StatsDict = FAMILY_STATS
+) -> Dict[str, Callable[[pl.Expr], pl.Expr]]:
+    family = column_family(dtype)
+    stats = family_stats[family]
+    if extra_stats and family in extra_stats:
+        stats = {**stats, **extra_stats[family]}
+    return stats
+
+
+def profile_expressions(
+    schema: pl.Schema,
+    extra_stats: StatsDict | None = None,
+    family_stats: StatsDict = FAMILY_STATS,
+    known: Dict[str, dict] | None = None,
+) -> List[pl.Expr]:
+    """
+    Build the statistics of every column as one flat list of expressions, so
+    the whole profile is evaluated by a single `select` on the polars thread pool.
+
+    `extra_stats` adds statistics to a family, keyed like `FAMILY_STATS`, and
+    `family_stats` replaces the default statistics altogether. Statistics in
+    `known`, per column, are already known and not computed.
+    """
+    exprs = []
+    known = known or {}
+    for index, (name, dtype) in enumerate(schema.items()):
+        col = pl.col(name)
+        exprs.extend(
+            builder(col).alias(_stat_alias(index, stat))
+            for stat, builder in _family_stats(dtype, extra_stats, family_stats).items()
+            if stat not in known.get(name, {})
+        )
+    return exprs
+
+
+def split_profile(
+    row: dict,
+    schema: pl.Schema,
+    extra_stats: StatsDict | None = None,
+    family_stats: StatsDict = FAMILY_STATS,
+    known: Dict[str, dict] | None = None,
+) -> Dict[str, dict]:
+    """Split the single row returned by `profile_expressions` back per column."""
+    profile = {}
+    known = known or {}
+    for index, (name, dtype) in enumerate(schema.items()):
+        stats = _family_stats(dtype, extra_stats, family_stats)
+        column_known = known.get(name, {})
+        profile[name] = {
+            stat: column_known[stat] if stat in column_known else row[_stat_alias(index, stat)]
+            for stat in stats
+        }
+    return profile
+
+
+def known_stats(stats: dict, dtype: pl.DataType) -> dict:
+    """
+    The statistics of a column's family found in `stats`, e.g. read from a
+    file footer, with the ones derived from its min and max.
+    """
+    family_stats = FAMILY_STATS[column_family(dtype)]
+    stats = {stat: value for stat, value in stats.items() if stat in family_stats}
+    if "min_max_diff" in family_stats and {"min", "max"} <= stats.keys():
+        bounds = pl.DataFrame({"bounds": pl.Series([stats["min"], stats["max"]], dtype=dtype)})
+        stats["min_max_diff"] = bounds.select(
+            family_stats["min_max_diff"](pl.col("bounds"))
+        ).item()
+    return stats
+
+
+# Statistics each summary property is computed from, when not the property itself.
+PROPERTY_STATS: Dict[str, List[str]] = {
+    "min_date": ["min"],
+    "max_date": ["max"],
+    "min_max_diff": ["min", "max"],
+    "false_count": ["not_null_count", "true_count"],
+}
+
+
+def known_properties(properties: dict, known: dict) -> List[str]:
+    """Properties of a column summary computed only from the `known` statistics."""
+    return [
+        key
+        for key in properties
+        if all(stat in known for stat in PROPERTY_STATS.get(key, [key]))
+    ]
+
+
+def try_generic_string_parse(name: str, dtype: pl.DataType, stats: dict):
     return {
-        "column": column_data.name,
+        "column": name,
         "type": "string",
-        "dtype": str(column_data.dtype),
-        "null_count": column_data.null_count(),
-        "not_null_count": column_data.count(),
-        "n_unique": column_data.n_unique(),
+        "dtype": str(dtype),
+        "null_count": stats["null_count"],
+        "not_null_count": stats["not_null_count"],
+        "n_unique": stats["n_unique"],
     }
 
 
-def try_categorical_parse(column_data: pl.Series):
+def try_categorical_parse(name: str, dtype: pl.DataType, stats: dict):
     return {
-        "column": column_data.name,
+        "column": name,
         "type": "categorical string",
-        "dtype": str(column_data.dtype),
-        "categories": column_data.unique().sort().to_list(),
-        "n_categories": column_data.n_unique(),
-        "null_count": column_data.null_count(),
-        "not_null_count": column_data.count() - column_data.null_count(),
+        "dtype": str(dtype),
+        "categories": stats["categories"],
+        "n_categories": stats["n_unique"],
+        "null_count": stats["null_count"],
+        "not_null_count": stats["not_null_count"] - stats["null_count"],
     }
 
 
-def _parse_dates(data: pl.Series):
-    common_formats = ["%Y-%m-%d", "%d-%m-%Y", "%Y/%m/%d", "%d/%m/%Y"]
-    for fmt in common_formats:
-        try:
-            parsed_dates = data.str.to_datetime(fmt, strict=False).drop_nulls()
-            if parsed_dates.len() > 0:
-                return parsed_dates
-        except Exception:
-            continue
-    return data.str.to_datetime(
-        format=None, strict=False, ambiguous="earliest", cache=False
-    ).drop_nulls()
+# Candidate formats tried on a probe of each string column, in order of preference.
+DATE_FORMATS = [
+    "%Y-%m-%d",
+    "%d-%m-%Y",
+    "%Y/%m/%d",
+    "%d/%m/%Y",
+    "%m/%d/%Y",
+    "%m-%d-%Y",
+    "%d.%m.%Y",
+    "%Y-%m-%d %H:%M:%S",
+    "%Y-%m-%d %H:%M",
+    "%Y-%m-%dT%H:%M:%S",
+    "%Y-%m-%d %H:%M:%S%.f",
+    "%Y-%m-%dT%H:%M:%S%.f",
+    "%d/%m/%Y %H:%M:%S",
+    "%m/%d/%Y %H:%M:%S",
+]
+
+# Every format above, and anything polars infers, starts with three digit groups.
+DATE_LIKE_PATTERN = r"^\s*\d{1,4}[-/.]\d{1,2}[-/.]\d{1,4}"
+
+
+def _to_datetime(col: pl.Expr | pl.Series, fmt: str | None):
+    if fmt is None:
+        # Let polars infer the format from the data.
+        return col.str.to_datetime(
+            format=None, strict=False, ambiguous="earliest", cache=False
+        )
+    return col.str.to_datetime(fmt, strict=False)
+
+
+def infer_date_format(probe: pl.Series, date_like_threshold: float) -> Tuple[bool, str | None]:
+    """
+    Infer the date format of a string column from a small probe of its non null
+    values. Returns whether the column looks like dates and the best format,
+    `None` meaning the format is left for polars to infer.
 
+    Free text is rejected by a single regex pass before any format is tried.
+    """
+    if probe.len() == 0:
+        return False, None
+    if probe.str.contains(DATE_LIKE_PATTERN).mean() < date_like_threshold:
+        return False, None
+
+    best_format, best_rate = None, 0.0
+    for fmt in DATE_FORMATS:
+        rate = _to_datetime(probe, fmt).count() / probe.len()
+        if rate > best_rate:
+            best_format, best_rate = fmt, rate
+    if best_rate >= date_like_threshold:
+        return True, best_format
 
-def try_parse_dates(column_data: pl.Series, date_like_threshold: float):
-    not_null_count = column_data.count()
     try:
-        if not_null_count > 0:
-            logger.debug(f"Trying to parse date column : {column_data.name}")
-            not_null_data = column_data.drop_nulls()
-            parsed_dates: pl.Series = _parse_dates(not_null_data)
-
-            # Check if it majority elements are date or not
-            is_majority = (
-                parsed_dates.len() > 0
-                and parsed_dates.len() / not_null_data.len() >= date_like_threshold
-            )
-            if is_majority:
-                return {
-                    "column": column_data.name,
-                    "dtype": str(column_data.dtype),
-                    "type": "date-like string",
-                    "min_date": parsed_dates.min(),
-                    "max_date": parsed_dates.max(),
-                    "null_count": column_data.null_count(),
-                    "not_null_count": column_data.count(),
-                    "min_max_diff": parsed_dates.max() - parsed_dates.min(),
-                    "parsed_success_rate": parsed_dates.len() / not_null_count,
-                }
+        rate = _to_datetime(probe, None).count() / probe.len()
     except Exception as e:
-        logger.debug(
-            f"Failed to parse date column : {column_data.name} for reason : {e.__class__} : {e}"
-        )
+        logger.debug(f"Failed to infer date format for reason : {e.__class__} : {e}")
+        return False, None
+    return rate >= date_like_threshold, None
+
+
+def date_parse_stats(fmt: str | None) -> Dict[str, Callable[[pl.Expr], pl.Expr]]:
+    """Statistics of a string column fully parsed with its inferred format."""
+    return {
+        "date::count": lambda col: _to_datetime(col, fmt).count(),
+        "date::min": lambda col: _to_datetime(col, fmt).min(),
+        "date::max": lambda col: _to_datetime(col, fmt).max(),
+    }
+
+
+def try_parse_dates(name: str, dtype: pl.DataType, stats: dict, date_like_threshold: float):
+    not_null_count = stats["not_null_count"]
+    parsed_count = stats.get("date::count")
+    if not_null_count == 0 or not parsed_count:
+        return None
+
+    # Check if it majority elements are date or not
+    if parsed_count / not_null_count >= date_like_threshold:
+        return {
+            "column": name,
+            "dtype": str(dtype),
+            "type": "date-like string",
+            "min_date": stats["date::min"],
+            "max_date": stats["date::max"],
+            "null_count": stats["null_count"],
+            "not_null_count": not_null_count,
+            "min_max_diff": stats["date::max"] - stats["date::min"],
+            "parsed_success_rate": parsed_count / not_null_count,
+            "date_format": stats["date_format"],
+        }
     return None
 
 
+def date_formats_from_summary(summary: dict) -> Dict[str, str | None]:
+    """Date formats recorded in a previous summary, to seed a new Summarizer."""
+    if not isinstance(summary, dict):
+        summary = summary.model_dump()
+    return {
+        column["column"]: column["date_format"]
+        for column in summary.get("columns", [])
+        if "date_format" in column
+    }
+
+
+def batch_columns(
+    columns: List[dict],
+    token_budget: int,
+    token_counter: Callable[[str], int] = count_tokens,
+) -> List[List[dict]]:
+    """
+    Split column summaries into consecutive batches whose serialized size stays
+    within `token_budget`. A column larger than the budget gets a batch of its own.
+    """
+    batches, batch, batch_tokens = [], [], 0
+    for column in columns:
+        tokens = token_counter(json.dumps(column, default=datetime_serializer))
+        if batch and batch_tokens + tokens > token_budget:
+            batches.append(batch)
+            batch, batch_tokens = [], 0
+        batch.append(column)
+        batch_tokens += tokens
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def _drop_nulls(column: dict) -> dict:
+    return {key: value for key, value in column.items() if value is not None}
+
+
+def _round_float(value: Any, digits: int = 4) -> Any:
+    if isinstance(value, float):
+        return float(f"{value:.{digits}g}")
+    if isinstance(value, list):
+        return [_round_float(item, digits) for item in value]
+    if isinstance(value, dict):
+        return {key: _round_float(item, digits) for key, item in value.items()}
+    return value
+
+
+def _round_floats(column: dict) -> dict:
+    return _round_float(column)
+
+
+def _shorten_samples(column: dict, n_samples: int = 1, max_length: int = 40) -> dict:
+    if "samples" not in column:
+        return column
+    samples = [
+        sample[:max_length] if isinstance(sample, str) else sample
+        for sample in column["samples"][:n_samples]
+    ]
+    return {**column, "samples": samples}
+
+
+def _truncate_categories(column: dict, n_categories: int = 10) -> dict:
+    if "categories" not in column:
+        return column
+    return {**column, "categories": column["categories"][:n_categories]}
+
+
+def _drop_distributions(column: dict) -> dict:
+    return {key: value for key, value in column.items() if key not in ("top_values", "histogram")}
+
+
+def _drop_samples(column: dict) -> dict:
+    return {key: value for key, value in column.items() if key != "samples"}
+
+
+# Applied one after the other until the summary fits, least lossy first.
+COMPACTION_STEPS: List[Tuple[str, Callable[[dict], dict]]] = [
+    ("drop_nulls", _drop_nulls),
+    ("round_floats", _round_floats),
+    ("shorten_samples", _shorten_samples),
+    ("truncate_categories", _truncate_categories),
+    ("drop_distributions", _drop_distributions),
+    ("drop_samples", _drop_samples),
+]
+
+# Steps losing what the model reads most, only for a column too large for a batch of its own.
+LOSSY_COMPACTION_STEPS = ["drop_distributions", "drop_samples"]
+
+
+def compact_summary(
+    summary: dict,
+    token_budget: int,
+    token_counter: Callable[[str], int] = count_tokens,
+    lossy: bool = True,
+) -> Tuple[dict, List[str]]:
+    """
+    Shrink the columns of a summary until its JSON fits `token_budget`, by
+    applying `COMPACTION_STEPS` in order: drop null fields, round floats to
+    four significant digits, keep one sample cut to 40 characters, keep the
+    first ten categories, drop top values and histograms, and finally drop
+    samples. With `lossy=False` the `LOSSY_COMPACTION_STEPS` are skipped.
+
+    Returns the compacted summary and the names of the steps applied. The
+    summary may still exceed the budget once every step has been applied.
+    """
+    compacted = {**summary, "columns": list(summary["columns"])}
+    applied = []
+    for name, step in COMPACTION_STEPS:
+        if not lossy and name in LOSSY_COMPACTION_STEPS:
+            continue
+        if token_counter(json.dumps(compacted, default=datetime_serializer)) <= token_budget:
+            break
+        compacted["columns"] = [step(column) for column in compacted["columns"]]
+        applied.append(name)
+    return compacted, applied
+
+
+def merge_enrichments(summary: dict, enrichments: List[dict]) -> dict:
+    """
+    Merge the dataset description and per column summaries returned for each
+    batch, in the shape of `Enrichment`, into the locally computed summary,
+    whose statistics are kept as is.
+    """
+    merged = {**summary, "columns": [dict(column) for column in summary["columns"]]}
+    column_summaries = {}
+    for enrichment in enrichments:
+        if not merged.get("description") and enrichment.get("description"):
+            merged["description"] = enrichment["description"]
+        for column in enrichment.get("columns", []):
+            if column["summary"]:
+                column_summaries[column["column"]] = column["summary"]
+
+    for column in merged["columns"]:
+        if column["column"] in column_summaries:
+            column["summary"] = column_summaries[column["column"]]
+    return merged
+
+
+def enrichment_events(summary: Summary | dict) -> List[EnrichmentEvent]:
+    """The events a streamed enrichment of `summary` ends with, to replay an enriched summary."""
+    summary = Summary(**summary) if isinstance(summary, dict) else summary
+    events = []
+    if summary.description:
+        events.append(EnrichmentEvent(kind="description", text=summary.description))
+    for column in summary.columns:
+        if column.summary:
+            events.append(EnrichmentEvent(kind="column", column=column.column, text=column.summary))
+    events.append(EnrichmentEvent(kind="summary", summary=summary))
+    return events
+
+
 def datetime_serializer(obj):
-    if isinstance(obj, datetime):
+    if isinstance(obj, (datetime, date, time)):
         return obj.isoformat()
     elif isinstance(obj, timedelta):
         return str(obj)
@@ -0,0 +1,71 @@
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import copy
+import json
+import pytest
+import polars as pl
+from benchmarks.datasets import MIXES, generate_dataset, write_dataset
+from benchmarks.run import compare, main, run
+
+
+@pytest.mark.parametrize("mix", list(MIXES))
+def test_generate_dataset_is_reproducible(mix):
+    data = generate_dataset(500, 7, mix)
+
+    assert data.shape == (500, 7)
+    assert data.equals(generate_dataset(500, 7, mix))
+    assert not data.equals(generate_dataset(500, 7, mix, seed=1))
+    assert all(0 < count < 500 for count in data.null_count().row(0))
+
+
+def test_csv_cannot_hold_nested_columns(tmp_path):
+    with pytest.raises(ValueError):
+        write_dataset(generate_dataset(10, 2, "nested"), str(tmp_path), "csv")
+    path = write_dataset(generate_dataset(10, 2, "numeric"), str(tmp_path), "csv")
+    assert pl.read_csv(path).height == 10
+
+
+def test_run_records_every_target():
+    results = run(rows=[200], columns=[3], mixes=["mixed"], repeat=1)["results"]
+
+    assert [result["target"] for result in results] == ["load", "summarize", "enrich"]
+    assert all(result["seconds"] > 0 for result in results)
+    enrich = results[-1]
+    assert enrich["tokens"]["requests"] == 1
+    assert enrich["tokens"]["total_tokens"] > enrich["tokens"]["prompt_after_compaction"] > 0
+
+
+def test_compare_flags_regressions():
+    baseline = run(rows=[200], columns=[3], mixes=["numeric"], repeat=1)
+    current = copy.deepcopy(baseline)
+    assert compare(current, baseline) == []
+
+    summarize = next(result for result in current["results"] if result["target"] == "summarize")
+    summarize["seconds"] = summarize["seconds"] * 2 + 1
+    enrich = next(result for result in current["results"] if result["target"] == "enrich")
+    enrich["tokens"]["total_tokens"] *= 2
+
+    regressions = compare(current, baseline)
+    assert {(regression["case"], regression["metric"]) for regression in regressions} == {
+        (summarize["case"], "seconds"),
+        (enrich["case"], "total_tokens"),
+    }
+
+
+def test_main_exits_on_regression(tmp_path):
+    argv = ["--rows", "100", "--columns", "2", "--mixes", "numeric", "--repeat", "1"]
+    baseline_path = tmp_path / "baseline.json"
+    assert main(argv + ["-o", str(baseline_path)]) == 0
+
+    baseline = json.loads(baseline_path.read_text())
+    for result in baseline["results"]:
+        result["seconds"] = 0.0
+    baseline_path.write_text(json.dumps(baseline))
+    # Slower than a zero second baseline only beyond the noise floor.
+    assert main(argv + ["-o", str(tmp_path / "run.json"), "--baseline", str(baseline_path)]) == 0
+    for result in baseline["results"]:
+        result["peak_memory_mb"] = -100.0
+    baseline_path.write_text(json.dumps(baseline))
+    assert main(argv + ["-o", str(tmp_path / "run.json"), "--baseline", str(baseline_path)]) == 1
@@ -0,0 +1,98 @@
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import json
+import shutil
+import pytest
+import polars as pl
+from mindscope.cli import expand_inputs, main
+
+DATASET_PATH = os.path.join(os.path.dirname(__file__), "1000_rows_dataset.csv")
+
+
+@pytest.fixture
+def extracts(tmp_path):
+    root = tmp_path / "extracts"
+    (root / "daily").mkdir(parents=True)
+    shutil.copy(DATASET_PATH, root / "orders.csv")
+    pl.read_csv(DATASET_PATH).write_parquet(root / "daily" / "orders.parquet")
+    (root / "daily" / "empty.csv").write_text("")
+    (root / "notes.txt").write_text("not a dataset")
+    return root
+
+
+def test_expand_inputs(extracts):
+    assert expand_inputs([str(extracts)]) == [str(extracts / "orders.csv")]
+    assert expand_inputs([str(extracts)], recursive=True) == [
+        str(extracts / "daily" / "empty.csv"),
+        str(extracts / "daily" / "orders.parquet"),
+        str(extracts / "orders.csv"),
+    ]
+    pattern = str(extracts / "**" / "*.parquet")
+    assert expand_inputs([pattern, pattern]) == [str(extracts / "daily" / "orders.parquet")]
+
+    # Arrow IPC files are read too.
+    data = pl.read_csv(DATASET_PATH)
+    for extension in ["ipc", "arrow", "feather"]:
+        data.write_ipc(extracts / f"orders.{extension}")
+    assert expand_inputs([str(extracts)]) == [
+        str(extracts / f"orders.{extension}") for extension in ["arrow", "csv", "feather", "ipc"]
+    ]
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_cli_profiles_directory(extracts, tmp_path, workers):
+    output_dir = tmp_path / "summaries"
+    exit_code = main(
+        [str(extracts), "-r", "-o", str(output_dir), "-w", str(workers), "--n-samples", "1"]
+    )
+
+    # The empty file fails without stopping the run.
+    assert exit_code == 1
+    manifest = json.loads((output_dir / "manifest.json").read_text())
+    assert (manifest["succeeded"], manifest["failed"]) == (2, 1)
+    statuses = {os.path.basename(entry["input"]): entry["status"] for entry in manifest["files"]}
+    assert statuses == {"empty.csv": "failed", "orders.parquet": "ok", "orders.csv": "ok"}
+
+    csv_summary = json.loads((output_dir / "orders.csv.summary.json").read_text())
+    parquet_summary = json.loads(
+        (output_dir / "daily" / "orders.parquet.summary.json").read_text()
+    )
+    assert csv_summary["filename"] == "orders.csv"
+    assert csv_summary["columns"] == parquet_summary["columns"]
+
+
+def test_cli_parquet_output(extracts, tmp_path):
+    output_dir = tmp_path / "summaries"
+    assert main([str(extracts / "orders.csv"), "-o", str(output_dir), "-f", "parquet", "-w", "1"]) == 0
+
+    frame = pl.read_parquet(output_dir / "orders.csv.summary.parquet")
+    assert frame["column"].to_list() == pl.read_csv(DATASET_PATH).columns
+
+
+def test_cli_projection(extracts, tmp_path):
+    output_dir = tmp_path / "summaries"
+    argv = [str(extracts / "orders.csv"), "-o", str(output_dir), "-w", "1"]
+    assert main(argv + ["--columns", "price,status", "--n-rows", "10"]) == 0
+
+    manifest = json.loads((output_dir / "manifest.json").read_text())
+    assert (manifest["files"][0]["rows"], manifest["files"][0]["columns"]) == (10, 2)
+
+
+def test_cli_file_statistics(extracts, tmp_path):
+    output_dir = tmp_path / "summaries"
+    argv = [str(extracts / "daily" / "orders.parquet"), "-o", str(output_dir), "-w", "1"]
+    assert main(argv + ["--file-statistics"]) == 0
+
+    summary = json.loads((output_dir / "orders.parquet.summary.json").read_text())
+    assert all("null_count" in column["metadata_statistics"] for column in summary["columns"])
+
+
+def test_cli_relationships(extracts, tmp_path):
+    output_dir = tmp_path / "summaries"
+    argv = [str(extracts / "orders.csv"), "-o", str(output_dir), "-w", "1"]
+    assert main(argv + ["--relationships", "2"]) == 0
+
+    summary = json.loads((output_dir / "orders.csv.summary.json").read_text())
+    assert len(summary["relationships"]) == 2
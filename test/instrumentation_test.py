@@ -0,0 +1,104 @@
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import asyncio
+import json
+import pytest
+from benchmarks.stub_llm import StubLLM
+from mindscope import Manager
+from mindscope.components.core import INSTRUMENTATION, SpanRecorder, JsonLinesExporter
+from mindscope.components.core.instrumentation import NOOP_SPAN
+
+DATASET_PATH = os.path.join(os.path.dirname(__file__), "1000_rows_dataset.csv")
+
+
+@pytest.fixture
+def recorder():
+    recorder = INSTRUMENTATION.add_hook(SpanRecorder())
+    yield recorder
+    INSTRUMENTATION.remove_hook(recorder)
+
+
+def test_disabled_instrumentation_is_a_noop():
+    assert not INSTRUMENTATION.enabled
+    with INSTRUMENTATION.span("phase", rows=1) as span:
+        span.set(columns=2)
+    assert span is NOOP_SPAN
+    assert INSTRUMENTATION.current() is None
+
+
+def test_spans_cover_every_phase(recorder):
+    manager = Manager(filepath=DATASET_PATH, llm_client=StubLLM())
+    manager.summarize(n_samples=1, enrich=True)
+
+    (load,) = recorder.by_name("manager.load")
+    assert (load.attributes["rows"], load.attributes["columns"]) == (1000, 7)
+    assert load.attributes["estimated_size_mb"] > 0
+    (summarize,) = recorder.by_name("manager.summarize")
+    assert summarize.attributes["cache_hit"] is False
+
+    (summarizer,) = recorder.by_name("summarizer.summarize")
+    assert summarizer.parent_id == summarize.span_id
+    columns = recorder.by_name("summarizer.column")
+    assert [span.attributes["column"] for span in columns] == manager.data.columns
+    assert {span.attributes["type"] for span in columns} >= {"numeric", "date-like string"}
+    (date_parsing,) = recorder.by_name("summarizer.date_parsing")
+    assert date_parsing.attributes["date_columns"] == ["launch_date", "last_order"]
+
+    (enrich,) = recorder.by_name("summarizer.enrich")
+    (prompts,) = recorder.by_name("summarizer.enrich.prompts")
+    llm_spans = recorder.by_name("llm.generate_text")
+    assert len(llm_spans) == enrich.attributes["batches"]
+    assert all(span.parent_id == enrich.span_id for span in llm_spans + [prompts])
+    assert all(span.attributes["total_tokens"] > 0 for span in llm_spans)
+    assert all(span.duration >= 0 for span in recorder.spans)
+    assert next(iter(recorder.totals())) == "manager.summarize"
+
+
+def test_async_spans_keep_their_parent(recorder):
+    manager = Manager(filepath=DATASET_PATH, llm_client=StubLLM())
+    asyncio.run(manager.asummarize(n_samples=1, enrich=True))
+
+    (summarizer,) = recorder.by_name("summarizer.summarize")
+    (profile,) = recorder.by_name("summarizer.profile")
+    (enrich,) = recorder.by_name("summarizer.enrich")
+    assert profile.parent_id == summarizer.span_id
+    assert all(span.parent_id == enrich.span_id for span in recorder.by_name("llm.generate_text"))
+
+
+def test_failing_hook_does_not_fail_run(recorder):
+    def failing_hook(span):
+        raise RuntimeError("exporter down")
+
+    INSTRUMENTATION.add_hook(failing_hook)
+    try:
+        Manager(filepath=DATASET_PATH).summarize(n_samples=1)
+    finally:
+        INSTRUMENTATION.remove_hook(failing_hook)
+    assert recorder.by_name("summarizer.summarize")
+
+
+def test_span_records_errors(recorder):
+    with pytest.raises(ValueError):
+        with INSTRUMENTATION.span("phase"):
+            raise ValueError("bad input")
+
+    (span,) = recorder.spans
+    assert span.error == "ValueError: bad input"
+
+
+def test_json_lines_exporter(tmp_path):
+    path = tmp_path / "spans.jsonl"
+    exporter = INSTRUMENTATION.add_hook(JsonLinesExporter(str(path)))
+    try:
+        with INSTRUMENTATION.span("outer", rows=3):
+            with INSTRUMENTATION.span("inner"):
+                pass
+    finally:
+        INSTRUMENTATION.remove_hook(exporter)
+
+    inner, outer = [json.loads(line) for line in path.read_text().splitlines()]
+    assert (inner["name"], outer["name"]) == ("inner", "outer")
+    assert inner["parent_id"] == outer["span_id"]
+    assert outer["attributes"] == {"rows": 3}
@@ -0,0 +1,746 @@
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import asyncio
+import json
+import threading
+import time
+import httpx
+import pytest
+import polars as pl
+from openai import BadRequestError, InternalServerError, RateLimitError
+from openai.types.chat import ChatCompletion, ChatCompletionChunk
+from mindscope import Manager
+from mindscope.components import Summarizer
+from mindscope.components.core import DiskCache, ProfileCache
+from mindscope.components.llm import (
+    LLMCache,
+    OpenAIClient,
+    AsyncOpenAIClient,
+    CLIENT_REGISTRY,
+    RequestScheduler,
+    TokenBucket,
+    count_tokens,
+)
+from mindscope.components.utils.summarizer import compact_summary, merge_enrichments
+from mindscope.components.models import GenerationConfig, Enrichment, LLMResponse, PersonaAnalysis, Summary
+from mindscope.components.utils.json_stream import IncrementalJSONParser
+from mindscope.components.sample_personas import cxo, VPs
+
+
+def enriched_content(messages) -> str:
+    """Summaries of the columns of an enrichment prompt."""
+    summary = json.loads(messages[-1]["content"].split("Dataset:", 1)[1])
+    return json.dumps(
+        {
+            "description": "A generated description.",
+            "columns": [
+                {"column": column["column"], "summary": f"Summary of {column['column']}."}
+                for column in summary["columns"]
+            ],
+        }
+    )
+
+
+def fake_completion(model: str, content: str, calls: int) -> ChatCompletion:
+    return ChatCompletion.model_validate(
+        {
+            "id": f"chatcmpl-{calls}",
+            "object": "chat.completion",
+            "created": 0,
+            "model": model,
+            "choices": [
+                {
+                    "index": 0,
+                    "finish_reason": "stop",
+                    "message": {"role": "assistant", "content": content},
+                }
+            ],
+            "usage": {
+                "prompt_tokens": 10,
+                "completion_tokens": 2,
+                "total_tokens": 12,
+            },
+        }
+    )
+
+
+def fake_chunks(model: str, content: str, calls: int, size: int = 4):
+    """The content streamed in chunks of `size` characters, usage in the last chunk."""
+    base = {"id": f"chatcmpl-{calls}", "object": "chat.completion.chunk", "created": 0, "model": model}
+    for start in range(0, len(content), size):
+        yield ChatCompletionChunk.model_validate(
+            {**base, "choices": [{"index": 0, "delta": {"content": content[start : start + size]}}]}
+        )
+    yield ChatCompletionChunk.model_validate(
+        {
+            **base,
+            "choices": [],
+            "usage": {"prompt_tokens": 10, "completion_tokens": 2, "total_tokens": 12},
+        }
+    )
+
+
+def analysis_content(messages) -> str:
+    """Answer a persona analysis prompt with the columns it was given."""
+    summary = json.loads(messages[0]["content"].split("Dataset:", 1)[1].split("\n", 1)[0])
+    persona = json.loads(messages[-1]["content"].split("Persona:", 1)[1])
+    return json.dumps(
+        {
+            "summary": f"Analysis for {persona['name']}.",
+            "relevant_columns": [column["column"] for column in summary["columns"]],
+            "insights": persona["goals"],
+        }
+    )
+
+
+def fake_content(messages) -> str:
+    if "Dataset:" in messages[-1]["content"]:
+        return enriched_content(messages)
+    if "Persona:" in messages[-1]["content"]:
+        return analysis_content(messages)
+    return "Hello!"
+
+
+class FakeCompletions:
+    def __init__(self):
+        self.calls = 0
+        self.messages = []
+        self.response_formats = []
+        self._lock = threading.Lock()
+
+    def create(self, **kwargs):
+        with self._lock:
+            self.calls += 1
+            self.messages.append(kwargs["messages"])
+        if kwargs.get("stream"):
+            return fake_chunks(kwargs["model"], fake_content(kwargs["messages"]), self.calls)
+        return fake_completion(kwargs["model"], fake_content(kwargs["messages"]), self.calls)
+
+    def parse(self, **kwargs):
+        self.response_formats.append(kwargs.pop("response_format"))
+        return self.create(**kwargs)
+
+
+class FakeAsyncStream:
+    """Chunks served like the SDK's `AsyncStream`, with its `close` coroutine."""
+
+    def __init__(self, chunks, delay: float = 0):
+        self.chunks = iter(chunks)
+        self.delay = delay
+        self.closed = False
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        await asyncio.sleep(self.delay)
+        try:
+            return next(self.chunks)
+        except StopIteration:
+            raise StopAsyncIteration from None
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeAsyncCompletions:
+    def __init__(self, chunk_delay: float = 0):
+        self.calls = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.chunk_delay = chunk_delay
+        self.streams = []
+
+    async def create(self, **kwargs):
+        self.calls += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+        if kwargs.get("stream"):
+            chunks = fake_chunks(kwargs["model"], fake_content(kwargs["messages"]), self.calls)
+            self.streams.append(FakeAsyncStream(chunks, self.chunk_delay))
+            return self.streams[-1]
+        return fake_completion(
+            kwargs["model"], fake_content(kwargs["messages"]), self.calls
+        )
+
+    async def parse(self, **kwargs):
+        kwargs.pop("response_format")
+        return await self.create(**kwargs)
+
+
+class FakeChat:
+    def __init__(self, completions):
+        self.completions = completions
+
+
+class FakeOpenAI:
+    def __init__(self, completions=None):
+        self.chat = FakeChat(completions or FakeCompletions())
+
+
+@pytest.fixture
+def fake_client(monkeypatch, tmp_path):
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    # A fresh shared scheduler, requests of earlier tests do not count.
+    CLIENT_REGISTRY.clear()
+    client = OpenAIClient(cache=LLMCache(path=str(tmp_path / "llm.sqlite")))
+    client.client = FakeOpenAI()
+    return client
+
+
+def test_disk_cache_lru_eviction(tmp_path):
+    cache = DiskCache(path=str(tmp_path / "cache.sqlite"), max_entries=2)
+    cache.set("a", b"1")
+    time.sleep(0.01)
+    cache.set("b", b"2")
+    time.sleep(0.01)
+    assert cache.get("a") == b"1"
+    time.sleep(0.01)
+    cache.set("c", b"3")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == b"1"
+    assert cache.get("c") == b"3"
+    assert cache.stats()["entries"] == 2
+    assert cache.stats()["hits"] == 3
+    assert cache.stats()["misses"] == 1
+
+
+def test_disk_cache_ttl(tmp_path):
+    cache = DiskCache(path=str(tmp_path / "cache.sqlite"), ttl=0.05)
+    cache.set("a", b"1")
+    assert cache.get("a") == b"1"
+    time.sleep(0.1)
+    assert cache.get("a") is None
+
+
+def test_generate_text_served_from_cache(fake_client: OpenAIClient):
+    messages = [{"role": "user", "content": "Hi"}]
+    first = fake_client.generate_text(messages, gen_config=GenerationConfig())
+    second = fake_client.generate_text(messages, gen_config=GenerationConfig())
+
+    assert fake_client.client.chat.completions.calls == 1
+    assert second.text == first.text
+    assert second.usage["total_tokens"] == 12
+    assert fake_client.cache.stats()["hits"] == 1
+
+    fake_client.generate_text(
+        messages, gen_config=GenerationConfig(temperature=0.1)
+    )
+    fake_client.chat([{"role": "user", "content": "Hi again"}], GenerationConfig())
+    assert fake_client.client.chat.completions.calls == 3
+
+
+def test_async_summarize_many_datasets(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    client = AsyncOpenAIClient(max_concurrency=2)
+    completions = FakeAsyncCompletions()
+    client.client = FakeOpenAI(completions)
+
+    managers = [
+        Manager(data=pl.DataFrame({"id": list(range(i + 1)), "value": [1.5] * (i + 1)}), llm_client=client)
+        for i in range(6)
+    ]
+
+    async def run():
+        return await asyncio.gather(
+            *(manager.asummarize(n_samples=1, enrich=True) for manager in managers)
+        )
+
+    summaries = asyncio.run(run())
+
+    assert completions.calls == 6
+    assert completions.max_in_flight == 2
+    for summary in summaries:
+        assert isinstance(summary, Summary)
+        assert summary.description == "A generated description."
+        assert summary.columns[0].summary == "Summary of id."
+
+
+def test_wide_dataset_enriched_in_batches(fake_client: OpenAIClient):
+    wide_df = pl.DataFrame({f"column_{i}": [i, i + 1, i + 2] for i in range(120)})
+    summarizer = Summarizer(data=wide_df, llm_client=fake_client)
+    summarizer.ENRICH_BATCH_TOKENS = 500
+    summary = summarizer.summarize(n_samples=1, enrich=True)
+
+    assert fake_client.client.chat.completions.calls > 1
+    assert summary.description == "A generated description."
+    assert [column.column for column in summary.columns] == wide_df.columns
+    for column in summary.columns:
+        assert column.summary == f"Summary of {column.column}."
+        assert column.min == wide_df[column.column].min()
+
+
+def test_count_tokens():
+    assert count_tokens("") == 0
+    assert count_tokens("hello world") == 2
+    assert count_tokens('{"count": 12345}') == 6
+
+
+def test_compact_summary_in_priority_order():
+    column = {
+        "column": "notes",
+        "mean": 0.123456789,
+        "summary": None,
+        "samples": ["x" * 200, "y" * 200, "z" * 200],
+        "categories": [f"category {i}" for i in range(40)],
+    }
+    summary = {"name": "", "columns": [column]}
+
+    compacted, steps = compact_summary(summary, token_budget=10_000)
+    assert steps == [] and compacted == summary
+
+    compacted, steps = compact_summary(summary, token_budget=50)
+    assert steps[:3] == ["drop_nulls", "round_floats", "shorten_samples"]
+    column = compacted["columns"][0]
+    assert "summary" not in column
+    assert column["mean"] == 0.1235
+    assert column.get("samples", ["x" * 40]) == ["x" * 40]
+    assert len(column["categories"]) <= 10
+    # The original summary is left untouched.
+    assert len(summary["columns"][0]["samples"]) == 3
+
+
+def test_wide_dataset_keeps_samples_in_prompts():
+    wide_df = pl.DataFrame({f"column_{i}": [float(i + j) for j in range(20)] for i in range(300)})
+    summarizer = Summarizer(data=wide_df)
+    batches = summarizer._enrich_batches(summarizer.summarize(n_samples=2))
+
+    assert len(batches) > 1
+    columns = [
+        column
+        for messages, tokens in batches
+        for column in json.loads(messages[-1]["content"].split("Dataset:", 1)[1])["columns"]
+    ]
+    assert [column["column"] for column in columns] == wide_df.columns
+    assert all(len(column["samples"]) == 2 and "histogram" in column for column in columns)
+    assert all(
+        tokens["prompt_after_compaction"] == tokens["prompt_before_compaction"]
+        for _, tokens in batches
+    )
+
+
+def test_compact_summary_without_lossy_steps():
+    column = {"column": "notes", "samples": ["x" * 200] * 3, "top_values": [{"value": "x", "count": 3}]}
+    compacted, steps = compact_summary({"columns": [column]}, token_budget=5, lossy=False)
+    assert "drop_samples" not in steps and "drop_distributions" not in steps
+    assert compacted["columns"][0]["samples"] == ["x" * 40]
+    assert "top_values" in compacted["columns"][0]
+
+
+def test_enrichment_reports_estimated_tokens(fake_client: OpenAIClient):
+    df = pl.DataFrame(
+        {
+            f"text_{i}": [f"a rather long free text value number {j} " * 5 for j in range(50)]
+            for i in range(10)
+        }
+    )
+    summarizer = Summarizer(data=df, llm_client=fake_client)
+    summarizer.ENRICH_BATCH_TOKENS = 100
+    summary = summarizer.summarize(n_samples=3, enrich=True)
+
+    assert [column.summary for column in summary.columns] == [
+        f"Summary of {name}." for name in df.columns
+    ]
+    # Local statistics are merged back untouched by the compaction.
+    assert all(len(column.samples) == 3 for column in summary.columns)
+    assert summarizer.llm_responses
+    for response in summarizer.llm_responses:
+        tokens = response.estimated_tokens
+        assert tokens["prompt_after_compaction"] < tokens["prompt_before_compaction"]
+
+
+def test_clients_share_pooled_sdk_client(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    CLIENT_REGISTRY.clear()
+
+    first = OpenAIClient(base_url="http://localhost:8000/v1")
+    second = OpenAIClient(base_url="http://localhost:8000/v1", model_name="gpt-4o")
+    assert first.client is second.client
+    assert str(first.client.base_url) == "http://localhost:8000/v1/"
+
+    other_key = OpenAIClient(api_key="other-key", base_url="http://localhost:8000/v1")
+    other_pool = OpenAIClient(base_url="http://localhost:8000/v1", max_connections=4)
+    assert other_key.client is not first.client
+    assert other_pool.client is not first.client
+    assert len(CLIENT_REGISTRY) == 3
+    CLIENT_REGISTRY.clear()
+
+
+def test_clients_share_account_scheduler(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    CLIENT_REGISTRY.clear()
+    monkeypatch.setitem(CLIENT_REGISTRY.scheduler_defaults, "requests_per_minute", 60)
+
+    first, second = OpenAIClient(), AsyncOpenAIClient()
+    assert first.scheduler is second.scheduler
+    assert OpenAIClient(model_name="gpt-4o").scheduler is not first.scheduler
+    assert OpenAIClient(api_key="other-key").scheduler is not first.scheduler
+
+    first.client = FakeOpenAI()
+    first.chat([{"role": "user", "content": "Hi"}])
+    third = OpenAIClient()
+    third.client = FakeOpenAI()
+    third.chat([{"role": "user", "content": "Hi"}])
+    assert first.scheduler.stats()["requests"] == 2
+
+    # Together they used 2 of the 60 requests per minute, 58 more go through at once.
+    for _ in range(58):
+        assert second.scheduler._reserve(0) == 0
+    assert second.scheduler._reserve(0) == pytest.approx(1.0, abs=0.05)
+    CLIENT_REGISTRY.clear()
+
+
+def test_async_clients_pooled_per_event_loop(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    CLIENT_REGISTRY.clear()
+    first, second = AsyncOpenAIClient(), AsyncOpenAIClient()
+
+    async def resolve():
+        return first._async_client(), second._async_client()
+
+    first_loop = asyncio.run(resolve())
+    second_loop = asyncio.run(resolve())
+    assert first_loop[0] is first_loop[1]
+    assert second_loop[0] is not first_loop[0]
+    CLIENT_REGISTRY.clear()
+
+
+def api_error(error_class, status_code: int, headers=None):
+    request = httpx.Request("POST", "https://api.openai.com/v1/chat/completions")
+    response = httpx.Response(status_code, headers=headers or {}, request=request)
+    return error_class("error", response=response, body=None)
+
+
+class FlakyCompletions(FakeCompletions):
+    """Fails with the given errors before answering."""
+
+    def __init__(self, errors):
+        super().__init__()
+        self.errors = list(errors)
+
+    def create(self, **kwargs):
+        if self.errors:
+            raise self.errors.pop(0)
+        return super().create(**kwargs)
+
+
+def test_token_bucket_paces_requests():
+    now = [0.0]
+    bucket = TokenBucket(rate_per_minute=60, clock=lambda: now[0])
+
+    assert bucket.reserve(60) == 0
+    assert bucket.reserve(1) == pytest.approx(1.0)
+    now[0] = 3.0
+    assert bucket.reserve(1) == 0
+    # More than a minute worth of tokens is capped to the bucket size.
+    assert bucket.reserve(1000) == pytest.approx(59.0)
+
+
+def test_scheduler_retries_transient_errors(fake_client: OpenAIClient):
+    fake_client.scheduler = RequestScheduler(base_delay=0.001)
+    fake_client.client = FakeOpenAI(
+        FlakyCompletions(
+            [
+                api_error(RateLimitError, 429, {"retry-after-ms": "5"}),
+                api_error(InternalServerError, 503),
+            ]
+        )
+    )
+
+    response = fake_client.chat([{"role": "user", "content": "Hi"}])
+
+    assert response.text[0].content == "Hello!"
+    stats = fake_client.scheduler.stats()
+    assert stats["requests"] == 3
+    assert stats["retries"] == 2
+    assert stats["wait_time"] >= 0.005
+    assert stats["queue_depth"] == 0
+
+
+def test_scheduler_does_not_retry_client_errors(fake_client: OpenAIClient):
+    fake_client.scheduler = RequestScheduler(base_delay=0.001)
+    fake_client.client = FakeOpenAI(FlakyCompletions([api_error(BadRequestError, 400)]))
+
+    with pytest.raises(BadRequestError):
+        fake_client.chat([{"role": "user", "content": "Hi"}])
+    assert fake_client.scheduler.stats()["failures"] == 1
+
+
+def test_scheduler_limits_requests_per_minute():
+    scheduler = RequestScheduler(requests_per_minute=1200)
+
+    async def run():
+        await asyncio.gather(*(scheduler.arun(lambda: asyncio.sleep(0)) for _ in range(1203)))
+
+    started = time.monotonic()
+    asyncio.run(run())
+    # A minute worth of requests goes through at once, the rest is paced
+    # at one request every 50ms.
+    assert time.monotonic() - started >= 0.14
+    assert scheduler.stats()["max_queue_depth"] == 3
+
+
+def test_manager_analyzes_many_personas(fake_client: OpenAIClient, monkeypatch):
+    personas = [getattr(cxo, name) for name in cxo.__all__] + [
+        getattr(VPs, name) for name in VPs.__all__
+    ]
+    df = pl.DataFrame(
+        {"region": ["north", "south", "east"] * 2, "revenue": [1.5, 2.5, 3.5] * 2}
+    )
+    manager = Manager(data=df, llm_client=fake_client)
+    manager.set_personas(personas)
+
+    profiles = []
+    local_summary = Summarizer._local_summary
+    monkeypatch.setattr(
+        Summarizer,
+        "_local_summary",
+        lambda self, **kwargs: profiles.append(1) or local_summary(self, **kwargs),
+    )
+    analyses = manager.analyze()
+
+    assert len(profiles) == 1
+    assert list(analyses) == [persona.name for persona in personas]
+    for persona in personas:
+        analysis = analyses[persona.name]
+        assert isinstance(analysis, PersonaAnalysis)
+        assert analysis.summary == f"Analysis for {persona.name}."
+        assert analysis.relevant_columns == ["region", "revenue"]
+        assert analysis.insights == persona.goals
+    # Every request shares the same dataset prompt.
+    system_prompts = {messages[0]["content"] for messages in fake_client.client.chat.completions.messages}
+    assert len(system_prompts) == 1
+
+    # The profile is reused by later analyses.
+    asyncio.run(manager.aanalyze(personas[:2]))
+    assert len(profiles) == 1
+
+
+def test_analyze_without_personas_raises(fake_client: OpenAIClient):
+    manager = Manager(data=pl.DataFrame({"a": [1, 2]}), llm_client=fake_client)
+    with pytest.raises(ValueError):
+        manager.analyze()
+
+
+def test_incremental_parser_yields_completed_items():
+    document = json.dumps(
+        {
+            "description": 'A "quoted", {braced} text.',
+            "columns": [{"column": "a", "stats": {"values": [1, "]"]}, "summary": "A."}, {"column": "b"}],
+            "count": 2,
+        }
+    )
+    parser = IncrementalJSONParser()
+    events = []
+    for position, char in enumerate("```json\n" + document + "\n```"):
+        events.extend((position, event) for event in parser.feed(char))
+
+    assert [event for _, event in events] == [
+        ("field", "description", 'A "quoted", {braced} text.'),
+        ("item", "columns", {"column": "a", "stats": {"values": [1, "]"]}, "summary": "A."}),
+        ("item", "columns", {"column": "b"}),
+        ("field", "columns", json.loads(document)["columns"]),
+        ("field", "count", 2),
+    ]
+    # The first column is reported before the second one is written.
+    assert events[1][0] < document.index('"b"') + len("```json\n")
+    assert parser.done
+
+
+def test_stream_text_caches_complete_response(fake_client: OpenAIClient):
+    messages = [{"role": "user", "content": "Hi"}]
+    items = list(fake_client.stream_text(messages, gen_config=GenerationConfig()))
+
+    *deltas, response = items
+    assert len(deltas) > 1
+    assert isinstance(response, LLMResponse)
+    assert response.text[0].content == "".join(deltas)
+    assert response.usage["total_tokens"] == 12
+
+    cached = list(fake_client.stream_text(messages, gen_config=GenerationConfig()))
+    assert fake_client.client.chat.completions.calls == 1
+    assert cached[0] == response.text[0].content
+    assert fake_client.generate_text(messages, gen_config=GenerationConfig()).text == response.text
+    assert fake_client.client.chat.completions.calls == 1
+
+
+def test_stream_summarize_yields_columns_before_summary(fake_client: OpenAIClient):
+    data = pl.DataFrame({f"column_{i}": [i, i + 1, i + 2] for i in range(30)})
+    summarizer = Summarizer(data=data, llm_client=fake_client)
+    summarizer.ENRICH_BATCH_TOKENS = 500
+    events = list(summarizer.stream_summarize(n_samples=1))
+
+    *partial, last = events
+    assert fake_client.client.chat.completions.calls > 1
+    assert [event.kind for event in partial].count("description") == 1
+    columns = {event.column: event.text for event in partial if event.kind == "column"}
+    assert columns == {name: f"Summary of {name}." for name in data.columns}
+    assert last.kind == "summary"
+    assert last.summary == summarizer.summary
+    assert summarizer.summary.columns[0].summary == "Summary of column_0."
+    assert len(summarizer.llm_responses) == fake_client.client.chat.completions.calls
+
+
+class SlowStreamCompletions(FakeCompletions):
+    """Streams one character per chunk with a pause, and records closed streams."""
+
+    def __init__(self):
+        super().__init__()
+        self.closed = 0
+
+    def create(self, **kwargs):
+        chunks = super().create(**kwargs)
+
+        def stream():
+            try:
+                for chunk in fake_chunks(kwargs["model"], fake_content(kwargs["messages"]), self.calls, size=1):
+                    time.sleep(0.01)
+                    yield chunk
+            finally:
+                with self._lock:
+                    self.closed += 1
+
+        return stream() if kwargs.get("stream") else chunks
+
+
+def test_stream_summarize_stops_streams_on_early_exit(fake_client: OpenAIClient):
+    completions = SlowStreamCompletions()
+    fake_client.client = FakeOpenAI(completions)
+    data = pl.DataFrame({f"column_{i}": [i, i + 1, i + 2] for i in range(30)})
+    summarizer = Summarizer(data=data, llm_client=fake_client)
+    summarizer.ENRICH_BATCH_TOKENS = 500
+    summarizer.ENRICH_MAX_WORKERS = 2
+
+    events = summarizer.stream_summarize(n_samples=1)
+    started = time.perf_counter()
+    next(event for event in events if event.kind == "column")
+    events.close()
+
+    # Closing does not wait for the running streams to finish.
+    assert time.perf_counter() - started < 2
+    deadline = time.perf_counter() + 5
+    while completions.closed < completions.calls and time.perf_counter() < deadline:
+        time.sleep(0.01)
+    # Batches not started yet never open a stream, running ones are closed.
+    assert completions.calls <= summarizer.ENRICH_MAX_WORKERS
+    assert completions.closed == completions.calls
+
+
+def test_stream_summarize_without_final_response(fake_client: OpenAIClient, monkeypatch):
+    def stream_text(self, prompt, **kwargs):
+        yield "{"
+        yield "}"
+
+    monkeypatch.setattr(OpenAIClient, "stream_text", stream_text)
+    summarizer = Summarizer(data=pl.DataFrame({"id": [1, 2, 3]}), llm_client=fake_client)
+
+    with pytest.raises(RuntimeError, match="without a complete response"):
+        list(summarizer.stream_summarize(n_samples=1))
+
+
+def test_async_stream_summarize(monkeypatch, tmp_path):
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    client = AsyncOpenAIClient(max_concurrency=2)
+    completions = FakeAsyncCompletions()
+    client.client = FakeOpenAI(completions)
+    manager = Manager(data=pl.DataFrame({"id": [1, 2, 3], "value": [1.5, 2.5, 3.5]}), llm_client=client)
+
+    async def run():
+        return [event async for event in manager.astream_summarize(n_samples=1)]
+
+    events = asyncio.run(run())
+    assert [event.kind for event in events] == ["description", "column", "column", "summary"]
+    assert [event.column for event in events[1:3]] == ["id", "value"]
+    assert manager.summary.columns[1].summary == "Summary of value."
+
+
+def test_async_stream_summarize_closes_streams_on_early_exit(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    CLIENT_REGISTRY.clear()
+    client = AsyncOpenAIClient(max_concurrency=2)
+    completions = FakeAsyncCompletions(chunk_delay=0.01)
+    client.client = FakeOpenAI(completions)
+    data = pl.DataFrame({f"column_{i}": [i, i + 1, i + 2] for i in range(30)})
+    summarizer = Summarizer(data=data, llm_client=client)
+    summarizer.ENRICH_BATCH_TOKENS = 500
+
+    async def run():
+        events = summarizer.astream_summarize(n_samples=1)
+        async for event in events:
+            if event.kind == "column":
+                break
+        await events.aclose()
+        # Let the cancelled batches run their cleanup.
+        await asyncio.sleep(0.05)
+        # Both concurrency slots are free again.
+        for _ in range(2):
+            await asyncio.wait_for(client._semaphore.acquire(), timeout=1)
+
+    asyncio.run(run())
+    assert 0 < len(completions.streams) <= 2
+    assert all(stream.closed for stream in completions.streams)
+
+
+def test_manager_stream_replays_cached_summary(fake_client: OpenAIClient, tmp_path):
+    path = tmp_path / "dataset.csv"
+    pl.DataFrame({"id": [1, 2, 3], "value": [1.5, 2.5, 3.5]}).write_csv(path)
+    cache = ProfileCache(path=str(tmp_path / "profiles.sqlite"))
+
+    first = list(Manager(filepath=str(path), llm_client=fake_client, profile_cache=cache).stream_summarize(n_samples=1))
+    calls = fake_client.client.chat.completions.calls
+    manager = Manager(filepath=str(path), llm_client=fake_client, profile_cache=cache)
+    second = list(manager.stream_summarize(n_samples=1))
+
+    assert fake_client.client.chat.completions.calls == calls
+    assert [(event.kind, event.column, event.text) for event in second] == [
+        (event.kind, event.column, event.text) for event in first
+    ]
+    assert manager.summary == first[-1].summary
+
+
+def test_enrichment_requests_only_column_summaries(fake_client: OpenAIClient):
+    data = pl.DataFrame({"id": [1, 2, 3], "label": ["a", "b", "c"]})
+    summary = Summarizer(data=data, llm_client=fake_client).summarize(n_samples=1, enrich=True)
+
+    assert fake_client.client.chat.completions.response_formats == [Enrichment]
+    assert summary.columns[1].summary == "Summary of label."
+    assert summary.columns[1].samples
+
+    stream_config = fake_client._stream_config({"model": "gpt-4o-mini"}, Enrichment)
+    response_format = stream_config["response_format"]
+    assert response_format["json_schema"]["strict"] is True
+    assert response_format["json_schema"]["schema"]["required"] == ["description", "columns"]
+    assert response_format["json_schema"]["schema"]["additionalProperties"] is False
+
+
+def test_merge_enrichments_of_schema_output():
+    summary = {
+        "name": "",
+        "description": "",
+        "columns": [{"column": "id", "min": 1}, {"column": "label", "summary": "Kept."}],
+    }
+    batches = [
+        Enrichment(description="First.", columns=[{"column": "id", "summary": "Identifiers."}]),
+        Enrichment(description="Second.", columns=[{"column": "label", "summary": ""}]),
+    ]
+    merged = merge_enrichments(summary, [batch.model_dump() for batch in batches])
+
+    assert merged["description"] == "First."
+    assert merged["name"] == ""
+    assert merged["columns"] == [
+        {"column": "id", "min": 1, "summary": "Identifiers."},
+        {"column": "label", "summary": "Kept."},
+    ]
+    assert summary["columns"][0] == {"column": "id", "min": 1}
+
+
+def test_enrichment_outside_the_schema_is_skipped():
+    mismatched = json.dumps({"description": "A.", "columns": [{"name": "id", "summary": "Ids."}]})
+    response = LLMResponse(text=[{"role": "assistant", "content": mismatched}], config=GenerationConfig())
+
+    assert Summarizer._parse_enrichment(response) == {}
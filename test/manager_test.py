@@ -4,3 +4,226 @@
 
 # EMPTY_DF = pl.DataFrame()
 # manager = Manager(data=EMPTY_DF)
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import shutil
+from datetime import date, timedelta
+import pytest
+import polars as pl
+from mindscope import Manager
+from mindscope.components import manager as manager_module
+from mindscope.components.core import ProfileCache
+from mindscope.components.summarizer import Summarizer
+from mindscope.components.utils.manager import get_dataframe_from_filepath
+from mindscope.components.utils.parquet import read_parquet_statistics
+
+DATASET_PATH = os.path.join(os.path.dirname(__file__), "1000_rows_dataset.csv")
+ALL_TYPES_PATH = os.path.join(os.path.dirname(__file__), "polars_all_types_sample_int64safe.csv")
+
+
+def test_manager_loads_filepath():
+    manager = Manager(filepath=DATASET_PATH)
+
+    assert isinstance(manager.data, pl.DataFrame)
+    assert manager.data.height == 1000
+
+
+def test_manager_empty_data_raises():
+    manager = Manager(data=pl.DataFrame())
+
+    with pytest.raises(ValueError):
+        manager.summarize()
+
+
+def test_lazy_summary_matches_eager():
+    eager_summary = Manager(filepath=DATASET_PATH).summarize(n_samples=0)
+    lazy_manager = Manager(filepath=DATASET_PATH, lazy=True)
+    lazy_summary = lazy_manager.summarize(n_samples=0)
+
+    assert isinstance(lazy_manager.data, pl.LazyFrame)
+    assert lazy_summary == eager_summary
+    assert lazy_summary["filename"] == "1000_rows_dataset.csv"
+
+
+def test_lazy_summary_from_scan(tmp_path):
+    path = tmp_path / "dataset.parquet"
+    pl.read_csv(DATASET_PATH).write_parquet(path)
+
+    summary = Manager(data=pl.scan_parquet(path)).summarize(n_samples=2)
+
+    assert len(summary["columns"]) == 7
+    for column_props in summary["columns"]:
+        assert len(column_props["samples"]) == 2
+
+
+def test_profile_cache_serves_unchanged_file(tmp_path, monkeypatch):
+    path = tmp_path / "dataset.csv"
+    shutil.copy(DATASET_PATH, path)
+    cache = ProfileCache(path=str(tmp_path / "profiles.sqlite"))
+
+    first = Manager(filepath=str(path), profile_cache=cache).summarize(n_samples=2)
+
+    def fail(*args, **kwargs):
+        raise AssertionError("The file should not be read again.")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(manager_module, "get_dataframe_from_filepath", fail)
+        assert Manager(filepath=str(path), profile_cache=cache).summarize(n_samples=2) == first
+    assert cache.stats()["hits"] == 1
+
+    # Other options or a changed file are profiled again.
+    Manager(filepath=str(path), profile_cache=cache).summarize(n_samples=3)
+    Manager(
+        filepath=str(path), profile_cache=cache, summarizer_options={"CATEGORICAL_THRESHOLD": 0.5}
+    ).summarize(n_samples=2)
+    with open(path, "a") as f:
+        f.write(open(DATASET_PATH).read().splitlines()[1] + "\n")
+    changed = Manager(filepath=str(path), profile_cache=cache).summarize(n_samples=2)
+    assert changed["columns"][0]["not_null_count"] == 1001
+    assert cache.stats()["hits"] == 1
+
+
+def test_profile_cache_invalidate(tmp_path):
+    path = tmp_path / "dataset.csv"
+    shutil.copy(DATASET_PATH, path)
+    cache = ProfileCache(path=str(tmp_path / "profiles.sqlite"))
+    manager = Manager(filepath=str(path), profile_cache=cache, content_hash=True)
+    manager.summarize(n_samples=1)
+    manager.summarize(n_samples=2)
+    assert cache.stats()["entries"] == 2
+
+    manager.invalidate_cache()
+    assert cache.stats()["entries"] == 0
+    assert manager.summary is None
+
+
+def test_load_projection_and_row_limit():
+    data = get_dataframe_from_filepath(DATASET_PATH, columns=["price", "status"], n_rows=10)
+
+    assert data.columns == ["price", "status"]
+    assert data.height == 10
+
+    manager = Manager(filepath=DATASET_PATH, load_options={"columns": ["price"], "n_rows": 5})
+    summary = manager.summarize(n_samples=0)
+    assert [column["column"] for column in summary["columns"]] == ["price"]
+    assert manager.data.height == 5
+
+
+@pytest.mark.parametrize("extension", ["parquet", "ipc", "ndjson"])
+def test_load_formats_match_csv(tmp_path, extension):
+    expected = get_dataframe_from_filepath(DATASET_PATH, columns=["product_id", "price"])
+    path = str(tmp_path / f"dataset.{extension}")
+    getattr(pl.read_csv(DATASET_PATH), f"write_{extension}")(path)
+
+    data = get_dataframe_from_filepath(path, columns=["product_id", "price"], n_rows=100)
+    assert data.equals(expected.head(100))
+    lazy = get_dataframe_from_filepath(path, lazy=True, columns=["product_id", "price"])
+    assert lazy.collect().equals(expected)
+
+
+def test_load_schema_overrides(tmp_path):
+    data = get_dataframe_from_filepath(DATASET_PATH, schema_overrides={"product_id": pl.String})
+    assert data.schema["product_id"] == pl.String
+
+    path = str(tmp_path / "dataset.parquet")
+    pl.read_csv(DATASET_PATH).write_parquet(path)
+    data = get_dataframe_from_filepath(path, schema_overrides={"price": pl.Float32})
+    assert data.schema["price"] == pl.Float32
+
+
+def test_load_glob_and_hive_directory(tmp_path):
+    full = pl.read_csv(DATASET_PATH)
+    for status, part in full.partition_by("status", as_dict=True).items():
+        directory = tmp_path / "hive" / f"status={status[0]}"
+        directory.mkdir(parents=True)
+        part.drop("status").write_parquet(directory / "part.parquet")
+        part.write_csv(tmp_path / f"part_{status[0]}.csv")
+
+    data = get_dataframe_from_filepath(str(tmp_path / "hive"))
+    assert data.height == full.height
+    assert set(data.columns) == set(full.columns)
+
+    data = get_dataframe_from_filepath(str(tmp_path / "part_*.csv"), columns=["price"])
+    assert data.columns == ["price"]
+    assert data.height == full.height
+
+
+def without_metadata_marks(summary: dict) -> dict:
+    return {
+        **summary,
+        "columns": [
+            {key: value for key, value in column.items() if key != "metadata_statistics"}
+            for column in summary["columns"]
+        ],
+    }
+
+
+def test_file_statistics_match_data(tmp_path):
+    path = tmp_path / "dataset.parquet"
+    data = pl.read_csv(ALL_TYPES_PATH, try_parse_dates=True)
+    data.write_parquet(path, row_group_size=16)
+
+    footer = read_parquet_statistics(str(path))
+    assert footer["n_rows"] == data.height
+    assert footer["columns"]["int64_col"] == {
+        "min": data["int64_col"].min(),
+        "max": data["int64_col"].max(),
+        "null_count": data["int64_col"].null_count(),
+        "not_null_count": data["int64_col"].count(),
+    }
+
+    manager = Manager(filepath=str(path), file_statistics=True)
+    summary = manager.summarize(n_samples=0)
+    columns = {column["column"]: column for column in summary["columns"]}
+
+    assert isinstance(manager.data, pl.LazyFrame)
+    assert without_metadata_marks(summary) == without_metadata_marks(
+        Manager(filepath=str(path)).summarize(n_samples=0)
+    )
+    assert columns["float64_col"]["metadata_statistics"] == [
+        "min", "max", "null_count", "not_null_count"
+    ]
+    assert set(columns["date_col"]["metadata_statistics"]) == {
+        "min_date", "max_date", "null_count", "not_null_count", "min_max_diff"
+    }
+    assert columns["string_col"]["metadata_statistics"] == ["null_count", "not_null_count"]
+    assert "histogram" in columns["date_col"]
+    assert "histogram" in columns["float64_col"]
+
+
+def test_file_statistics_skip_reading_data(tmp_path, monkeypatch):
+    path = tmp_path / "dates.parquet"
+    pl.read_csv(ALL_TYPES_PATH, try_parse_dates=True).select("date_col", "datetime_col").write_parquet(path)
+
+    def fail(*args, **kwargs):
+        raise AssertionError("Statistics should come from the footer.")
+
+    monkeypatch.setattr(Summarizer, "_select", fail)
+    # Histograms are counted from the data.
+    manager = Manager(filepath=str(path), file_statistics=True, summarizer_options={"HISTOGRAM_BINS": 0})
+    summary = manager.summarize(n_samples=0)
+    assert [column["type"] for column in summary["columns"]] == ["date", "date"]
+
+
+def test_file_statistics_date_histogram_matches_data(tmp_path):
+    path = tmp_path / "dates.parquet"
+    data = pl.DataFrame({"day": [date(2024, 1, 1) + timedelta(days=i * i) for i in range(50)] + [None]})
+    data.write_parquet(path, row_group_size=16)
+
+    (footer,) = Manager(filepath=str(path), file_statistics=True).summarize(n_samples=0)["columns"]
+    (eager,) = Summarizer(data=data).summarize(n_samples=0)["columns"]
+    assert "min_date" in footer["metadata_statistics"]
+    assert footer["histogram"] == eager["histogram"]
+    assert sum(footer["histogram"]["counts"]) == 50
+
+
+def test_file_statistics_ignored_for_row_limit(tmp_path):
+    path = tmp_path / "dataset.parquet"
+    pl.read_csv(DATASET_PATH).write_parquet(path)
+
+    manager = Manager(filepath=str(path), file_statistics=True, load_options={"n_rows": 10})
+    summary = manager.summarize(n_samples=0)
+    assert all("metadata_statistics" not in column for column in summary["columns"])
+    assert summary["columns"][0]["not_null_count"] <= 10
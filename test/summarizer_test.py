@@ -2,10 +2,18 @@ import sys
 import os
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
-from datetime import date
+import subprocess
+import math
+from datetime import date, datetime, timedelta
+from decimal import Decimal
 import pytest
 import polars as pl
-from mindscope.components import Summarizer
+from mindscope.components import Summarizer, SummaryState
+from mindscope.components.models import Summary
+from mindscope.components.utils.summarizer import (
+    date_formats_from_summary,
+    infer_date_format,
+)
 from dotenv import load_dotenv
 
 import logging
@@ -32,7 +40,7 @@ def sample_df():
     #         ["active", "inactive", "active", "discontinued"], dtype=pl.Categorical
     #     ),
     # }
-    df = pl.read_csv("test\\1000_rows_dataset.csv")
+    df = pl.read_csv(os.path.join(os.path.dirname(__file__), "1000_rows_dataset.csv"))
     return df
 
 
@@ -115,6 +123,30 @@ def test_date_like_string_column_properties(sample_df):
     assert date_str_props["null_count"] == 0
 
 
+def test_date_format_inference():
+    day_first = pl.Series(["25/12/2024", "01/02/2024", "13/07/2023", None])
+    free_text = pl.Series(["hello world", "2024-01-01 was a day", "misc"])
+
+    assert infer_date_format(day_first.drop_nulls(), 0.9) == (True, "%d/%m/%Y")
+    assert infer_date_format(free_text, 0.9) == (False, None)
+
+
+def test_date_format_recorded_and_reused(sample_df):
+    summarizer = Summarizer(data=sample_df)
+    summary = summarizer.summarize()
+    formats = date_formats_from_summary(summary)
+
+    assert formats == {"launch_date": "%Y-%m-%d", "last_order": "%Y-%m-%d"}
+    assert summarizer.date_formats == formats
+
+    reused = Summarizer(data=sample_df, date_formats=formats).summarize()
+    reused_props = next(
+        col for col in reused["columns"] if col["column"] == "last_order"
+    )
+    assert reused_props["type"] == "date-like string"
+    assert reused_props["date_format"] == "%Y-%m-%d"
+
+
 def test_empty_dataframe():
     empty_df = pl.DataFrame()
     summarizer = Summarizer(data=empty_df)
@@ -134,6 +166,86 @@ def test_samples_in_summary(sample_df):
         assert len(column_props["samples"]) <= 5  # Default sample size
 
 
+def test_approximate_summary_error_bounds(sample_df: pl.DataFrame):
+    summarizer = Summarizer(data=sample_df)
+    summarizer.APPROXIMATE_SAMPLE_SIZE = 300
+    summary = summarizer.summarize(approximate=True)
+
+    price_props = next(col for col in summary["columns"] if col["column"] == "price")
+    median_bound = price_props["error_bounds"]["median"]
+    rank = (sample_df["price"] <= price_props["median"]).mean()
+    assert abs(rank - 0.5) <= median_bound["rank_error"]
+    assert price_props["min"] == sample_df["price"].min()
+
+    cat_props = next(col for col in summary["columns"] if col["column"] == "category")
+    assert cat_props["categories"] == sample_df["category"].unique().sort().to_list()
+    assert set(cat_props["error_bounds"]) == {"n_categories", "categories"}
+
+
+def test_approximate_small_frame_is_exact(sample_df: pl.DataFrame):
+    exact = Summarizer(data=sample_df).summarize(n_samples=0)
+    approximate = Summarizer(data=sample_df).summarize(n_samples=0, approximate=True)
+
+    assert approximate == exact
+
+
+def test_repeated_summarize_does_not_accumulate(sample_df):
+    summarizer = Summarizer(data=sample_df)
+    first = summarizer.summarize()
+    second = summarizer.summarize()
+
+    assert len(first["columns"]) == len(second["columns"]) == sample_df.width
+    assert first["columns"] is not second["columns"]
+
+
+# Runs in a fresh interpreter so the peak RSS is not polluted by other tests.
+MEMORY_PROBE = """
+import gc
+import polars as pl
+from mindscope.components import Summarizer
+
+n = 4_000_000
+df = pl.select(
+    value=pl.int_range(n).cast(pl.Float64).sin(),
+    amount=pl.int_range(n) % 1000,
+    flag=pl.int_range(n) % 3 == 0,
+    day=pl.date(2020, 1, 1) + pl.duration(days=pl.int_range(n) % 2000),
+)
+
+
+def status_kb(field):
+    return next(int(line.split()[1]) for line in open("/proc/self/status") if line.startswith(field))
+
+
+# Reset the peak RSS so building the frame cannot hide the peak of `summarize`.
+gc.collect()
+with open("/proc/self/clear_refs", "w") as f:
+    f.write("5")
+current = status_kb("VmRSS:")
+Summarizer(df).summarize()
+peak = status_kb("VmHWM:")
+print(df.estimated_size(), (peak - current) * 1024)
+"""
+
+
+@pytest.mark.slow
+def test_summarize_peak_memory_close_to_data_size():
+    if not os.path.exists("/proc/self/clear_refs"):
+        pytest.skip("Peak memory probe needs to reset the peak RSS through /proc.")
+
+    result = subprocess.run(
+        [sys.executable, "-c", MEMORY_PROBE],
+        capture_output=True,
+        text=True,
+        check=True,
+        cwd=os.path.join(os.path.dirname(__file__), ".."),
+    )
+    estimated_size, growth = map(int, result.stdout.split())
+
+    # A copy of the frame would add its whole estimated size on top.
+    assert growth < 0.5 * estimated_size
+
+
 def test_enrich_summary(sample_df):
     summarizer = Summarizer(data=sample_df)
     summary = summarizer.summarize(enrich=True)
@@ -142,3 +254,256 @@ def test_enrich_summary(sample_df):
     # Currently _enrich is a pass-through, so just verify it doesn't break
     assert summary is not None
     assert "columns" in summary
+
+
+def test_profile_matches_series_statistics(sample_df: pl.DataFrame):
+    wide_df = sample_df.with_columns(
+        [(pl.col("price") * i).alias(f"price_{i}") for i in range(1, 50)]
+    )
+    summarizer = Summarizer(data=wide_df)
+    summary = summarizer.summarize()
+
+    assert len(summary["columns"]) == wide_df.width
+    for column_props in summary["columns"]:
+        if column_props["type"] != "numeric":
+            continue
+        series = wide_df[column_props["column"]]
+        assert column_props["min"] == series.min()
+        assert column_props["max"] == series.max()
+        assert column_props["mean"] == pytest.approx(series.mean())
+        assert column_props["median"] == pytest.approx(series.median())
+        assert column_props["std"] == pytest.approx(series.std())
+        assert column_props["not_null_count"] == series.count()
+
+
+ALL_TYPES_PATH = os.path.join(
+    os.path.dirname(__file__), "polars_all_types_sample_int64safe.csv"
+)
+
+
+def assert_same_statistics(updated: dict, exact: dict):
+    for updated_column, exact_column in zip(updated["columns"], exact["columns"]):
+        assert updated_column.keys() == exact_column.keys()
+        for key, value in exact_column.items():
+            if key == "samples":
+                continue
+            if isinstance(value, float):
+                assert updated_column[key] == pytest.approx(value, rel=1e-9)
+            else:
+                assert updated_column[key] == value, (exact_column["column"], key)
+
+
+def test_update_matches_full_summary():
+    df = pl.read_csv(ALL_TYPES_PATH)
+    summarizer = Summarizer(data=df[:20])
+    summarizer.summarize()
+    updated = summarizer.update(df[20:30])
+    updated = summarizer.update(df[30:])
+
+    assert summarizer.N_ROWS == df.height
+    assert_same_statistics(updated, Summarizer(data=df).summarize())
+
+
+def test_update_from_saved_state(tmp_path):
+    df = pl.read_csv(ALL_TYPES_PATH)
+    summarizer = Summarizer(data=df[:25])
+    summarizer.build_state().save(str(tmp_path / "state.pkl"))
+
+    state = SummaryState.load(str(tmp_path / "state.pkl"))
+    # The old rows are never read again, only the state is.
+    stale = Summarizer(data=df[:25].lazy().filter(pl.lit(False)), state=state)
+    updated = stale.update(df[25:].lazy())
+
+    assert stale.state.n_rows == df.height
+    assert_same_statistics(updated, Summarizer(data=df).summarize())
+    assert updated["columns"][0]["samples"] == summarizer.update(df[25:])["columns"][0]["samples"]
+
+
+def test_update_sketches_report_error_bounds():
+    n = 50_000
+    df = pl.DataFrame(
+        {"value": pl.int_range(n, eager=True).cast(pl.Float64), "key": [f"k{i}" for i in range(n)]}
+    )
+    summarizer = Summarizer(data=df[:40_000])
+    updated = summarizer.update(df[40_000:])
+
+    value, key = updated["columns"]
+    assert value["median"] == pytest.approx(n / 2, rel=0.02)
+    assert value["error_bounds"]["median"]["method"] == "quantile sketch"
+    assert key["n_unique"] == pytest.approx(n, rel=0.05)
+    assert key["error_bounds"]["n_unique"]["method"] == "hyperloglog"
+
+
+def test_update_rejects_other_schema(sample_df):
+    summarizer = Summarizer(data=sample_df)
+    with pytest.raises(ValueError):
+        summarizer.update(sample_df.drop("price"))
+
+
+def test_summary_frame_round_trip(tmp_path):
+    summary = Summary(**Summarizer(data=pl.read_csv(ALL_TYPES_PATH)).summarize())
+    frame = summary.to_frame()
+
+    assert frame.height == len(summary.columns)
+    assert frame["column"].to_list() == [column.column for column in summary.columns]
+    assert frame.schema["mean"] == pl.Float64
+    assert Summary.from_frame(frame) == summary
+
+    summary.write_parquet(tmp_path / "summary.parquet")
+    summary.write_ipc(tmp_path / "summary.arrow")
+    assert Summary.read_parquet(tmp_path / "summary.parquet") == summary
+    assert Summary.read_ipc(tmp_path / "summary.arrow") == summary
+
+
+def test_summary_frame_keeps_tagged_values():
+    summary = Summary(
+        name="events",
+        source={"rows": 2, 1: "non string key"},
+        columns=[
+            {
+                "column": 3,
+                "type": "datetime",
+                "null_count": 0,
+                "not_null_count": 2,
+                "samples": [datetime(2024, 1, 2, 3, 4, 5), date(2024, 1, 2), None],
+                "range": timedelta(days=1, seconds=5),
+                "mean": float("nan"),
+                "counts": {"__type__": 1},
+            }
+        ],
+    )
+    restored = Summary.from_frame(summary.to_frame())
+
+    assert restored.model_dump(exclude={"columns"}) == summary.model_dump(exclude={"columns"})
+    column, original = restored.columns[0].model_dump(), summary.columns[0].model_dump()
+    assert math.isnan(column.pop("mean")) and math.isnan(original.pop("mean"))
+    assert column == original
+    assert Summary.from_frame(Summary(name="empty").to_frame()) == Summary(name="empty")
+
+
+def column_samples(summary: dict) -> dict:
+    return {column["column"]: column["samples"] for column in summary["columns"]}
+
+
+def test_samples_are_whole_rows():
+    df = pl.DataFrame({"id": range(500), "double": [2 * i for i in range(500)]})
+    summarizer = Summarizer(data=df)
+    samples = column_samples(summarizer.summarize(n_samples=5))
+
+    assert len(samples["id"]) == 5
+    assert samples["double"] == [2 * i for i in samples["id"]]
+    assert column_samples(Summarizer(data=df.lazy()).summarize(n_samples=5)) == samples
+    # The same rows as the samples of the incremental state.
+    assert samples["id"] == summarizer.build_state().samples["rows"]["id"][:5]
+
+
+def test_samples_of_short_frame():
+    summary = Summarizer(data=pl.DataFrame({"id": [1, 2]})).summarize(n_samples=5)
+    assert sorted(summary["columns"][0]["samples"]) == [1, 2]
+
+
+def test_stratified_samples_cover_rare_values():
+    df = pl.DataFrame({"id": range(1000), "kind": ["common"] * 990 + ["rare"] * 10})
+    summarizer = Summarizer(data=df)
+    summarizer.SAMPLE_STRATIFY_BY = "kind"
+    samples = column_samples(summarizer.summarize(n_samples=4))
+
+    assert sorted(set(samples["kind"])) == ["common", "rare"]
+    assert [df["kind"][i] for i in samples["id"]] == samples["kind"]
+
+
+def test_top_values_and_histogram():
+    df = pl.DataFrame(
+        {
+            "kind": ["b", "a", "a", "c", "b", "a", None, "d"],
+            "value": [0.0, 1.0, 2.0, 3.0, 4.0, 5.0, 9.0, 10.0],
+            "day": [date(2024, 1, 1 + i) for i in range(8)],
+        }
+    )
+    summarizer = Summarizer(data=df)
+    summarizer.TOP_VALUES_LIMIT = 3
+    summarizer.HISTOGRAM_BINS = 2
+    kind, value, day = summarizer.summarize(n_samples=0)["columns"]
+
+    assert kind["top_values"] == [
+        {"value": "a", "count": 3},
+        {"value": "b", "count": 2},
+        {"value": "c", "count": 1},
+    ]
+    assert value["histogram"] == {"edges": [0.0, 5.0, 10.0], "counts": [6, 2]}
+    assert day["histogram"]["edges"] == [date(2024, 1, 1), date(2024, 1, 4), date(2024, 1, 8)]
+    assert sum(day["histogram"]["counts"]) == 8
+    assert Summarizer(data=df.lazy()).summarize(n_samples=0)["columns"][0]["top_values"][:3] == kind["top_values"]
+
+
+def test_histogram_of_constant_column():
+    df = pl.DataFrame({"value": [7, 7, None]})
+    (value,) = Summarizer(data=df).summarize(n_samples=0)["columns"]
+    assert value["histogram"] == {"edges": [7.0, 7.0], "counts": [2]}
+
+
+def test_histogram_of_decimal_column():
+    df = pl.DataFrame({"price": [Decimal("1.5"), Decimal("2.5"), Decimal("3.0"), None]})
+    summarizer = Summarizer(data=df)
+    summarizer.HISTOGRAM_BINS = 3
+    (price,) = summarizer.summarize(n_samples=0)["columns"]
+    assert price["histogram"] == {"edges": [1.5, 2.0, 2.5, 3.0], "counts": [1, 1, 1]}
+
+
+def test_relationships(monkeypatch):
+    n = 300
+    x = pl.int_range(n, eager=True).cast(pl.Float64)
+    df = pl.DataFrame(
+        {
+            "x": x,
+            "double": 2 * x + 1,
+            "cube": (x - 150) ** 3,
+            "noise": x.hash(1).cast(pl.Float64),
+            "region": ["north", "south", "east"] * (n // 3),
+            "zone": ["n", "s", "e"] * (n // 3),
+            "flag": [True, False] * (n // 2),
+        }
+    ).with_columns(pl.when(pl.col("x") % 10 == 0).then(None).otherwise(pl.col("double")).alias("double"))
+    summarizer = Summarizer(data=df)
+    summarizer.RELATIONSHIPS_TOP_K = 4
+    relationships = summarizer.summarize(n_samples=0)["relationships"]
+
+    assert [pair["columns"] for pair in relationships] == [
+        ["x", "double"], ["x", "cube"], ["region", "zone"], ["double", "cube"]
+    ]
+    assert relationships[0]["pearson"] == pytest.approx(1.0)
+    assert relationships[1]["spearman"] == pytest.approx(1.0)
+    assert relationships[1]["pearson"] < 0.95
+    assert relationships[2]["cramers_v"] == pytest.approx(1.0)
+    assert "relationships" not in Summarizer(data=df).summarize(n_samples=0)
+
+    # Blocks of one column, read from a sample of a LazyFrame.
+    monkeypatch.setattr("mindscope.components.utils.relationships.RELATIONSHIP_BLOCK_COLUMNS", 1)
+    monkeypatch.setattr("mindscope.components.utils.relationships.RELATIONSHIP_BLOCK_CATEGORIES", 1)
+    blocked = Summarizer(data=df.lazy())
+    blocked.RELATIONSHIPS_TOP_K = 4
+    blocked.RELATIONSHIP_SAMPLE_SIZE = 200
+    sampled = blocked.summarize(n_samples=0)["relationships"]
+    assert [pair["columns"] for pair in sampled] == [pair["columns"] for pair in relationships]
+
+
+def test_update_keeps_top_values_of_high_cardinality_strings():
+    n = 3000
+    df = pl.DataFrame(
+        {
+            # A few frequent values among many rare ones.
+            "user": [f"user_{i % 4}" if i % 3 else f"rare_{i}" for i in range(n)],
+            "day": [f"2024-01-{1 + i % 7:02d}" if i % 5 else f"2024-02-{1 + i % 28:02d}" for i in range(n)],
+        }
+    )
+    summarizer = Summarizer(data=df[:1000])
+    summarizer.summarize(n_samples=0)
+    summarizer.update(df[1000:2000])
+    updated = {column["column"]: column for column in summarizer.update(df[2000:], n_samples=0)["columns"]}
+    exact = {column["column"]: column for column in Summarizer(data=df).summarize(n_samples=0)["columns"]}
+
+    assert updated["user"]["n_unique"] > summarizer.CATEGORICAL_UNIQUE_LIMIT
+    assert updated["user"]["error_bounds"]["top_values"]["method"] == "heavy hitters"
+    assert updated["day"]["type"] == "date-like string"
+    for name in ["user", "day"]:
+        assert updated[name]["top_values"] == exact[name]["top_values"]